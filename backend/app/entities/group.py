@@ -1,6 +1,7 @@
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional
 from app.entities.user import User
+from app.utils.auth.signed_urls import SignedUrl
 
 
 class Group(SQLModel, table=True):
@@ -10,7 +11,9 @@ class Group(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     nom: str = Field()
     description: Optional[str] = Field(default=None)
-    image_url: Optional[str] = Field(default=None)
+    image_url: Optional[str] = Field(default=None)  # Rendition carree 512px
+    image_small_url: Optional[str] = Field(default=None)  # 96px
+    image_medium_url: Optional[str] = Field(default=None)  # 256px (cartes de groupe)
     invite_code: Optional[str] = Field(default=None, unique=True, index=True)
     user_creator_id: int = Field(foreign_key="user.id")
     max_photos: int = Field(default=200)  # Limite de photos (200 gratuit, +500/+5000 par pack)
@@ -37,7 +40,9 @@ class GroupRead(SQLModel):
     id: int
     nom: str
     description: Optional[str] = None
-    image_url: Optional[str] = None
+    image_url: Optional[SignedUrl] = None
+    image_small_url: Optional[SignedUrl] = None
+    image_medium_url: Optional[SignedUrl] = None
     invite_code: Optional[str] = None
     creator: Optional[UserBasic] = None
     max_photos: int
@@ -3,6 +3,7 @@ from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional
 from app.entities.user import User
 from app.entities.group import Group
+from app.utils.auth.signed_urls import SignedUrl
 
 
 class GroupMember(SQLModel, table=True):
@@ -31,7 +32,8 @@ class UserBasic(SQLModel):
     id: int
     username: str
     email: str
-    avatar_url: Optional[str] = None
+    avatar_url: Optional[SignedUrl] = None
+    avatar_small_url: Optional[SignedUrl] = None
 
 
 class GroupBasic(SQLModel):
@@ -41,7 +43,8 @@ class GroupBasic(SQLModel):
 
     id: int
     nom: str
-    image_url: Optional[str] = None
+    image_url: Optional[SignedUrl] = None
+    image_small_url: Optional[SignedUrl] = None
 
 
 class GroupMemberRead(SQLModel):
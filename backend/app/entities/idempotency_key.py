@@ -0,0 +1,37 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import UniqueConstraint
+from datetime import datetime, timezone
+from typing import Optional
+from enum import Enum
+
+
+class IdempotencyStatus(str, Enum):
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+
+
+class IdempotencyKey(SQLModel, table=True):
+    __tablename__ = "idempotency_key"
+    __table_args__ = (
+        # Une cle n'est valable que pour l'utilisateur qui l'a envoyee
+        UniqueConstraint("user_id", "key", name="uq_idempotency_key_user_key"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    # References
+    user_id: int = Field(foreign_key="user.id")
+    key: str = Field(max_length=255)  # En-tete Idempotency-Key
+
+    # Requete d'origine
+    endpoint: str  # "METHODE /chemin"
+    request_fingerprint: str = Field(max_length=64)  # SHA-256 des parametres et fichiers
+
+    # Resultat rejoue aux requetes suivantes
+    status: IdempotencyStatus = Field(default=IdempotencyStatus.IN_PROGRESS)
+    response_status_code: Optional[int] = Field(default=None)
+    response_body: Optional[str] = Field(default=None)  # JSON
+
+    # Audit
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    expires_at: datetime = Field(index=True)
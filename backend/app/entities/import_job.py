@@ -0,0 +1,37 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime, timezone
+from typing import Optional
+from enum import Enum
+
+
+class ImportJobStatus(str, Enum):
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ImportJob(SQLModel, table=True):
+    __tablename__ = "import_job"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    # References
+    user_id: int = Field(foreign_key="user.id")
+    group_id: int = Field(foreign_key="group.id", index=True)
+    caption: Optional[str] = Field(default=None)
+
+    # Progress
+    status: ImportJobStatus = Field(default=ImportJobStatus.PROCESSING)
+    total_files: int = Field(default=0)  # Images trouvees dans l'archive
+    processed_files: int = Field(default=0)
+    imported_files: int = Field(default=0)
+    skipped_files: int = Field(default=0)  # Invalides, quasi-doublons refuses ou hors quota
+    post_count: int = Field(default=0)
+
+    # Audit
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    completed_at: Optional[datetime] = Field(default=None)
+
+    # Error info
+    error_message: Optional[str] = Field(default=None)
@@ -1,17 +1,51 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import BigInteger, Index, text
 from datetime import datetime
 from typing import Optional
 from app.entities.post import Post
+from app.utils.auth.signed_urls import SignedUrl
 
 
 class Media(SQLModel, table=True):
     __tablename__ = "media"
+    __table_args__ = (
+        # Galerie d'un groupe triee / filtree par date de prise de vue (meme ordre que la requete)
+        # (NULLS LAST dans un index : PostgreSQL uniquement)
+        Index(
+            "ix_media_group_captured_desc", "group_id", text("captured_at DESC NULLS LAST"), text("id DESC")
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     post_id: int = Field(foreign_key="post.id")
+    group_id: Optional[int] = Field(default=None, foreign_key="group.id")  # Denormalise depuis le post
     media_url: str = Field()
+    thumbnail_url: Optional[str] = Field(default=None)  # Rendition 256px pour les grilles
+    medium_url: Optional[str] = Field(default=None)  # Rendition 1024px pour les listes
+    original_url: Optional[str] = Field(default=None)  # GIF original conserve apres transcodage
+    mime_type: Optional[str] = Field(default=None)  # Type du fichier principal (video/mp4 pour un GIF transcode)
     order: int = Field(default=0)
 
+    # Placeholders pour afficher la grille sans telecharger les images
+    width: Optional[int] = Field(default=None)
+    height: Optional[int] = Field(default=None)
+    dominant_color: Optional[str] = Field(default=None, max_length=7)  # #rrggbb
+    blurhash: Optional[str] = Field(default=None)
+
+    # Date de prise de vue EXIF (heure locale, ou UTC si l'appareil fournit le decalage),
+    # date de creation du post a defaut
+    captured_at: Optional[datetime] = Field(default=None)
+
+    # Detection des quasi-doublons dans un groupe
+    dhash: Optional[str] = Field(default=None, max_length=16, index=True)  # Hash perceptuel (hexadecimal)
+    content_sha256: Optional[str] = Field(default=None, max_length=64, index=True)  # SHA-256 du fichier envoye (upload-if-absent)
+    duplicate_of_id: Optional[int] = Field(default=None, foreign_key="media.id", ondelete="SET NULL")
+
+    # CRC32 et taille du fichier exporte (original_url ou media_url), releves au
+    # premier export : une reprise d'export ZIP n'a pas a relire les fichiers precedents
+    export_crc32: Optional[int] = Field(default=None, sa_type=BigInteger)
+    export_size: Optional[int] = Field(default=None, sa_type=BigInteger)
+
     # Relations
     post: Optional["Post"] = Relationship(
         sa_relationship_kwargs={"foreign_keys": "[Media.post_id]"}
@@ -27,7 +61,8 @@ class UserBasic(SQLModel):
     id: int
     username: str
     email: str
-    avatar_url: Optional[str] = None
+    avatar_url: Optional[SignedUrl] = None
+    avatar_small_url: Optional[SignedUrl] = None
 
 
 class GroupBasic(SQLModel):
@@ -37,7 +72,8 @@ class GroupBasic(SQLModel):
 
     id: int
     nom: str
-    image_url: Optional[str] = None
+    image_url: Optional[SignedUrl] = None
+    image_small_url: Optional[SignedUrl] = None
 
 
 class GroupMemberBasic(SQLModel):
@@ -73,6 +109,16 @@ class MediaRead(SQLModel):
 
     id: int
     post_id: int
-    media_url: str
+    media_url: SignedUrl
+    thumbnail_url: Optional[SignedUrl] = None
+    medium_url: Optional[SignedUrl] = None
+    original_url: Optional[SignedUrl] = None
+    mime_type: Optional[str] = None
     order: int
+    width: Optional[int] = None
+    height: Optional[int] = None
+    dominant_color: Optional[str] = None
+    blurhash: Optional[str] = None
+    captured_at: Optional[datetime] = None
+    duplicate_of_id: Optional[int] = None
     post: Optional[PostBasic] = None
@@ -1,8 +1,16 @@
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime, timezone
 from typing import Optional
+from enum import Enum
 from app.entities.groupmember import GroupMember
 from app.entities.group import Group
+from app.utils.auth.signed_urls import SignedUrl
+
+
+class PostStatus(str, Enum):
+    PROCESSING = "processing"
+    READY = "ready"
+    FAILED = "failed"
 
 
 class Post(SQLModel, table=True):
@@ -13,6 +21,8 @@ class Post(SQLModel, table=True):
     group_id: int = Field(foreign_key="group.id")
     caption: Optional[str] = Field(default=None)
     created_at: Optional[datetime] = Field(default_factory=lambda: datetime.now(timezone.utc))
+    status: PostStatus = Field(default=PostStatus.READY)  # processing tant que les medias sont en file
+    error_message: Optional[str] = Field(default=None)
 
     # Relations
     group_member: Optional["GroupMember"] = Relationship(
@@ -41,7 +51,8 @@ class GroupBasic(SQLModel):
 
     id: int
     nom: str
-    image_url: Optional[str] = None
+    image_url: Optional[SignedUrl] = None
+    image_small_url: Optional[SignedUrl] = None
 
 
 class MediaBasic(SQLModel):
@@ -50,8 +61,18 @@ class MediaBasic(SQLModel):
     model_config = {"from_attributes": True}
 
     id: int
-    media_url: str
+    media_url: SignedUrl
+    thumbnail_url: Optional[SignedUrl] = None
+    medium_url: Optional[SignedUrl] = None
+    original_url: Optional[SignedUrl] = None
+    mime_type: Optional[str] = None
     order: int
+    width: Optional[int] = None
+    height: Optional[int] = None
+    dominant_color: Optional[str] = None
+    blurhash: Optional[str] = None
+    captured_at: Optional[datetime] = None
+    duplicate_of_id: Optional[int] = None
 
 
 class PostRead(SQLModel):
@@ -64,6 +85,7 @@ class PostRead(SQLModel):
     group_id: int
     caption: Optional[str] = None
     created_at: Optional[datetime] = None
+    status: PostStatus = PostStatus.READY
     group_member: Optional[GroupMemberBasic] = None
     group: Optional[GroupBasic] = None
     medias: list[MediaBasic] = []
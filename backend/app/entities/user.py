@@ -2,6 +2,7 @@ from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime
 from typing import List, Optional, TYPE_CHECKING
 from app.entities.role import Role
+from app.utils.auth.signed_urls import SignedUrl
 
 
 class User(SQLModel, table=True):
@@ -13,7 +14,9 @@ class User(SQLModel, table=True):
     email: str = Field(unique=True, index=True)
     hashed_password: str
     username: str = Field(default=None)
-    avatar_url: str | None = Field(default=None)
+    avatar_url: str | None = Field(default=None)  # Rendition carree 512px
+    avatar_small_url: str | None = Field(default=None)  # 96px (listes de membres)
+    avatar_medium_url: str | None = Field(default=None)  # 256px (profil)
     role_id: int = Field(default=1, foreign_key="roles.id")
     is_active: bool = Field(default=True)
     created_at: datetime | None = Field(default=None)
@@ -46,7 +49,9 @@ class UserRead(SQLModel):
     id: int
     email: str
     username: str
-    avatar_url: Optional[str] = None
+    avatar_url: Optional[SignedUrl] = None
+    avatar_small_url: Optional[SignedUrl] = None
+    avatar_medium_url: Optional[SignedUrl] = None
     role_id: int
     is_active: bool
     created_at: Optional[datetime] = None
@@ -3,9 +3,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlmodel import SQLModel
 from sqlalchemy import text
 from app.utils.core.config import settings
-from app.utils.core.database import engine
+from app.utils.core.database import async_engine, engine
+from app.utils.core.migrations import run_migrations
 from sqlmodel import Session
 from app.utils.seed import seed_roles, seed_users, seed_groups
+from app.services import media_queue
+from app.utils.slave_manager import orchestrator
 
 import pkgutil
 import importlib
@@ -35,6 +38,8 @@ def init_database():
         # Create all tables if they don't exist
         SQLModel.metadata.create_all(engine)
         print("✅ Database tables created successfully")
+        # Colonnes ajoutees aux tables existantes (create_all ne les cree pas)
+        run_migrations(engine)
 
         # Check if database needs seeding (check if role table is empty)
         with Session(engine) as session:
@@ -79,6 +84,9 @@ def init_database():
 # Initialize database
 init_database()
 
+# Start media processing workers (resumes jobs left in the spool directory)
+media_queue.start_workers()
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -86,6 +94,18 @@ app = FastAPI(
     description="Closo API Backend",
 )
 
+@app.on_event("shutdown")
+async def close_storage_client():
+    """Ferme le pool de connexions asynchrone vers les slaves."""
+    await orchestrator.close_async_client()
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    """Ferme le pool de connexions asyncpg."""
+    await async_engine.dispose()
+
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
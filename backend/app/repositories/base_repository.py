@@ -1,4 +1,5 @@
-from sqlmodel import Session, select
+from sqlmodel import Session, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import Generic, TypeVar, Type
 
 T = TypeVar("T")
@@ -75,3 +76,57 @@ class BaseRepository(Generic[T]):
 
     def count(self, db: Session) -> int:
         return len(db.exec(select(self.model)).all())
+
+
+class AsyncBaseRepository(Generic[T]):
+    """Variante de BaseRepository pour AsyncSession (routes async def)."""
+
+    def __init__(self, model: Type[T]):
+        self.model = model
+
+    async def get(self, db: AsyncSession, id: int) -> T | None:
+        return await db.get(self.model, id)
+
+    async def get_by_id(self, db: AsyncSession, id: int) -> T | None:
+        return await db.get(self.model, id)
+
+    async def list(self, db: AsyncSession, offset: int = 0, limit: int = 100) -> list[T]:
+        return (await db.exec(select(self.model).offset(offset).limit(limit))).all()
+
+    async def save(self, db: AsyncSession, obj: T) -> T:
+        """Create new object or update existing one based on presence of id"""
+        obj_id = getattr(obj, "id", None)
+
+        if obj_id:
+            existing_obj = await self.get(db, obj_id)
+            if existing_obj:
+                # Update existing object with new values
+                obj_data = obj.model_dump(exclude_unset=True, exclude={"id"})
+                for field, value in obj_data.items():
+                    if hasattr(existing_obj, field):
+                        setattr(existing_obj, field, value)
+
+                await db.commit()
+                await db.refresh(existing_obj)
+                return existing_obj
+
+        # Create new object (either no ID provided or ID doesn't exist)
+        obj_data = obj.model_dump(exclude_unset=True)
+        obj_data.pop("id", None)
+
+        new_obj = self.model(**obj_data)
+        db.add(new_obj)
+        await db.commit()
+        await db.refresh(new_obj)
+        return new_obj
+
+    async def delete(self, db: AsyncSession, id: int) -> bool:
+        obj = await self.get_by_id(db, id)
+        if not obj:
+            return False
+        await db.delete(obj)
+        await db.commit()
+        return True
+
+    async def count(self, db: AsyncSession) -> int:
+        return (await db.exec(select(func.count()).select_from(self.model))).one()
@@ -1,5 +1,6 @@
 from sqlmodel import Session, select
-from app.repositories.base_repository import BaseRepository
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.repositories.base_repository import AsyncBaseRepository, BaseRepository
 from app.entities.group import Group
 from app.entities.groupmember import GroupMember
 
@@ -17,4 +18,16 @@ class GroupRepository(BaseRepository[Group]):
         )
         return db.exec(statement).all()
 
-    
\ No newline at end of file
+
+class AsyncGroupRepository(AsyncBaseRepository[Group]):
+    def __init__(self):
+        super().__init__(Group)
+
+    async def get_groups_by_user_id(self, db: AsyncSession, user_id: int) -> list[Group]:
+        """Get all groups where the user is a member"""
+        statement = (
+            select(Group)
+            .join(GroupMember, GroupMember.group_id == Group.id)
+            .where(GroupMember.user_id == user_id)
+        )
+        return (await db.exec(statement)).all()
@@ -1,6 +1,7 @@
 from typing import Optional
 from sqlmodel import Session, select, func
-from app.repositories.base_repository import BaseRepository
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.repositories.base_repository import AsyncBaseRepository, BaseRepository
 from app.entities.groupmember import GroupMember
 
 
@@ -22,4 +23,25 @@ class GroupMemberRepository(BaseRepository[GroupMember]):
         statement = select(func.count(GroupMember.id)).where(
             GroupMember.group_id == group_id
         )
-        return db.exec(statement).one()
\ No newline at end of file
+        return db.exec(statement).one()
+
+
+class AsyncGroupMemberRepository(AsyncBaseRepository[GroupMember]):
+    def __init__(self):
+        super().__init__(GroupMember)
+
+    async def get_by_user_and_group(
+        self, db: AsyncSession, user_id: int, group_id: int
+    ) -> Optional[GroupMember]:
+        """Get GroupMember by user_id and group_id"""
+        statement = select(GroupMember).where(
+            GroupMember.user_id == user_id, GroupMember.group_id == group_id
+        )
+        return (await db.exec(statement)).first()
+
+    async def count_members_in_group(self, db: AsyncSession, group_id: int) -> int:
+        """Count the number of members in a specific group"""
+        statement = select(func.count(GroupMember.id)).where(
+            GroupMember.group_id == group_id
+        )
+        return (await db.exec(statement)).one()
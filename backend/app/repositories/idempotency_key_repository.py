@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import delete
+from sqlmodel import Session, select
+from app.repositories.base_repository import BaseRepository
+from app.entities.idempotency_key import IdempotencyKey
+
+
+class IdempotencyKeyRepository(BaseRepository[IdempotencyKey]):
+    def __init__(self):
+        super().__init__(IdempotencyKey)
+
+    def get_by_user_and_key(self, db: Session, user_id: int, key: str) -> Optional[IdempotencyKey]:
+        return db.exec(
+            select(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        ).first()
+
+    def delete_expired(self, db: Session, now: datetime) -> None:
+        """Supprime les cles expirees (index sur expires_at)."""
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < now))
+        db.commit()
@@ -0,0 +1,15 @@
+from sqlmodel import Session, select
+from app.repositories.base_repository import BaseRepository
+from app.entities.import_job import ImportJob
+
+
+class ImportJobRepository(BaseRepository[ImportJob]):
+    def __init__(self):
+        super().__init__(ImportJob)
+
+    def get_group_jobs(self, db: Session, group_id: int) -> list[ImportJob]:
+        return db.exec(
+            select(ImportJob)
+            .where(ImportJob.group_id == group_id)
+            .order_by(ImportJob.created_at.desc())
+        ).all()
@@ -1,6 +1,7 @@
 from typing import List
 from sqlmodel import Session, select
-from app.repositories.base_repository import BaseRepository
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.repositories.base_repository import AsyncBaseRepository, BaseRepository
 from app.entities.media import Media
 from app.entities.post import Post
 
@@ -18,3 +19,18 @@ class MediaRepository(BaseRepository[Media]):
             .order_by(Media.order)
         )
         return db.exec(statement).all()
+
+
+class AsyncMediaRepository(AsyncBaseRepository[Media]):
+    def __init__(self):
+        super().__init__(Media)
+
+    async def get_medias_by_group_id(self, db: AsyncSession, group_id: int) -> List[Media]:
+        """Get all medias in a specific group via Post"""
+        statement = (
+            select(Media)
+            .join(Post, Media.post_id == Post.id)
+            .where(Post.group_id == group_id)
+            .order_by(Media.order)
+        )
+        return (await db.exec(statement)).all()
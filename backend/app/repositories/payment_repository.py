@@ -1,5 +1,6 @@
 from sqlmodel import Session, select
-from app.repositories.base_repository import BaseRepository
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.repositories.base_repository import AsyncBaseRepository, BaseRepository
 from app.entities.payment import Payment, PaymentStatus
 
 
@@ -19,3 +20,21 @@ class PaymentRepository(BaseRepository[Payment]):
             .where(Payment.status == PaymentStatus.SUCCEEDED)
             .order_by(Payment.created_at.desc())
         ).all()
+
+
+class AsyncPaymentRepository(AsyncBaseRepository[Payment]):
+    def __init__(self):
+        super().__init__(Payment)
+
+    async def get_by_payment_intent_id(self, db: AsyncSession, intent_id: str) -> Payment | None:
+        return (await db.exec(
+            select(Payment).where(Payment.stripe_payment_intent_id == intent_id)
+        )).first()
+
+    async def get_group_payments(self, db: AsyncSession, group_id: int) -> list[Payment]:
+        return (await db.exec(
+            select(Payment)
+            .where(Payment.group_id == group_id)
+            .where(Payment.status == PaymentStatus.SUCCEEDED)
+            .order_by(Payment.created_at.desc())
+        )).all()
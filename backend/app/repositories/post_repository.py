@@ -1,6 +1,7 @@
 from typing import List
 from sqlmodel import Session, select, func
-from app.repositories.base_repository import BaseRepository
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.repositories.base_repository import AsyncBaseRepository, BaseRepository
 from app.entities.post import Post
 from app.entities.groupmember import GroupMember
 
@@ -21,4 +22,23 @@ class PostRepository(BaseRepository[Post]):
             .join(GroupMember, Post.group_member_id == GroupMember.id)
             .where(GroupMember.user_id == user_id)
         )
-        return db.exec(statement).one()
\ No newline at end of file
+        return db.exec(statement).one()
+
+
+class AsyncPostRepository(AsyncBaseRepository[Post]):
+    def __init__(self):
+        super().__init__(Post)
+
+    async def get_posts_by_group_id(self, db: AsyncSession, group_id: int) -> List[Post]:
+        """Get all posts in a specific group"""
+        statement = select(Post).where(Post.group_id == group_id)
+        return (await db.exec(statement)).all()
+
+    async def get_nb_posts_by_user_id(self, db: AsyncSession, user_id: int) -> int:
+        """Get the number of posts created by a specific user"""
+        statement = (
+            select(func.count(Post.id))
+            .join(GroupMember, Post.group_member_id == GroupMember.id)
+            .where(GroupMember.user_id == user_id)
+        )
+        return (await db.exec(statement)).one()
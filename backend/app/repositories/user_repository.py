@@ -1,6 +1,7 @@
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.entities.user import User
-from app.repositories.base_repository import BaseRepository
+from app.repositories.base_repository import AsyncBaseRepository, BaseRepository
 from typing import List
 
 
@@ -17,12 +18,14 @@ class UserRepository(BaseRepository[User]):
         statement = select(User).where(User.roles.__contains__(role_name))
         return list(db.exec(statement).all())
 
-    def update_avatar(self, db: Session, user_id: int, avatar_url: str) -> User:
-        """Update user avatar URL"""
+    def update_avatar(self, db: Session, user_id: int, avatar_urls: dict[str, str]) -> User:
+        """Update user avatar URLs (small, medium and large renditions)"""
         user = self.get(db, user_id)
         if not user:
             raise ValueError(f"User with id {user_id} not found")
-        user.avatar_url = avatar_url
+        user.avatar_url = avatar_urls["large"]
+        user.avatar_small_url = avatar_urls["small"]
+        user.avatar_medium_url = avatar_urls["medium"]
         db.add(user)
         db.commit()
         db.refresh(user)
@@ -49,3 +52,12 @@ class UserRepository(BaseRepository[User]):
         db.commit()
         db.refresh(user)
         return user
+
+
+class AsyncUserRepository(AsyncBaseRepository[User]):
+    def __init__(self):
+        super().__init__(User)
+
+    async def get_by_email(self, db: AsyncSession, email: str) -> User | None:
+        statement = select(User).where(User.email == email)
+        return (await db.exec(statement)).first()
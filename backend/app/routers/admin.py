@@ -6,7 +6,7 @@ from app.entities.media import Media
 from app.entities.group import Group, GroupWithStats
 from app.entities.groupmember import GroupMember
 from app.utils.auth.roles import get_current_user
-from app.utils.core.database import get_db
+from app.utils.core.database import get_db, get_pool_stats
 from app.utils.slave_manager.orchestrator import list_all_files_from_slave
 
 
@@ -55,6 +55,19 @@ def get_admin_stats(
     }
 
 
+@router.get(
+    "/db/pool",
+    description="Occupation des pools de connexions (pic, saturation, timeouts, durée d'utilisation). Réservé aux administrateurs.",
+)
+def get_db_pool_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role_id != 3:
+        raise HTTPException(
+            status_code=403,
+            detail="Accès réservé aux administrateurs."
+        )
+    return get_pool_stats()
+
+
 @router.get(
     "/groups",
     response_model=list[GroupWithStats],
@@ -99,6 +112,8 @@ def get_admin_groups(
             nom=group.nom,
             description=group.description,
             image_url=group.image_url,
+            image_small_url=group.image_small_url,
+            image_medium_url=group.image_medium_url,
             invite_code=group.invite_code,
             creator=group.creator,
             max_photos=group.max_photos,
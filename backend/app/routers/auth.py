@@ -1,15 +1,16 @@
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel, EmailStr
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.utils.auth.auth import verify_password, create_access_token, get_password_hash
-from app.utils.core.database import get_db
-from app.repositories.user_repository import UserRepository
+from app.utils.core.database import get_async_db
+from app.repositories.user_repository import AsyncUserRepository
 from app.entities.user import User
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
-user_repo = UserRepository()
+user_repo = AsyncUserRepository()
 
 
 class RegisterRequest(BaseModel):
@@ -20,10 +21,11 @@ class RegisterRequest(BaseModel):
 
 @router.post("/token")
 async def login(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+    form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)
 ):
-    user = user_repo.get_by_email(db, form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await user_repo.get_by_email(db, form_data.username)
+    # Hachage argon2 (CPU) hors de la boucle d'événements
+    if not user or not await run_in_threadpool(verify_password, form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -39,8 +41,8 @@ async def login(
 
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
-async def register(data: RegisterRequest, db: Session = Depends(get_db)):
-    existing_user = user_repo.get_by_email(db, data.email)
+async def register(data: RegisterRequest, db: AsyncSession = Depends(get_async_db)):
+    existing_user = await user_repo.get_by_email(db, data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -49,7 +51,7 @@ async def register(data: RegisterRequest, db: Session = Depends(get_db)):
 
     user = User(
         email=data.email,
-        hashed_password=get_password_hash(data.password),
+        hashed_password=await run_in_threadpool(get_password_hash, data.password),
         username=data.username,
         role_id=2,
         is_active=True,
@@ -57,7 +59,7 @@ async def register(data: RegisterRequest, db: Session = Depends(get_db)):
         updated_at=datetime.now(timezone.utc),
     )
 
-    created_user = user_repo.save(db, user)
+    created_user = await user_repo.save(db, user)
     access_token = create_access_token(
         user_id=created_user.id, role_id=created_user.role_id
     )
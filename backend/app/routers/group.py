@@ -1,23 +1,35 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, Header, Request, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import selectinload
 from pydantic import BaseModel
+import re
 import secrets
 import string
+from typing import Optional
 from app.entities.group import Group, GroupRead, GroupWithStats
 from app.entities.groupmember import GroupMember
 from app.repositories.group_repository import GroupRepository
 from app.repositories.groupmember_repository import GroupMemberRepository
-from app.utils.core.database import get_db
+from app.utils.core.database import get_async_db, get_db
 from app.utils.auth.roles import require_role, get_current_user
 from app.entities.user import User
-from app.utils.slave_manager.orchestrator import save_media
-from app.utils.file_validation import validate_image_file
+from app.entities.import_job import ImportJob
+from app.entities.media import Media
+from app.repositories.import_job_repository import ImportJobRepository
+from app.services import album_export, album_import
+from app.services.media_service import store_square_renditions
+from app.utils.file_validation import StreamingUploadRoute, validate_image_file
+from app.utils.core.config import settings
 
 
-router = APIRouter(prefix="/groups", tags=["Group"])
+router = APIRouter(
+    prefix="/groups", tags=["Group"], route_class=StreamingUploadRoute.with_limits(max_files=1)
+)
 repo = GroupRepository()
 member_repo = GroupMemberRepository()
+import_job_repo = ImportJobRepository()
 
 
 @router.get(
@@ -75,6 +87,8 @@ def get_all_groups(
             nom=group.nom,
             description=group.description,
             image_url=group.image_url,
+            image_small_url=group.image_small_url,
+            image_medium_url=group.image_medium_url,
             invite_code=group.invite_code,
             creator=group.creator,
             max_photos=group.max_photos,
@@ -433,7 +447,7 @@ def update_group(
     response_model=GroupRead,
     description="Upload image for a group (admin/creator only).",
 )
-async def upload_group_image(
+def upload_group_image(
     id: int,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
@@ -441,6 +455,7 @@ async def upload_group_image(
 ):
     """
     Upload image for group.
+    L'image est recadrée au carré et stockée en 96, 256 et 512 px (WebP).
 
     Validations:
     - Taille maximale: 8 MB
@@ -469,16 +484,183 @@ async def upload_group_image(
     # Valider le fichier (taille, type MIME réel, extension)
     validate_image_file(file)
 
-    # Upload file to slave storage
+    # Recadrer, redimensionner et uploader les renditions sur le slave storage
     try:
-        image_url = save_media(file.file)
+        image_urls = store_square_renditions(file.file.read())
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
 
-    # Update group image URL
-    group.image_url = image_url
+    # Update group image URLs
+    group.image_url = image_urls["large"]
+    group.image_small_url = image_urls["small"]
+    group.image_medium_url = image_urls["medium"]
     db.add(group)
     db.commit()
     db.refresh(group)
 
     return group
+
+
+def parse_range(range_header: Optional[str], total_size: int) -> Optional[tuple[int, int]]:
+    """
+    Interprète un en-tête Range à plage unique ("bytes=debut-[fin]" ou
+    "bytes=-suffixe"). Retourne (début, fin incluse), ou None pour tout envoyer.
+    """
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", (range_header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(total_size - int(last), 0), total_size - 1
+    else:
+        start, end = int(first), min(int(last), total_size - 1) if last else total_size - 1
+    if start >= total_size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{total_size}"},
+        )
+    return start, end
+
+
+def _check_export_allowed(db: Session, group_id: int, current_user: User) -> None:
+    group = repo.get_by_id(db, group_id)
+    if not group:
+        raise HTTPException(status_code=404, detail="Group not found")
+
+    member = db.exec(
+        select(GroupMember).where(
+            GroupMember.group_id == group_id,
+            GroupMember.user_id == current_user.id
+        )
+    ).first()
+    if not member and current_user.role_id != 3:
+        raise HTTPException(
+            status_code=403,
+            detail="Vous devez être membre du groupe pour exporter ses médias."
+        )
+
+
+@router.get(
+    "/{id}/export.zip",
+    description="Télécharge toutes les photos du groupe en une archive ZIP (membres uniquement, reprise via Range).",
+)
+async def export_group_album(
+    id: int,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None, alias="If-Range"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    L'archive est construite à la volée à partir du slave, sans compression
+    (les photos le sont déjà) : sa taille est annoncée d'avance et un
+    téléchargement interrompu reprend avec Range, tant que l'album n'a pas
+    changé (ETag / If-Range).
+    """
+    await db.run_sync(_check_export_allowed, id, current_user)
+
+    layout = await album_export.build_layout(db, id)
+    etag = album_export.layout_etag(layout)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Content-Disposition": f'attachment; filename="album-{id}.zip"',
+    }
+
+    # Une reprise sur un album modifié repart de zéro (If-Range différent)
+    byte_range = parse_range(range_header, layout.total_size) if if_range in (None, etag) else None
+    if byte_range is None:
+        start, end = 0, layout.total_size - 1
+        status_code = 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{layout.total_size}"
+    headers["Content-Length"] = str(end - start + 1)
+    print(f"📦 Export of group {id}: {len(layout.entries)} files, bytes {start}-{end}/{layout.total_size}")
+
+    return StreamingResponse(
+        album_export.stream_album(layout, start, end),
+        status_code=status_code,
+        media_type="application/zip",
+        headers=headers,
+    )
+
+
+def _check_import_allowed(db: Session, group_id: int, user_id: int) -> None:
+    group = repo.get_by_id(db, group_id)
+    if not group:
+        raise HTTPException(status_code=404, detail="Group not found")
+
+    member = member_repo.get_by_user_and_group(db, user_id, group_id)
+    if not member:
+        raise HTTPException(status_code=403, detail="You are not a member of this group")
+
+    current_photo_count = db.exec(select(func.count(Media.id)).where(Media.group_id == group_id)).one() or 0
+    if current_photo_count >= group.max_photos:
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "error": "storage_quota_exceeded",
+                "message": f"Group has {current_photo_count}/{group.max_photos} photos.",
+                "current_count": current_photo_count,
+                "limit": group.max_photos,
+                "remaining_capacity": 0,
+            },
+        )
+
+
+@router.post(
+    "/{id}/import",
+    response_model=ImportJob,
+    description="Importe un album depuis une archive zip ou tar envoyée comme corps brut de la requête (membres uniquement).",
+)
+async def import_group_album(
+    id: int,
+    request: Request,
+    caption: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    L'archive est reçue en streaming puis traitée en arrière-plan : les photos
+    sont compressées en parallèle, envoyées au slave et insérées par lots, en
+    posts de 10 médias. Les photos au-delà du quota du groupe sont ignorées.
+    Suivi via GET /groups/{id}/imports/{job_id}.
+    """
+    await db.run_sync(_check_import_allowed, id, current_user.id)
+
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > settings.IMPORT_MAX_ARCHIVE_BYTES:
+        raise HTTPException(status_code=413, detail="Archive trop volumineuse.")
+
+    job = await db.run_sync(import_job_repo.save, ImportJob(user_id=current_user.id, group_id=id, caption=caption))
+    try:
+        archive_path = await album_import.receive_archive(job.id, request.stream())
+    except BaseException:
+        await db.run_sync(import_job_repo.delete, job.id)
+        raise
+
+    album_import.start_import(job.id, archive_path)
+    print(f"📦 Import {job.id} started for group {id}")
+    return job
+
+
+@router.get(
+    "/{id}/imports/{job_id}",
+    response_model=ImportJob,
+    description="Récupère l'avancement d'un import d'album.",
+)
+def get_import_job(
+    id: int,
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    job = import_job_repo.get_by_id(db, job_id)
+    if not job or job.group_id != id:
+        raise HTTPException(status_code=404, detail="Import not found")
+    if job.user_id != current_user.id and current_user.role_id != 3:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return job
@@ -1,12 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import Response
+from datetime import datetime
+import asyncio
+from typing import AsyncIterator, Literal, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from PIL import UnidentifiedImageError
 from sqlmodel import Session, select
 from sqlalchemy.orm import selectinload
 from app.entities.media import Media, MediaRead
 from app.repositories.media_repository import MediaRepository
 from app.utils.core.database import get_db
 from app.utils.auth.roles import get_current_user
-from app.utils.slave_manager.orchestrator import fetch_file_from_slave
+from app.utils.slave_manager.orchestrator import open_file_stream
+from app.utils.core.config import settings
+from app.utils.image_compression import negotiate_image_format, render_variant, snap_variant_width
+from app.utils.media_cache import SharedStream, hot_cache, original_flight, original_key, variant_flight
 from app.entities.user import User
 from app.entities.groupmember import GroupMember
 from app.entities.post import Post
@@ -16,6 +24,12 @@ import httpx
 router = APIRouter(prefix="/media", tags=["Media"])
 repo = MediaRepository()
 
+# En-têtes du slave relayés tels quels par le proxy
+STREAMED_HEADERS = ("content-length", "content-encoding", "etag", "last-modified")
+
+# Originaux en cours de téléchargement depuis le slave, partagés par les requêtes concurrentes
+shared_originals: dict[str, SharedStream] = {}
+
 
 @router.get(
     "/",
@@ -37,23 +51,29 @@ def get_all_medias(
 @router.get(
     "/group/{group_id}",
     response_model=list[MediaRead],
-    description="Récupère les médias d'un groupe avec pagination, triés par date décroissante.",
+    description="Récupère les médias d'un groupe avec pagination, triés par date de prise de vue (ou d'upload) décroissante.",
 )
 def get_medias_by_group_id(
     group_id: int,
     skip: int = 0,
     limit: int = 50,
+    sort: Literal["capture", "upload"] = "capture",
+    captured_after: Optional[datetime] = None,
+    captured_before: Optional[datetime] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
     Récupère les médias d'un groupe avec les informations complètes du post.
-    Les médias sont triés par date de création du post (plus récents en premier).
+    Les médias sont triés par date de prise de vue (EXIF, date du post à défaut),
+    plus récents en premier, via l'index (group_id, captured_at).
     L'utilisateur doit être membre du groupe.
 
     Paramètres:
     - skip: nombre de médias à ignorer (default: 0)
     - limit: nombre maximum de médias à retourner (default: 50, max: 100)
+    - sort: "capture" (date de prise de vue) ou "upload" (date de création du post)
+    - captured_after / captured_before: bornes de la période de prise de vue
     """
     # Vérifier que l'utilisateur est membre du groupe
     member = db.exec(
@@ -73,11 +93,28 @@ def get_medias_by_group_id(
         limit = 100
 
     # Récupérer les médias avec eager loading des relations
+    if sort == "capture":
+        statement = (
+            select(Media)
+            .where(Media.group_id == group_id)
+            # Medias sans date (non encore migres) en fin de galerie
+            .order_by(Media.captured_at.desc().nulls_last(), Media.id.desc())
+        )
+    else:
+        statement = (
+            select(Media)
+            .join(Post, Media.post_id == Post.id)
+            .where(Post.group_id == group_id)
+            .order_by(Post.created_at.desc(), Media.order.asc())
+        )
+
+    if captured_after:
+        statement = statement.where(Media.captured_at >= captured_after)
+    if captured_before:
+        statement = statement.where(Media.captured_at < captured_before)
+
     statement = (
-        select(Media)
-        .join(Post, Media.post_id == Post.id)
-        .where(Post.group_id == group_id)
-        .order_by(Post.created_at.desc(), Media.order.asc())
+        statement
         .options(
             selectinload(Media.post).selectinload(Post.group_member),
             selectinload(Media.post).selectinload(Post.group),
@@ -96,28 +133,212 @@ def get_medias_by_group_id(
 )
 async def proxy_file(
     file_id: str,
+    background_tasks: BackgroundTasks,
+    w: Optional[int] = Query(None, ge=1, description="Largeur maximale de la variante"),
+    fmt: Optional[Literal["jpeg", "webp", "png", "avif"]] = Query(None, description="Format de la variante"),
+    accept: Optional[str] = Header(None),
 ):
     """
     Route proxy pour servir les fichiers depuis les slaves de stockage.
     Le frontend appelle cette route, et le backend fetch le fichier depuis le slave.
 
+    Avec `w` et/ou `fmt`, une variante redimensionnee/re-encodee est generee a la
+    premiere demande puis servie depuis un cache LRU borne en octets. La largeur est
+    arrondie a une largeur autorisee pour limiter le nombre de variantes.
+
+    Sans `fmt`, le format est negocie avec l'en-tete Accept (AVIF/WebP) pour les
+    sources JPEG/PNG. Pour l'image pleine taille, l'original est servi tant que la
+    variante moderne n'est pas en cache ; elle est alors generee en arriere-plan.
+
+    L'original est relaye par blocs depuis le slave (StreamingResponse) ;
+    Content-Length, ETag, Last-Modified et Content-Type du slave sont transmis.
+    Les fichiers de taille raisonnable sont ensuite servis depuis le cache
+    (memoire puis disque), sans appel au slave. Les requetes concurrentes pour un
+    meme fichier absent du cache partagent un seul telechargement depuis le slave.
+
     Note: Cette route est publique pour permettre l'affichage des images via <img> tags.
     Les permissions d'accès aux médias sont gérées au niveau des routes qui retournent les URLs.
     """
+    headers = {"Cache-Control": "public, max-age=86400"}
+
+    negotiated = None
+    if fmt is None and settings.MEDIA_NEGOTIATED_FORMATS:
+        negotiated = negotiate_image_format(accept, settings.MEDIA_NEGOTIATED_FORMATS)
+        # La reponse depend de Accept des que la negociation est active, meme sans variante
+        headers["Vary"] = "Accept"
+
     try:
-        response = fetch_file_from_slave(file_id)
+        if w is not None or fmt is not None:
+            content, content_type = await get_variant(file_id, w, fmt, negotiated)
+            return Response(content=content, media_type=content_type, headers=headers)
 
-        # Déterminer le content-type depuis la réponse du slave
-        content_type = response.headers.get("content-type", "application/octet-stream")
+        if negotiated:
+            cached = await run_in_threadpool(hot_cache.get, variant_key(file_id, None, None, negotiated))
+            if cached is not None:
+                content, content_type = cached
+                return Response(content=content, media_type=content_type, headers=headers)
 
-        return Response(
-            content=response.content,
-            media_type=content_type,
-            headers={
-                "Cache-Control": "public, max-age=86400",
-            },
-        )
+        cached = await run_in_threadpool(hot_cache.get, original_key(file_id))
+        if cached is not None:
+            content, content_type = cached
+            return Response(content=content, media_type=content_type, headers=headers)
+
+        # Fichier trop volumineux pour être partagé : flux direct depuis le slave (upstream)
+        shared, upstream = await open_shared_original(file_id)
     except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=e.response.status_code, detail="File not found or access denied")
     except httpx.RequestError:
         raise HTTPException(status_code=502, detail="Unable to reach storage server")
+    except UnidentifiedImageError:
+        raise HTTPException(status_code=415, detail="File is not an image, no variant available")
+
+    if shared is not None:
+        content_type = shared.content_type
+        headers.update(shared.headers)
+        body = aiter(shared)
+    else:
+        content_type, forwarded = _upstream_headers(upstream)
+        headers.update(forwarded)
+        body = _relay(upstream)
+
+    if negotiated and content_type.split(";")[0] in ("image/jpeg", "image/png"):
+        background_tasks.add_task(warm_variant, file_id, negotiated)
+
+    return StreamingResponse(body, media_type=content_type, headers=headers)
+
+
+async def _relay(upstream: httpx.Response) -> AsyncIterator[bytes]:
+    """Relaie le flux du slave puis ferme la connexion, y compris si le client se déconnecte."""
+    try:
+        async for chunk in upstream.aiter_raw(settings.MEDIA_PROXY_CHUNK_SIZE):
+            yield chunk
+    finally:
+        await upstream.aclose()
+
+
+def _upstream_headers(upstream: httpx.Response) -> tuple[str, dict[str, str]]:
+    """Content-type et en-têtes du slave à relayer."""
+    content_type = upstream.headers.get("content-type", "application/octet-stream")
+    forwarded = {header: upstream.headers[header] for header in STREAMED_HEADERS if header in upstream.headers}
+    return content_type, forwarded
+
+
+async def open_shared_original(file_id: str) -> tuple[Optional[SharedStream], Optional[httpx.Response]]:
+    """
+    Retourne le téléchargement partagé d'un original : celui déjà en cours, ou
+    un nouveau (un seul appel au slave même pour des requêtes simultanées).
+    Si le fichier dépasse MEDIA_CACHE_MAX_OBJECT_BYTES (ou si sa taille est
+    inconnue), il n'est ni partagé ni mis en cache : retourne (None, upstream),
+    la réponse du slave déjà ouverte, à relayer puis fermer par l'appelant.
+    """
+    shared = shared_originals.get(file_id)
+    if shared is not None:
+        return shared, None
+
+    async def open_upstream() -> tuple[Optional[SharedStream], list[httpx.Response]]:
+        upstream = await open_file_stream(file_id)
+        content_length = int(upstream.headers.get("content-length", 0))
+        if (
+            not 0 < content_length <= settings.MEDIA_CACHE_MAX_OBJECT_BYTES
+            or "content-encoding" in upstream.headers
+        ):
+            return None, [upstream]
+
+        shared = SharedStream(*_upstream_headers(upstream))
+        shared_originals[file_id] = shared
+        # Le téléchargement ne dépend d'aucun client : il continue même si le premier se déconnecte
+        shared.task = asyncio.create_task(_pump_original(file_id, upstream, shared, content_length))
+        return shared, []
+
+    shared, unshared = await original_flight.do(file_id, open_upstream)
+    if shared is not None:
+        return shared, None
+    # Une seule requête reprend la réponse déjà ouverte, les requêtes simultanées ouvrent la leur
+    return None, unshared.pop() if unshared else await open_file_stream(file_id)
+
+
+async def _pump_original(file_id: str, upstream: httpx.Response, shared: SharedStream, content_length: int) -> None:
+    """Reçoit l'original depuis le slave, le diffuse aux lecteurs puis le met en cache."""
+    try:
+        async for chunk in upstream.aiter_raw(settings.MEDIA_PROXY_CHUNK_SIZE):
+            await shared.feed(chunk)
+        await shared.finish()
+
+        content = b"".join(shared.chunks)
+        if len(content) == content_length:
+            await run_in_threadpool(hot_cache.set, original_key(file_id), content, shared.content_type)
+    except Exception as e:
+        await shared.finish(e)
+        print(f"⚠️  Failed to fetch {file_id} from storage: {e}")
+    finally:
+        shared_originals.pop(file_id, None)
+        await upstream.aclose()
+
+
+async def fetch_original(file_id: str) -> bytes:
+    """Contenu complet d'un original : cache, téléchargement partagé ou slave."""
+    cached = await run_in_threadpool(hot_cache.get, original_key(file_id))
+    if cached is not None:
+        return cached[0]
+
+    shared, upstream = await open_shared_original(file_id)
+    if shared is not None:
+        return await shared.read()
+    try:
+        return await upstream.aread()
+    finally:
+        await upstream.aclose()
+
+
+@router.get(
+    "/cache/stats",
+    description="Statistiques du cache des médias (hits, misses, taille). Réservé aux administrateurs.",
+)
+def get_cache_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role_id != 3:
+        raise HTTPException(
+            status_code=403,
+            detail="Accès réservé aux administrateurs."
+        )
+    return hot_cache.stats()
+
+
+def variant_key(file_id: str, width: Optional[int], fmt: Optional[str], negotiated: Optional[str]) -> str:
+    """Cle de cache d'une variante."""
+    return f"{file_id}:{width or ''}:{fmt or ''}:{negotiated or ''}"
+
+
+async def get_variant(
+    file_id: str,
+    width: Optional[int],
+    fmt: Optional[str],
+    negotiated: Optional[str] = None,
+) -> tuple[bytes, str]:
+    """
+    Retourne une variante depuis le cache, ou la genere une seule fois
+    meme si plusieurs requetes la demandent simultanement.
+    """
+    if width is not None:
+        width = snap_variant_width(width)
+
+    key = variant_key(file_id, width, fmt, negotiated)
+    cached = await run_in_threadpool(hot_cache.get, key)
+    if cached is not None:
+        return cached
+
+    async def generate() -> tuple[bytes, str]:
+        # Les variantes d'un même fichier partagent le téléchargement de l'original
+        content = await fetch_original(file_id)
+        variant = await run_in_threadpool(render_variant, content, width, fmt, negotiated=negotiated)
+        await run_in_threadpool(hot_cache.set, key, *variant)
+        return variant
+
+    return await variant_flight.do(key, generate)
+
+
+async def warm_variant(file_id: str, negotiated: str) -> None:
+    """Genere en arriere-plan la variante pleine taille au format negocie."""
+    try:
+        await get_variant(file_id, None, None, negotiated)
+    except Exception as e:
+        print(f"⚠️  Failed to generate {negotiated} variant for {file_id}: {e}")
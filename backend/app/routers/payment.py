@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Header
 from sqlmodel import Session
-from app.utils.core.database import get_db
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.utils.core.database import get_async_db, get_db
 from app.utils.auth.roles import get_current_user
 from app.entities.user import User
 from app.entities.payment import PaymentStatus
@@ -91,7 +92,7 @@ def get_payment_status(
 async def stripe_webhook(
     request: Request,
     stripe_signature: str = Header(None, alias="Stripe-Signature"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     payload = await request.body()
 
@@ -106,7 +107,7 @@ async def stripe_webhook(
 
     if event.type == "payment_intent.succeeded":
         payment_intent = event.data.object
-        stripe_service.handle_payment_success(db, payment_intent.id)
+        await stripe_service.handle_payment_success(db, payment_intent.id)
     elif event.type == "payment_intent.payment_failed":
         payment_intent = event.data.object
         error = (
@@ -114,6 +115,6 @@ async def stripe_webhook(
             if payment_intent.last_payment_error
             else None
         )
-        stripe_service.handle_payment_failed(db, payment_intent.id, error)
+        await stripe_service.handle_payment_failed(db, payment_intent.id, error)
 
     return {"status": "success"}
@@ -1,25 +1,41 @@
+import re
 from datetime import datetime, timezone
-from fastapi import APIRouter, Depends, File, UploadFile, Form, HTTPException
+from pathlib import Path
+from fastapi import APIRouter, BackgroundTasks, Depends, File, UploadFile, Form, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session, select, func
-from app.entities.post import Post
+from sqlmodel.ext.asyncio.session import AsyncSession
+from pydantic import BaseModel
+from app.entities.post import Post, PostStatus
 from app.entities.media import Media
 from app.entities.group import Group
-from app.repositories.post_repository import PostRepository
+from app.repositories.post_repository import AsyncPostRepository, PostRepository
 from app.repositories.media_repository import MediaRepository
 from app.repositories.groupmember_repository import GroupMemberRepository
-from app.utils.core.database import get_db
+from app.utils.core.database import get_async_db, get_db
 from app.utils.auth.roles import require_role
 from typing import Optional
-from app.utils.slave_manager import orchestrator
-from app.utils.file_validation import validate_media_files
-from app.utils.image_compression import compress_upload_file, get_compression_stats
+from app.utils.auth.upload_tokens import create_upload_token, require_direct_uploads, verify_upload_receipts
+from app.utils.file_validation import (
+    MAX_FILES,
+    MAX_UPLOAD_SIZE,
+    StreamingUploadRoute,
+    validate_declared_files,
+    validate_media_files,
+)
+from app.utils.image_compression import get_compression_stats
+from app.services import media_queue, media_service, resumable_uploads
+from app.services.idempotency import file_digest, fingerprint, run_idempotent, run_idempotent_async
 
 
-router = APIRouter(prefix="/posts", tags=["Post"])
+router = APIRouter(prefix="/posts", tags=["Post"], route_class=StreamingUploadRoute)
 repo = PostRepository()
+async_repo = AsyncPostRepository()
 media_repo = MediaRepository()
 groupmember_repo = GroupMemberRepository()
 
+SHA256_PATTERN = re.compile(r"[0-9a-f]{64}")
+
 
 @router.get(
     "/",
@@ -34,39 +50,19 @@ def get_all_posts(
     return repo.list(db)
 
 
-# Créer un post avec des médias attachés
-@router.post(
-    "/",
-    response_model=Post,
-    description="Crée un post avec des médias. Maximum 10 fichiers de 8 MB chacun.",
-)
-async def create_post(
-    group_id: int = Form(...),
-    caption: Optional[str] = Form(None),
-    files: list[UploadFile] = File(...),
-    db: Session = Depends(get_db),
-    current_user_id: int = Depends(require_role(["any"])),
-):
+def check_upload_allowed(db: Session, user_id: int, group_id: int, photos_to_upload: int):
     """
-    Crée un post avec des médias.
-
-    Validations:
-    - Taille maximale par fichier: 8 MB
-    - Maximum 10 fichiers par post
-    - Types autorisés: JPEG, PNG, GIF, WebP
-    - Vérification des magic bytes (type MIME réel)
+    Vérifie que l'utilisateur est membre du groupe et que le quota de photos
+    du groupe permet l'ajout. Retourne le membre du groupe.
     """
-    # Valider les fichiers (taille, type, nombre)
-    validate_media_files(files)
-
     # Get the group member for this user and group
     group_member = groupmember_repo.get_by_user_and_group(
-        db, user_id=current_user_id, group_id=group_id
+        db, user_id=user_id, group_id=group_id
     )
     if not group_member:
         raise HTTPException(
             status_code=403,
-            detail=f"User {current_user_id} is not a member of group {group_id}",
+            detail=f"User {user_id} is not a member of group {group_id}",
         )
 
     # Vérifier la capacité du groupe
@@ -83,7 +79,6 @@ async def create_post(
     ).one() or 0
 
     # Vérifier si l'ajout de nouvelles photos dépasse la limite
-    photos_to_upload = len(files)
     if current_photo_count + photos_to_upload > group.max_photos:
         raise HTTPException(
             status_code=403,
@@ -96,6 +91,102 @@ async def create_post(
                 "photos_to_upload": photos_to_upload
             }
         )
+    return group_member
+
+
+# Créer un post avec des médias attachés
+@router.post(
+    "/",
+    response_model=Post,
+    description="Crée un post avec des médias. Maximum 10 fichiers de 8 MB chacun.",
+)
+async def create_post(
+    group_id: int = Form(...),
+    caption: Optional[str] = Form(None),
+    files: Optional[list[UploadFile]] = File(None),
+    content_hashes: Optional[list[str]] = Form(None),
+    async_processing: bool = Form(False),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(require_role(["any"])),
+):
+    """
+    Crée un post avec des médias.
+
+    Avec async_processing, les fichiers bruts sont mis en file et le post est
+    retourné immédiatement avec le statut "processing" (suivi via /posts/{id}/status).
+
+    Upload-if-absent : avec content_hashes (SHA-256 de chaque média, dans l'ordre
+    du post), seuls les fichiers inconnus sont envoyés dans files (dans le même
+    ordre) ; les autres sont rattachés par référence (voir /posts/known-hashes).
+
+    Validations:
+    - Taille maximale par fichier: 8 MB
+    - Maximum 10 fichiers par post
+    - Types autorisés: JPEG, PNG, GIF, WebP
+    - Vérification des magic bytes (type MIME réel)
+
+    Idempotence : une requête renvoyée avec le même en-tête Idempotency-Key
+    (après un timeout par exemple) reçoit la réponse d'origine, sans nouveau
+    post ni nouvel upload.
+    """
+    files = files or []
+    # Le contenu compte : un renvoi avec d'autres octets (même nom, même taille) n'est pas un rejeu
+    digests = await run_in_threadpool(lambda: [file_digest(file.file) for file in files])
+    request_fingerprint = fingerprint(
+        group_id, caption, content_hashes, async_processing,
+        [(file.filename, file.size, digest) for file, digest in zip(files, digests)],
+    )
+
+    async def handler():
+        return await _create_post(db, current_user_id, group_id, caption, files, content_hashes, async_processing)
+
+    return await run_idempotent_async(
+        db, current_user_id, idempotency_key, "POST /posts/", request_fingerprint, handler
+    )
+
+
+async def _create_post(
+    db: AsyncSession,
+    current_user_id: int,
+    group_id: int,
+    caption: Optional[str],
+    files: list[UploadFile],
+    content_hashes: Optional[list[str]],
+    async_processing: bool,
+) -> Post:
+    known = {}
+    if content_hashes:
+        content_hashes = [content_hash.lower() for content_hash in content_hashes]
+        if len(content_hashes) > MAX_FILES:
+            raise HTTPException(status_code=400, detail=f"Trop de fichiers. Maximum autorise: {MAX_FILES}")
+        invalid = [content_hash for content_hash in content_hashes if not SHA256_PATTERN.fullmatch(content_hash)]
+        if invalid:
+            raise HTTPException(
+                status_code=400,
+                detail={"error": "invalid_hashes", "message": "content_hashes must be SHA-256 hex digests.", "invalid_hashes": invalid},
+            )
+        known = await db.run_sync(media_service.find_known_hashes, current_user_id, content_hashes)
+        file_orders = [idx for idx, content_hash in enumerate(content_hashes) if content_hash not in known]
+        if len(file_orders) != len(files):
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "missing_files",
+                    "message": f"{len(file_orders)} files expected for unknown hashes, {len(files)} received.",
+                    "unknown_hashes": [content_hashes[idx] for idx in file_orders],
+                },
+            )
+        if files:
+            await run_in_threadpool(validate_media_files, files)
+            # Un fichier doit avoir le contenu annoncé à sa position (sinon le hash enregistré serait faux)
+            await run_in_threadpool(verify_content_hashes, files, [content_hashes[idx] for idx in file_orders])
+    else:
+        # Valider les fichiers (taille, type, nombre)
+        await run_in_threadpool(validate_media_files, files)
+        file_orders = list(range(len(files)))
+
+    group_member = await db.run_sync(check_upload_allowed, current_user_id, group_id, len(content_hashes or files))
 
     # Create and persist the post
     new_post = Post(
@@ -103,47 +194,450 @@ async def create_post(
         group_id=group_id,
         caption=caption,
         created_at=datetime.now(timezone.utc),
+        status=PostStatus.PROCESSING if async_processing else PostStatus.READY,
     )
 
-    created_post = repo.save(db, new_post)
+    created_post = await async_repo.save(db, new_post)
     print(f"✅ Post created with ID: {created_post.id}")
 
+    # Fichiers déjà stockés : rattachés par référence, sans transfert
+    for idx, content_hash in enumerate(content_hashes or []):
+        if content_hash in known:
+            try:
+                await db.run_sync(media_service.attach_by_reference, created_post, idx, known[content_hash])
+            except HTTPException:
+                await db.run_sync(abort_post, created_post.id)
+                raise
+    if known:
+        print(f"  🔗 {len(content_hashes) - len(files)} media attached by reference")
+    if not files:
+        if async_processing:
+            created_post.status = PostStatus.READY
+            created_post = await async_repo.save(db, created_post)
+        return created_post
+
+    # Mode asynchrone : stocker les fichiers bruts et rendre la main immediatement
+    if async_processing:
+        await run_in_threadpool(media_queue.enqueue_post_media, created_post.id, files, file_orders)
+        print(f"  ⏳ {len(files)} media queued for post {created_post.id}")
+        return created_post
+
     # Now create media entries linked to the post
     total_original = 0
     total_compressed = 0
+    total_baseline = 0
 
-    for idx, file in enumerate(files):
-        # Lire la taille originale
-        file.file.seek(0, 2)  # Aller a la fin
-        original_size = file.file.tell()
-        file.file.seek(0)  # Revenir au debut
-        total_original += original_size
-
-        # Compresser l'image
-        compressed_file = compress_upload_file(file)
-        compressed_size = compressed_file.seek(0, 2)
-        compressed_file.seek(0)
-        total_compressed += compressed_size
-
-        # Uploader le fichier compresse
-        url = orchestrator.save_media(compressed_file)
-        print(f"  📷 Media {idx + 1} uploaded (compressed: {original_size} -> {compressed_size} bytes), URL: {url}")
-
-        new_media = Media(
-            post_id=created_post.id,
-            media_url=url,
-            order=idx,
-        )
-        media_repo.save(db, new_media)
-        print(f"  📷 Media {idx + 1} saved: {url}")
+    for idx, file in zip(file_orders, files):
+        file_content = await file.read()
+        total_original += len(file_content)
+
+        # Compresser en renditions, uploader et enregistrer le media
+        try:
+            media, media_stats = await media_service.store_media_async(
+                db, created_post, idx, file_content, file.filename or ""
+            )
+        except HTTPException as e:
+            if e.status_code == 409:
+                # Quasi-doublon refusé : annuler le post et les médias déjà envoyés
+                await db.run_sync(abort_post, created_post.id)
+            raise
+        total_compressed += media_stats["compressed_size"]
+        total_baseline += media_stats["baseline_size"]
+        print(f"  📷 Media {idx + 1} saved (compressed: {len(file_content)} -> {media_stats['compressed_size']} bytes, quality: {media_stats['quality'] or 'fixed'}): {media.media_url}")
 
     # Afficher les stats de compression
     stats = get_compression_stats(total_original, total_compressed)
     print(f"  📊 Compression: {stats['savings_percent']}% saved ({total_original} -> {total_compressed} bytes)")
+    if total_baseline != total_compressed:
+        adaptive_stats = get_compression_stats(total_baseline, total_compressed)
+        print(f"  📊 Adaptive encoding: {adaptive_stats['savings_percent']}% saved vs fixed quality ({total_baseline} -> {total_compressed} bytes)")
 
     return created_post
 
 
+def verify_content_hashes(files: list[UploadFile], expected_hashes: list[str]) -> None:
+    """
+    Vérifie que chaque fichier envoyé a le SHA-256 annoncé pour sa position.
+
+    Raises:
+        HTTPException 400: Contenu différent du hash annoncé
+    """
+    mismatched = [
+        file.filename for file, expected in zip(files, expected_hashes) if file_digest(file.file) != expected
+    ]
+    if mismatched:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "hash_mismatch",
+                "message": "Files do not match their declared content_hashes.",
+                "filenames": mismatched,
+            },
+        )
+
+
+def abort_post(db: Session, post_id: int) -> None:
+    """Supprime un post en cours de création et les médias déjà enregistrés."""
+    media_service.delete_medias(db, db.exec(select(Media).where(Media.post_id == post_id)).all())
+    repo.delete(db, post_id)
+
+
+class KnownHashesRequest(BaseModel):
+    hashes: list[str]
+
+
+class KnownHashesResponse(BaseModel):
+    known: list[str]
+
+
+@router.post(
+    "/known-hashes",
+    response_model=KnownHashesResponse,
+    description="Indique quels fichiers (SHA-256) sont déjà stockés dans les groupes de l'utilisateur.",
+)
+def get_known_hashes(
+    payload: KnownHashesRequest,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(require_role(["any"])),
+):
+    """
+    Appelé avant un upload : les fichiers connus n'ont pas besoin d'être
+    renvoyés, il suffit de passer leur hash dans content_hashes à la création
+    du post pour les rattacher par référence.
+    """
+    if len(payload.hashes) > 100:
+        raise HTTPException(status_code=400, detail="Maximum 100 hashes par requête.")
+    hashes = [content_hash.lower() for content_hash in payload.hashes if SHA256_PATTERN.fullmatch(content_hash.lower())]
+    known = media_service.find_known_hashes(db, current_user_id, hashes)
+    return KnownHashesResponse(known=[content_hash for content_hash in hashes if content_hash in known])
+
+
+class DirectUploadFile(BaseModel):
+    filename: str
+    size: int
+
+
+class DirectUploadRequest(BaseModel):
+    group_id: int
+    caption: Optional[str] = None
+    files: list[DirectUploadFile]
+
+
+class DirectUploadSlot(BaseModel):
+    order: int
+    filename: str
+    upload_id: str
+    token: str
+    upload_url: str
+    expires: int
+
+
+class DirectUploadSession(BaseModel):
+    post: Post
+    uploads: list[DirectUploadSlot]
+
+
+class UploadReceipt(BaseModel):
+    upload_id: str
+    post_id: int
+    order: int
+    count: int
+    filename: str
+    extension: str
+    size: int
+    sha256: str
+    node_id: str
+    signature: str
+
+
+class FinalizeUploadsRequest(BaseModel):
+    receipts: list[UploadReceipt]
+
+
+@router.post(
+    "/uploads",
+    response_model=DirectUploadSession,
+    description="Crée un post et retourne un jeton d'upload direct vers le stockage par fichier.",
+)
+def create_upload_session(
+    payload: DirectUploadRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(require_role(["any"])),
+):
+    """
+    Upload direct : les octets ne transitent plus par le backend.
+
+    1. Le client annonce ses fichiers (nom, taille) et reçoit un post "processing"
+       et un jeton signé par fichier
+    2. Il envoie chaque fichier brut à upload_url (en-tête X-Upload-Token) ;
+       le slave vérifie le jeton, la taille et le type, et répond par un reçu signé
+    3. Il transmet les reçus à /posts/{id}/finalize, qui lance le traitement
+
+    Avec Idempotency-Key, une requête renvoyée reçoit la même session
+    (mêmes jetons) au lieu d'un second post.
+    """
+    require_direct_uploads()
+    validate_declared_files([(file.filename, file.size) for file in payload.files])
+
+    def handler():
+        group_member = check_upload_allowed(db, current_user_id, payload.group_id, len(payload.files))
+
+        created_post = repo.save(db, Post(
+            group_member_id=group_member.id,
+            group_id=payload.group_id,
+            caption=payload.caption,
+            created_at=datetime.now(timezone.utc),
+            status=PostStatus.PROCESSING,
+        ))
+        print(f"✅ Post created with ID: {created_post.id} (direct upload of {len(payload.files)} files)")
+
+        uploads = [
+            DirectUploadSlot(
+                order=idx,
+                filename=file.filename,
+                **create_upload_token(
+                    created_post.id, idx, len(payload.files), file.filename, min(file.size, MAX_UPLOAD_SIZE)
+                ),
+            )
+            for idx, file in enumerate(payload.files)
+        ]
+        return DirectUploadSession(post=created_post, uploads=uploads)
+
+    return run_idempotent(
+        db, current_user_id, idempotency_key, "POST /posts/uploads", fingerprint(payload), handler
+    )
+
+
+@router.post(
+    "/{post_id}/finalize",
+    response_model=Post,
+    description="Finalise un post en upload direct à partir des reçus signés du stockage.",
+)
+def finalize_upload_session(
+    post_id: int,
+    payload: FinalizeUploadsRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(require_role(["any"])),
+):
+    """
+    Vérifie les reçus du slave (signature, post, un reçu par fichier annoncé,
+    type détecté) et planifie le traitement des fichiers : le post passe à
+    "ready" une fois les médias créés.
+    """
+    post = get_authored_post(db, post_id, current_user_id)
+    if post.status != PostStatus.PROCESSING or media_service.get_stored_orders(db, post_id):
+        raise HTTPException(status_code=409, detail="Post is already finalized")
+
+    verify_upload_receipts([receipt.model_dump() for receipt in payload.receipts], post_id)
+
+    # Le fichier est traité selon le type détecté par le slave, pas selon le nom annoncé
+    uploads = [
+        (receipt.order, Path(receipt.filename).stem + receipt.extension, receipt.upload_id)
+        for receipt in payload.receipts
+    ]
+    background_tasks.add_task(media_queue.enqueue_stored_uploads, post_id, uploads)
+    print(f"  ⏳ {len(uploads)} direct uploads queued for post {post_id}")
+    return post
+
+
+def get_authored_post(db: Session, post_id: int, user_id: int) -> Post:
+    """Retourne le post s'il existe et appartient à l'utilisateur (404 / 403 sinon)."""
+    post = repo.get_by_id(db, post_id)
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    group_member = groupmember_repo.get_by_id(db, post.group_member_id)
+    if not group_member or group_member.user_id != user_id:
+        raise HTTPException(status_code=403, detail="You don't have permission to modify this post")
+    return post
+
+
+class ResumableUpload(BaseModel):
+    order: int
+    filename: str
+    size: int
+    offset: int
+    upload_url: str
+
+
+class ResumableUploadSession(BaseModel):
+    post: Post
+    uploads: list[ResumableUpload]
+
+
+def get_resumable_session(post: Post) -> ResumableUploadSession:
+    offsets = resumable_uploads.get_offsets(post.id)
+    names = resumable_uploads.get_filenames(post.id)
+    return ResumableUploadSession(
+        post=post,
+        uploads=[
+            ResumableUpload(
+                order=order,
+                filename=names[order],
+                size=size,
+                offset=offset,
+                upload_url=f"/posts/{post.id}/uploads/{order}",
+            )
+            for order, (offset, size) in enumerate(offsets)
+        ],
+    )
+
+
+@router.post(
+    "/resumable",
+    response_model=ResumableUploadSession,
+    description="Crée un post dont les fichiers sont envoyés par morceaux reprenables (PATCH /posts/{id}/uploads/{ordre}).",
+)
+def create_resumable_upload(
+    payload: DirectUploadRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(require_role(["any"])),
+):
+    """
+    Upload reprenable (protocole inspiré de tus) :
+
+    1. Le client annonce ses fichiers (nom, taille) et reçoit un post "processing"
+    2. Il envoie chaque fichier par morceaux : PATCH avec l'en-tête Upload-Offset
+    3. Après une coupure, HEAD (ou GET /posts/resumable/{id}) donne l'offset
+       auquel reprendre
+    4. Le traitement démarre quand le dernier octet du dernier fichier est reçu
+
+    Avec Idempotency-Key, une requête renvoyée reçoit la session d'origine ;
+    les offsets à jour restent disponibles via GET /posts/resumable/{id}.
+
+    Un upload sans nouveau morceau pendant RESUMABLE_UPLOAD_TTL_SECONDS est
+    supprimé et son post passe à "failed".
+    """
+    validate_declared_files([(file.filename, file.size) for file in payload.files])
+    resumable_uploads.sweep_abandoned_uploads(db)
+
+    def handler():
+        group_member = check_upload_allowed(db, current_user_id, payload.group_id, len(payload.files))
+
+        created_post = repo.save(db, Post(
+            group_member_id=group_member.id,
+            group_id=payload.group_id,
+            caption=payload.caption,
+            created_at=datetime.now(timezone.utc),
+            status=PostStatus.PROCESSING,
+        ))
+        resumable_uploads.create_upload(created_post.id, [(file.filename, file.size) for file in payload.files])
+        print(f"✅ Post created with ID: {created_post.id} (resumable upload of {len(payload.files)} files)")
+
+        return get_resumable_session(created_post)
+
+    return run_idempotent(
+        db, current_user_id, idempotency_key, "POST /posts/resumable", fingerprint(payload), handler
+    )
+
+
+@router.get(
+    "/resumable/{post_id}",
+    response_model=ResumableUploadSession,
+    description="Récupère l'avancement d'un upload reprenable (offset de chaque fichier).",
+)
+def get_resumable_upload(
+    post_id: int,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(require_role(["any"])),
+):
+    return get_resumable_session(get_authored_post(db, post_id, current_user_id))
+
+
+@router.head(
+    "/{post_id}/uploads/{order}",
+    description="Retourne l'offset courant d'un fichier (en-têtes Upload-Offset et Upload-Length).",
+)
+def get_upload_offset(
+    post_id: int,
+    order: int,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(require_role(["any"])),
+):
+    get_authored_post(db, post_id, current_user_id)
+    offsets = resumable_uploads.get_offsets(post_id)
+    if not 0 <= order < len(offsets):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    offset, size = offsets[order]
+    return Response(headers={
+        "Upload-Offset": str(offset),
+        "Upload-Length": str(size),
+        "Cache-Control": "no-store",
+    })
+
+
+@router.patch(
+    "/{post_id}/uploads/{order}",
+    status_code=204,
+    description="Ajoute un morceau à un fichier à partir de Upload-Offset (corps brut).",
+)
+async def upload_chunk(
+    post_id: int,
+    order: int,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(require_role(["any"])),
+):
+    """
+    Le corps est écrit au fil de l'eau à la suite du fichier. Si la connexion
+    est coupée, les octets reçus sont conservés : le client reprend à l'offset
+    retourné par HEAD. Un offset différent de l'offset courant renvoie 409.
+    """
+    await db.run_sync(get_authored_post, post_id, current_user_id)
+    offset = await resumable_uploads.append_chunk(post_id, order, upload_offset, request.stream())
+    return Response(status_code=204, headers={"Upload-Offset": str(offset)})
+
+
+class PostStatusResponse(BaseModel):
+    post_id: int
+    status: PostStatus
+    media_count: int
+    error_message: Optional[str] = None
+
+
+@router.get(
+    "/{post_id}/status",
+    response_model=PostStatusResponse,
+    description="Récupère l'état de traitement des médias d'un post (membres du groupe uniquement).",
+)
+def get_post_status(
+    post_id: int,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(require_role(["any"])),
+):
+    """
+    Permet au client de suivre un post créé en mode asynchrone
+    (processing -> ready ou failed).
+    """
+    post = repo.get_by_id(db, post_id)
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    member = groupmember_repo.get_by_user_and_group(
+        db, user_id=current_user_id, group_id=post.group_id
+    )
+    if not member:
+        raise HTTPException(
+            status_code=403,
+            detail=f"User {current_user_id} is not a member of group {post.group_id}",
+        )
+
+    media_count = db.exec(
+        select(func.count(Media.id)).where(Media.post_id == post_id)
+    ).one()
+
+    return PostStatusResponse(
+        post_id=post.id,
+        status=post.status,
+        media_count=media_count,
+        error_message=post.error_message,
+    )
+
+
 @router.delete(
     "/{post_id}",
     description="Supprime un post et tous ses médias associés. L'auteur, les admins ou le créateur du groupe peuvent supprimer.",
@@ -201,19 +695,11 @@ def delete_post(
         select(Media).where(Media.post_id == post_id)
     ).all()
 
-    # Supprimer chaque fichier du slave storage
-    for media in medias:
-        # Extraire l'ID du fichier depuis l'URL (format: /media/proxy/{file_id})
-        file_id = media.media_url.split("/")[-1]
-        try:
-            orchestrator.delete_file_from_slave(file_id)
-            print(f"  🗑️  Deleted file from slave: {file_id}")
-        except Exception as e:
-            print(f"  ⚠️  Failed to delete file from slave: {file_id} - {e}")
-
-    # Supprimer les médias de la base de données
-    for media in medias:
-        media_repo.delete(db, media.id)
+    # Supprimer les fichiers du slave storage puis les médias de la base de données
+    media_service.delete_medias(db, medias)
+
+    # Abandonner un éventuel upload reprenable en cours
+    resumable_uploads.discard_upload(post_id)
 
     # Supprimer le post
     repo.delete(db, post_id)
@@ -8,6 +8,7 @@ from app.utils.slave_manager.orchestrator import (
     list_all_files_from_slave,
     delete_file_from_slave,
 )
+from app.utils.media_cache import invalidate_file
 
 
 router = APIRouter(prefix="/storage", tags=["Storage"])
@@ -104,6 +105,7 @@ def delete_storage_file(
         )
     try:
         result = delete_file_from_slave(file_id)
+        invalidate_file(file_id)
         return result
     except Exception as e:
         raise HTTPException(
@@ -7,8 +7,8 @@ from app.repositories.post_repository import PostRepository
 from app.utils.auth.roles import get_current_user
 from app.utils.auth.auth import get_password_hash, verify_password
 from app.utils.core.database import get_db
-from app.utils.slave_manager.orchestrator import save_media
-from app.utils.file_validation import validate_image_file
+from app.utils.file_validation import StreamingUploadRoute, validate_image_file
+from app.services.media_service import store_square_renditions
 
 
 class UpdateUsernameRequest(BaseModel):
@@ -20,7 +20,9 @@ class UpdatePasswordRequest(BaseModel):
     new_password: str
 
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(
+    prefix="/users", tags=["Users"], route_class=StreamingUploadRoute.with_limits(max_files=1)
+)
 user_repo = UserRepository()
 post_repo = PostRepository()
 
@@ -41,13 +43,14 @@ def get_current_user_posts_count(
 
 
 @router.post("/me/upload-avatar", response_model=UserRead)
-async def upload_avatar_for_current_user(
+def upload_avatar_for_current_user(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
     Upload avatar for current user.
+    L'image est recadrée au carré et stockée en 96, 256 et 512 px (WebP).
 
     Validations:
     - Taille maximale: 8 MB
@@ -57,14 +60,14 @@ async def upload_avatar_for_current_user(
     # Valider le fichier (taille, type MIME réel, extension)
     validate_image_file(file)
 
-    # Upload file to slave storage
+    # Recadrer, redimensionner et uploader les renditions sur le slave storage
     try:
-        avatar_url = save_media(file.file)
+        avatar_urls = store_square_renditions(file.file.read())
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload avatar: {str(e)}")
 
-    # Update user avatar URL
-    updated_user = user_repo.update_avatar(db, current_user.id, avatar_url)
+    # Update user avatar URLs
+    updated_user = user_repo.update_avatar(db, current_user.id, avatar_urls)
     return updated_user
 
 
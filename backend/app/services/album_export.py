@@ -0,0 +1,159 @@
+"""
+Export d'un album de groupe en archive ZIP construite a la volee.
+
+Les fichiers sont lus sur le slave en streaming, EXPORT_PREFETCH_FILES a la
+fois en avance sur l'ecriture de l'archive, chacun dans une file bornee
+(EXPORT_BUFFER_CHUNKS blocs) : la memoire d'un export ne depend pas de la
+taille de l'album.
+
+Le CRC32 et la taille de chaque fichier lu sont enregistres sur le media
+(export_crc32, export_size) : une reprise (Range) saute ensuite directement
+les fichiers precedents au lieu de les relire sur le slave.
+"""
+import asyncio
+import hashlib
+from contextlib import aclosing
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Optional
+from sqlalchemy import update
+from sqlmodel import Session, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.entities.media import Media
+from app.entities.post import Post
+from app.utils.core.config import settings
+from app.utils.core.database import engine
+from app.utils.slave_manager import orchestrator
+from app.utils.zip_stream import ZipEntry, ZipLayout, stream_zip
+
+
+class AlbumEntry(ZipEntry):
+    """Entree de l'archive d'un album : le media exporte et son CRC deja enregistre."""
+
+    def __init__(self, name: str, size: int, modified: datetime, key: str, media_id: int, crc: Optional[int]):
+        super().__init__(name, size, modified, key, crc)
+        self.media_id = media_id
+        self.stored_crc = crc
+
+
+def _group_medias(db: Session, group_id: int) -> list[tuple[Media, datetime]]:
+    """Medias du groupe et leur date de prise de vue (date du post si inconnue)."""
+    # captured_at n'est renseigne par migrations.py que sur PostgreSQL
+    captured_at = func.coalesce(Media.captured_at, Post.created_at)
+    return db.exec(
+        select(Media, captured_at)
+        .join(Post, Media.post_id == Post.id)
+        .where(Media.group_id == group_id)
+        .order_by(captured_at, Media.id)
+    ).all()
+
+
+async def build_layout(db: AsyncSession, group_id: int) -> ZipLayout:
+    """
+    Liste les photos du groupe (ordre de prise de vue) avec leur taille sur le
+    slave. Les fichiers introuvables sur le slave sont ignores.
+    """
+    medias = await db.run_sync(_group_medias, group_id)
+
+    # L'original (GIF conserve) plutot que sa version transcodee
+    file_ids = [(media.original_url or media.media_url).split("/")[-1] for media, _ in medias]
+    stats = await orchestrator.stat_files(file_ids) if file_ids else {}
+
+    entries = []
+    for (media, captured_at), file_id in zip(medias, file_ids):
+        stat = stats.get(file_id)
+        if not stat:
+            print(f"  ⚠️  Export: file {file_id} of media {media.id} not found on slave")
+            continue
+        entries.append(AlbumEntry(
+            name=f"{captured_at:%Y-%m-%d_%H%M%S}_{media.id}{Path(stat['filename']).suffix}",
+            size=stat["size"],
+            modified=captured_at,
+            key=file_id,
+            media_id=media.id,
+            # CRC enregistre valable tant que le fichier a la meme taille
+            crc=media.export_crc32 if media.export_size == stat["size"] else None,
+        ))
+    return ZipLayout(entries)
+
+
+def layout_etag(layout: ZipLayout) -> str:
+    """ETag de l'archive : identique tant que les fichiers (noms, tailles) ne changent pas."""
+    digest = hashlib.sha256("\n".join(f"{entry.name}:{entry.size}" for entry in layout.entries).encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+async def _pump(file_id: str, queue: asyncio.Queue) -> None:
+    """Lit un fichier du slave dans une file bornee (None en fin, l'exception en cas d'erreur)."""
+    try:
+        response = await orchestrator.open_file_stream(file_id)
+        try:
+            async for chunk in response.aiter_raw(settings.MEDIA_PROXY_CHUNK_SIZE):
+                await queue.put(chunk)
+        finally:
+            await response.aclose()
+        await queue.put(None)
+    except Exception as e:
+        await queue.put(e)
+
+
+async def _drain(queue: asyncio.Queue) -> AsyncIterator[bytes]:
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+async def prefetched_contents(entries: list[ZipEntry]) -> AsyncIterator[AsyncIterator[bytes]]:
+    """Contenu de chaque entree, dans l'ordre, lu en avance par EXPORT_PREFETCH_FILES taches."""
+    queues: list[asyncio.Queue] = []
+    tasks: list[asyncio.Task] = []
+
+    def start(index: int) -> None:
+        queue = asyncio.Queue(maxsize=settings.EXPORT_BUFFER_CHUNKS)
+        queues.append(queue)
+        tasks.append(asyncio.create_task(_pump(entries[index].key, queue)))
+
+    try:
+        for index in range(min(settings.EXPORT_PREFETCH_FILES, len(entries))):
+            start(index)
+        for index in range(len(entries)):
+            yield _drain(queues[index])
+            if len(queues) < len(entries):
+                start(len(queues))
+    finally:
+        # Client deconnecte ou plage terminee : abandonner les lectures en cours
+        for task in tasks:
+            task.cancel()
+
+
+def save_checksums(entries: list[AlbumEntry]) -> None:
+    """Enregistre le CRC32 et la taille des fichiers lus pendant un export."""
+    with Session(engine) as db:
+        for entry in entries:
+            db.exec(
+                update(Media)
+                .where(Media.id == entry.media_id)
+                .values(export_crc32=entry.crc, export_size=entry.size)
+            )
+        db.commit()
+
+
+async def stream_album(layout: ZipLayout, start: int, end: int) -> AsyncIterator[bytes]:
+    """
+    Octets [start, end] de l'archive d'un album (voir stream_zip). Les CRC
+    nouvellement calcules sont enregistres, meme si le client se deconnecte.
+    """
+    try:
+        # aclosing : les lectures en avance sont abandonnees des que le flux s'arrete
+        async with aclosing(prefetched_contents(layout.entries_to_read(start))) as contents:
+            async for part in stream_zip(layout, contents, start, end):
+                yield part
+    finally:
+        computed = [entry for entry in layout.entries if entry.crc is not None and entry.crc != entry.stored_crc]
+        if computed:
+            # Sans await : le generateur peut etre ferme par une annulation
+            asyncio.get_running_loop().run_in_executor(None, save_checksums, computed)
@@ -0,0 +1,330 @@
+"""
+Import d'un album existant depuis une archive (zip ou tar).
+
+L'archive est recue en streaming dans le spool, puis traitee par un thread
+dedie : les entrees sont lues dans l'ordre de l'archive, validees et
+compressees par un pool de IMPORT_WORKERS threads (au plus deux fois plus
+d'images en memoire), puis envoyees au slave et inserees en base par lots de
+IMPORT_BATCH_SIZE photos. Les photos sont regroupees en posts de MAX_FILES
+medias. L'avancement est suivi dans ImportJob.
+"""
+import tarfile
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterator, Optional
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session, func, select
+from app.entities.group import Group
+from app.entities.groupmember import GroupMember
+from app.entities.import_job import ImportJob, ImportJobStatus
+from app.entities.media import Media
+from app.entities.post import Post
+from app.services.media_queue import SPOOL_DIR
+from app.services.media_service import (
+    build_media,
+    check_duplicate,
+    compress_media,
+    rendition_uploads,
+)
+from app.utils.core.config import settings
+from app.utils.core.database import engine
+from app.utils.duplicate_index import BKTree, duplicate_index
+from app.utils.file_validation import (
+    ALLOWED_IMAGE_EXTENSIONS,
+    ALLOWED_IMAGE_MIMES,
+    MAX_FILES,
+    MAX_UPLOAD_SIZE,
+    detect_mime_type,
+)
+from app.utils.slave_manager import orchestrator
+
+IMPORTS_DIR = SPOOL_DIR / ".imports"
+
+
+async def receive_archive(job_id: int, chunks: AsyncIterator[bytes]) -> Path:
+    """
+    Ecrit le corps de la requete (l'archive) dans le spool, au fil de l'eau.
+
+    Raises:
+        HTTPException 413: archive plus grande que IMPORT_MAX_ARCHIVE_BYTES
+    """
+    IMPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    path = IMPORTS_DIR / f"{job_id}.archive"
+    size = 0
+    spooled = await run_in_threadpool(open, path, "wb")
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > settings.IMPORT_MAX_ARCHIVE_BYTES:
+                raise HTTPException(status_code=413, detail="Archive trop volumineuse.")
+            await run_in_threadpool(spooled.write, chunk)
+    except BaseException:
+        spooled.close()
+        path.unlink(missing_ok=True)
+        raise
+    spooled.close()
+    return path
+
+
+def start_import(job_id: int, archive_path: Path) -> None:
+    """Lance le traitement de l'archive dans un thread dedie."""
+    threading.Thread(
+        target=_run_import, args=(job_id, archive_path), name=f"album-import-{job_id}", daemon=True
+    ).start()
+
+
+def _is_image_name(name: str) -> bool:
+    path = Path(name)
+    # Fichiers caches et metadonnees macOS ignores
+    if any(part.startswith(".") or part == "__MACOSX" for part in path.parts):
+        return False
+    return path.suffix.lower() in ALLOWED_IMAGE_EXTENSIONS
+
+
+def _archive_entries(archive_path: Path) -> Iterator[tuple[str, int, Callable[[], bytes]]]:
+    """Entrees image de l'archive : (nom, taille, lecture du contenu), dans l'ordre de l'archive."""
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and _is_image_name(info.filename):
+                    yield info.filename, info.file_size, lambda info=info: archive.read(info)
+        return
+
+    # tar, eventuellement compresse (gz, bz2, xz)
+    try:
+        archive = tarfile.open(archive_path, "r:*")
+    except tarfile.TarError:
+        raise ValueError("Archive non reconnue (zip ou tar attendu)")
+    with archive:
+        for member in archive:
+            if member.isfile() and _is_image_name(member.name):
+                yield member.name, member.size, lambda member=member: archive.extractfile(member).read()
+
+
+def _prepare(content: bytes, filename: str) -> Optional[tuple[dict, dict]]:
+    """Valide (magic bytes) et compresse une entree ; None si elle est invalide."""
+    if detect_mime_type(content[:16]) not in ALLOWED_IMAGE_MIMES:
+        return None
+    try:
+        return compress_media(content, filename)
+    except Exception as e:
+        print(f"  ⚠️  Import: {filename} could not be processed: {e}")
+        return None
+
+
+def _count_images(archive_path: Path) -> int:
+    return sum(1 for _ in _archive_entries(archive_path))
+
+
+def _run_import(job_id: int, archive_path: Path) -> None:
+    with Session(engine) as db:
+        job = db.get(ImportJob, job_id)
+        try:
+            _import_archive(db, job, archive_path)
+            job.status = ImportJobStatus.COMPLETED
+        except Exception as e:
+            db.rollback()
+            job.status = ImportJobStatus.FAILED
+            job.error_message = str(e)
+            print(f"⚠️  Import {job_id} failed: {e}")
+        job.completed_at = job.updated_at = datetime.now(timezone.utc)
+        db.add(job)
+        db.commit()
+    archive_path.unlink(missing_ok=True)
+
+
+def _import_archive(db: Session, job: ImportJob, archive_path: Path) -> None:
+    group = db.get(Group, job.group_id)
+    member = db.exec(
+        select(GroupMember).where(GroupMember.group_id == job.group_id, GroupMember.user_id == job.user_id)
+    ).first()
+
+    job.total_files = _count_images(archive_path)
+    remaining = _remaining_capacity(db, group)
+    if job.total_files > remaining:
+        _quota_reached(db, job, group, job.total_files - remaining)
+    _save_progress(db, job)
+
+    batch: list[tuple[str, dict, dict]] = []
+    # Post en cours de remplissage et son nombre de medias
+    current_post: list = [None, 0]
+    pending: deque[tuple[str, Future]] = deque()
+
+    def collect(name: str, future: Future) -> None:
+        job.processed_files += 1
+        prepared = future.result()
+        if prepared is None:
+            job.skipped_files += 1
+            return
+        batch.append((name, *prepared))
+        if len(batch) >= settings.IMPORT_BATCH_SIZE:
+            _flush_batch(db, job, member.id, batch, current_post)
+            batch.clear()
+
+    with ThreadPoolExecutor(max_workers=settings.IMPORT_WORKERS, thread_name_prefix=f"import-{job.id}") as pool:
+        accepted = 0
+        for name, size, read in _archive_entries(archive_path):
+            if accepted >= remaining or size > MAX_UPLOAD_SIZE:
+                job.processed_files += 1
+                job.skipped_files += 1
+                continue
+            accepted += 1
+            # Lecture sequentielle de l'archive, compression en parallele
+            pending.append((name, pool.submit(_prepare, read(), Path(name).name)))
+            if len(pending) >= 2 * settings.IMPORT_WORKERS:
+                collect(*pending.popleft())
+        while pending:
+            collect(*pending.popleft())
+
+    if batch:
+        _flush_batch(db, job, member.id, batch, current_post)
+
+
+def _remaining_capacity(db: Session, group: Group) -> int:
+    current_count = db.exec(select(func.count(Media.id)).where(Media.group_id == group.id)).one() or 0
+    return max(group.max_photos - current_count, 0)
+
+
+def _quota_reached(db: Session, job: ImportJob, group: Group, not_imported: int) -> None:
+    job.error_message = (
+        f"Group quota reached: {not_imported} photos not imported "
+        f"({group.max_photos - _remaining_capacity(db, group)}/{group.max_photos} photos)."
+    )
+
+
+def _deduplicate(
+    db: Session, job: ImportJob, batch: list[tuple[str, dict, dict]]
+) -> list[tuple[dict, dict, Optional[Media], Optional[int]]]:
+    """
+    Applique MEDIA_DUPLICATE_POLICY au lot : quasi-doublons des photos du groupe
+    et des photos precedentes du meme lot (pas encore en base ni dans l'index).
+    Retourne (renditions, metadata, doublon en base, position du doublon dans le lot).
+    """
+    kept = []
+    batch_index = BKTree()
+    for name, renditions, metadata in batch:
+        try:
+            duplicate = check_duplicate(db, job.group_id, metadata, name)
+        except HTTPException:
+            job.skipped_files += 1
+            continue
+        batch_duplicate = None
+        if duplicate is None and metadata.get("dhash") and settings.MEDIA_DUPLICATE_POLICY != "off":
+            matches = batch_index.search(int(metadata["dhash"], 16), settings.MEDIA_DUPLICATE_MAX_DISTANCE)
+            if matches and settings.MEDIA_DUPLICATE_POLICY == "reject":
+                job.skipped_files += 1
+                continue
+            batch_duplicate = matches[0][1] if matches else None
+        if metadata.get("dhash"):
+            batch_index.add(int(metadata["dhash"], 16), len(kept))
+        kept.append((renditions, metadata, duplicate, batch_duplicate))
+    return kept
+
+
+def _flush_batch(
+    db: Session,
+    job: ImportJob,
+    group_member_id: int,
+    batch: list[tuple[str, dict, dict]],
+    current_post: list,
+) -> None:
+    """
+    Envoie un lot au slave en une requete puis insere posts et medias en une
+    transaction. Si l'insertion echoue, les fichiers envoyes sont supprimes du slave.
+    """
+    # Quasi-doublons : les images refusees ne sont pas envoyees
+    kept = _deduplicate(db, job, batch)
+
+    # Le quota est reverifie a chaque lot : d'autres uploads ont pu avoir lieu pendant l'import
+    group = db.get(Group, job.group_id)
+    remaining = _remaining_capacity(db, group)
+    if len(kept) > remaining:
+        job.skipped_files += len(kept) - remaining
+        _quota_reached(db, job, group, len(kept) - remaining)
+        kept = kept[:remaining]
+    if not kept:
+        _save_progress(db, job)
+        return
+
+    files = [
+        (key, rendition_file, filename)
+        for renditions, _, _, _ in kept
+        for key, rendition_file, filename in rendition_uploads(renditions)
+    ]
+    uploaded_urls = orchestrator.save_media_batch([(rendition_file, filename) for _, rendition_file, filename in files])
+    try:
+        medias = _insert_medias(db, job, group_member_id, kept, uploaded_urls, current_post)
+    except Exception:
+        db.rollback()
+        _delete_uploaded(uploaded_urls)
+        raise
+
+    for media in medias:
+        if media.dhash:
+            duplicate_index.add(job.group_id, media.id, media.dhash)
+    print(f"  📦 Import {job.id}: {job.imported_files}/{job.total_files} photos imported")
+
+
+def _insert_medias(
+    db: Session,
+    job: ImportJob,
+    group_member_id: int,
+    kept: list[tuple[dict, dict, Optional[Media], Optional[int]]],
+    uploaded_urls: list[str],
+    current_post: list,
+) -> list[Media]:
+    urls = iter(uploaded_urls)
+    uploaded_by_media = [
+        {key: next(urls) for key, _, _ in rendition_uploads(renditions)}
+        for renditions, _, _, _ in kept
+    ]
+
+    medias = []
+    for (renditions, metadata, duplicate, _), uploaded in zip(kept, uploaded_by_media):
+        # Nouveau post tous les MAX_FILES medias
+        if current_post[0] is None or current_post[1] >= MAX_FILES:
+            post = Post(
+                group_member_id=group_member_id,
+                group_id=job.group_id,
+                caption=job.caption,
+                created_at=datetime.now(timezone.utc),
+            )
+            db.add(post)
+            db.flush()
+            current_post[:] = [post, 0]
+            job.post_count += 1
+        post, order = current_post
+        media, _ = build_media(post, order, renditions, metadata, uploaded, duplicate)
+        current_post[1] += 1
+        medias.append(media)
+
+    db.add_all(medias)
+    db.flush()
+    # Doublons d'une photo du meme lot : son id n'est connu qu'apres insertion
+    for media, (_, _, _, batch_duplicate) in zip(medias, kept):
+        if batch_duplicate is not None:
+            media.duplicate_of_id = medias[batch_duplicate].id
+    job.imported_files += len(medias)
+    _save_progress(db, job)
+    return medias
+
+
+def _delete_uploaded(urls: list[str]) -> None:
+    """Supprime du slave les fichiers d'un lot dont l'insertion a echoue."""
+    for url in urls:
+        file_id = url.split("/")[-1]
+        try:
+            orchestrator.delete_file_from_slave(file_id)
+        except Exception as e:
+            print(f"  ⚠️  Failed to delete file from slave: {file_id} - {e}")
+
+
+def _save_progress(db: Session, job: ImportJob) -> None:
+    job.updated_at = datetime.now(timezone.utc)
+    db.add(job)
+    db.commit()
@@ -0,0 +1,182 @@
+"""
+Cles d'idempotence (en-tete Idempotency-Key) pour les creations de posts.
+
+La premiere requete portant une cle est executee et sa reponse enregistree
+(IDEMPOTENCY_TTL_SECONDS) ; une requete rejouee avec la meme cle recoit la
+reponse d'origine sans rien recompresser ni renvoyer au slave. Une requete
+encore en cours renvoie 409, une cle reutilisee avec d'autres parametres 422.
+En cas d'erreur, la cle est liberee pour que le client puisse reessayer.
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, BinaryIO, Callable, Optional
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.entities.idempotency_key import IdempotencyKey, IdempotencyStatus
+from app.repositories.idempotency_key_repository import IdempotencyKeyRepository
+from app.utils.core.config import settings
+
+repo = IdempotencyKeyRepository()
+
+
+def fingerprint(*parts: Any) -> str:
+    """Empreinte des parametres d'une requete (fichiers representes par nom, taille et SHA-256)."""
+    return hashlib.sha256(json.dumps(jsonable_encoder(parts), sort_keys=True).encode()).hexdigest()
+
+
+def file_digest(file: BinaryIO) -> str:
+    """SHA-256 du contenu d'un fichier uploade (lu par blocs, position remise a 0)."""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for block in iter(lambda: file.read(1024 * 1024), b""):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite rend des dates naives
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _begin(db: Session, user_id: int, key: str, endpoint: str, request_fingerprint: str) -> IdempotencyKey:
+    now = datetime.now(timezone.utc)
+    existing = repo.get_by_user_and_key(db, user_id, key)
+    if existing:
+        abandoned = (
+            existing.status == IdempotencyStatus.IN_PROGRESS
+            and _as_utc(existing.created_at) + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS) < now
+        )
+        if _as_utc(existing.expires_at) < now or abandoned:
+            repo.delete(db, existing.id)
+        elif existing.endpoint != endpoint or existing.request_fingerprint != request_fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key already used with different request parameters",
+            )
+        elif existing.status == IdempotencyStatus.IN_PROGRESS:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress")
+        else:
+            return existing
+
+    repo.delete_expired(db, now)
+    record = IdempotencyKey(
+        user_id=user_id,
+        key=key,
+        endpoint=endpoint,
+        request_fingerprint=request_fingerprint,
+        created_at=now,
+        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+    )
+    try:
+        db.add(record)
+        db.commit()
+    except IntegrityError:
+        # Requete concurrente avec la meme cle
+        db.rollback()
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress")
+    db.refresh(record)
+    return record
+
+
+def _check_key(key: str) -> None:
+    if len(key) > 255:
+        raise HTTPException(status_code=400, detail="Idempotency-Key too long (255 characters max)")
+
+
+def _replay(record: IdempotencyKey) -> JSONResponse:
+    print(f"♻️  Replaying response for Idempotency-Key {record.key}")
+    return JSONResponse(
+        content=json.loads(record.response_body),
+        status_code=record.response_status_code,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def _release(db: Session, record_id: int) -> None:
+    # Liberer la cle : le client pourra reessayer
+    db.rollback()
+    repo.delete(db, record_id)
+
+
+def _complete(db: Session, record_id: int, status_code: int, body: Any) -> None:
+    record = repo.get_by_id(db, record_id)
+    record.status = IdempotencyStatus.COMPLETED
+    record.response_status_code = status_code
+    record.response_body = json.dumps(body)
+    db.add(record)
+    db.commit()
+
+
+def _response_of(result: Any, status_code: int) -> tuple[int, Any]:
+    """Code HTTP et corps JSON du resultat d'un handler (objet a serialiser ou JSONResponse)."""
+    if isinstance(result, JSONResponse):
+        return result.status_code, json.loads(result.body)
+    return status_code, jsonable_encoder(result)
+
+
+def run_idempotent(
+    db: Session,
+    user_id: int,
+    key: Optional[str],
+    endpoint: str,
+    request_fingerprint: str,
+    handler: Callable[[], Any],
+    status_code: int = 200,
+) -> Any:
+    """
+    Execute handler une seule fois par cle et retourne sa reponse (JSON),
+    ou la reponse enregistree pour une requete rejouee. Sans cle, le resultat
+    de handler est retourne tel quel. Le code HTTP enregistre est celui de la
+    JSONResponse retournee par handler, sinon status_code (celui de la route).
+    """
+    if not key:
+        return handler()
+    _check_key(key)
+
+    record = _begin(db, user_id, key, endpoint, request_fingerprint)
+    if record.status == IdempotencyStatus.COMPLETED:
+        return _replay(record)
+
+    record_id = record.id
+    try:
+        response_status, body = _response_of(handler(), status_code)
+    except BaseException:
+        _release(db, record_id)
+        raise
+    _complete(db, record_id, response_status, body)
+    return JSONResponse(content=body, status_code=response_status)
+
+
+async def run_idempotent_async(
+    db: AsyncSession,
+    user_id: int,
+    key: Optional[str],
+    endpoint: str,
+    request_fingerprint: str,
+    handler: Callable[[], Awaitable[Any]],
+    status_code: int = 200,
+) -> Any:
+    """Variante de run_idempotent pour les routes async (AsyncSession, handler coroutine)."""
+    if not key:
+        return await handler()
+    _check_key(key)
+
+    # Les etapes en base (courtes) reutilisent le code synchrone via run_sync
+    record = await db.run_sync(_begin, user_id, key, endpoint, request_fingerprint)
+    if record.status == IdempotencyStatus.COMPLETED:
+        return _replay(record)
+
+    record_id = record.id
+    try:
+        response_status, body = _response_of(await handler(), status_code)
+    except BaseException:
+        await db.run_sync(_release, record_id)
+        raise
+    await db.run_sync(_complete, record_id, response_status, body)
+    return JSONResponse(content=body, status_code=response_status)
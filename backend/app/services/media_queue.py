@@ -0,0 +1,183 @@
+"""
+File de traitement asynchrone des medias.
+
+Les uploads bruts sont ecrits dans un repertoire de spool (un sous-repertoire par
+post), puis des workers locaux les compressent, generent les renditions, les
+envoient au slave et passent le post a l'etat ready (ou failed).
+Les jobs encore presents dans le spool au demarrage sont repris.
+
+Les uploads directs (deja sur le slave) sont rapatries en streaming dans un
+repertoire temporaire du spool puis deplaces d'un bloc, pour qu'un job ne soit jamais
+repris a moitie telecharge.
+"""
+import queue
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional
+from fastapi import HTTPException, UploadFile
+from sqlmodel import Session
+from app.entities.post import Post, PostStatus
+from app.services.media_service import get_stored_orders, store_media
+from app.utils.core.config import settings
+from app.utils.core.database import engine
+from app.utils.slave_manager import orchestrator
+
+SPOOL_DIR = Path(settings.MEDIA_SPOOL_DIR)
+INCOMING_DIR = SPOOL_DIR / ".incoming"
+
+_jobs: "queue.Queue[int]" = queue.Queue()
+_workers: list[threading.Thread] = []
+_workers_lock = threading.Lock()
+
+
+def enqueue_post_media(post_id: int, files: list[UploadFile], orders: Optional[list[int]] = None) -> None:
+    """
+    Ecrit les uploads bruts dans le spool et planifie leur traitement.
+    Les fichiers sont nommes "{ordre}_{nom}" pour conserver l'ordre du post
+    (orders donne la position de chaque fichier, par defaut leur rang).
+    """
+    # Demarrer les workers avant d'ecrire le job pour que la reprise ne le voie pas
+    start_workers()
+
+    job_dir = SPOOL_DIR / str(post_id)
+    job_dir.mkdir(parents=True, exist_ok=True)
+
+    for idx, file in zip(orders or range(len(files)), files):
+        filename = Path(file.filename or "fichier").name
+        with open(job_dir / f"{idx}_{filename}", "wb") as spooled:
+            shutil.copyfileobj(file.file, spooled)
+
+    _jobs.put(post_id)
+
+
+def enqueue_stored_uploads(post_id: int, uploads: list[tuple[int, str, str]]) -> None:
+    """
+    Planifie le traitement d'uploads envoyes directement au slave.
+
+    Args:
+        uploads: Liste (ordre, nom de fichier, ID du fichier brut sur le slave)
+    """
+    start_workers()
+
+    incoming_dir = INCOMING_DIR / str(post_id)
+    try:
+        incoming_dir.mkdir(parents=True)
+    except FileExistsError:
+        print(f"  ⏳ Direct uploads of post {post_id} already queued")
+        return
+    if (SPOOL_DIR / str(post_id)).exists():
+        incoming_dir.rmdir()
+        print(f"  ⏳ Direct uploads of post {post_id} already queued")
+        return
+    try:
+        for order, filename, file_id in uploads:
+            orchestrator.download_file_from_slave(file_id, incoming_dir / f"{order}_{Path(filename).name}")
+    except Exception as e:
+        shutil.rmtree(incoming_dir, ignore_errors=True)
+        with Session(engine) as db:
+            post = db.get(Post, post_id)
+            if post:
+                post.status = PostStatus.FAILED
+                post.error_message = f"Failed to fetch direct uploads: {e}"
+                db.add(post)
+                db.commit()
+        print(f"⚠️  Failed to fetch direct uploads for post {post_id}: {e}")
+        return
+
+    enqueue_spooled_job(post_id, incoming_dir)
+
+    # Les fichiers bruts ne servent plus : seules les renditions sont conservees
+    for _, _, file_id in uploads:
+        try:
+            orchestrator.delete_file_from_slave(file_id)
+        except Exception as e:
+            print(f"  ⚠️  Failed to delete raw upload from slave: {file_id} - {e}")
+
+
+def enqueue_spooled_job(post_id: int, job_dir: Path) -> None:
+    """
+    Planifie un job dont les fichiers "{ordre}_{nom}" sont deja complets dans
+    job_dir (sur le meme disque que le spool) : le repertoire est deplace d'un
+    bloc dans le spool, sans copie des fichiers.
+    """
+    start_workers()
+    job_dir.rename(SPOOL_DIR / str(post_id))
+    _jobs.put(post_id)
+
+
+def start_workers() -> None:
+    """Demarre les workers au premier besoin et reprend les jobs restes dans le spool."""
+    with _workers_lock:
+        if _workers:
+            return
+
+        SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+        # Telechargements d'uploads directs interrompus : a refaire via finalize
+        shutil.rmtree(INCOMING_DIR, ignore_errors=True)
+        for job_dir in SPOOL_DIR.iterdir():
+            if job_dir.is_dir() and job_dir.name.isdigit():
+                _jobs.put(int(job_dir.name))
+
+        for i in range(settings.MEDIA_WORKERS):
+            worker = threading.Thread(target=_worker_loop, name=f"media-worker-{i}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+
+def _worker_loop() -> None:
+    while True:
+        post_id = _jobs.get()
+        try:
+            _process_post(post_id)
+        except Exception as e:
+            print(f"⚠️  Media processing crashed for post {post_id}: {e}")
+        finally:
+            _jobs.task_done()
+
+
+def _process_post(post_id: int) -> None:
+    job_dir = SPOOL_DIR / str(post_id)
+    if not job_dir.exists():
+        return
+
+    with Session(engine) as db:
+        post = db.get(Post, post_id)
+        if not post:
+            # Post supprime entre-temps : abandonner les fichiers
+            shutil.rmtree(job_dir, ignore_errors=True)
+            return
+
+        try:
+            done = get_stored_orders(db, post_id)
+            rejected = []
+            spooled_files = sorted(job_dir.iterdir(), key=lambda path: int(path.name.split("_", 1)[0]))
+            for path in spooled_files:
+                order_str, filename = path.name.split("_", 1)
+                order = int(order_str)
+                if order in done:
+                    continue
+                try:
+                    media, stats = store_media(db, post_id, order, path.read_bytes(), filename)
+                except HTTPException as e:
+                    if e.status_code != 409:
+                        raise
+                    # Quasi-doublon refuse : les autres fichiers du post sont conserves
+                    rejected.append(filename)
+                    path.unlink()
+                    print(f"  ♻️  Media {order + 1} of post {post_id} rejected as near duplicate")
+                    continue
+                print(f"  📷 Media {order + 1} of post {post_id} processed ({stats['compressed_size']} bytes): {media.media_url}")
+
+            post.status = PostStatus.READY
+            post.error_message = f"Near duplicates rejected: {', '.join(rejected)}" if rejected else None
+        except Exception as e:
+            db.rollback()
+            post.status = PostStatus.FAILED
+            post.error_message = str(e)
+            print(f"⚠️  Media processing failed for post {post_id}: {e}")
+
+        db.add(post)
+        db.commit()
+
+    shutil.rmtree(job_dir, ignore_errors=True)
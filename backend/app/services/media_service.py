@@ -0,0 +1,386 @@
+import hashlib
+import io
+from typing import Optional
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.entities.groupmember import GroupMember
+from app.entities.media import Media
+from app.entities.post import Post
+from app.repositories.media_repository import AsyncMediaRepository, MediaRepository
+from app.utils import media_cache
+from app.utils.slave_manager import orchestrator
+from app.utils.core.config import settings
+from app.utils.duplicate_index import duplicate_index
+from app.utils.image_compression import (
+    EXTENSION_MIME_TYPES,
+    RENDITION_SIZES,
+    SQUARE_SIZES,
+    compress_renditions,
+    generate_square_renditions,
+)
+
+media_repo = MediaRepository()
+async_media_repo = AsyncMediaRepository()
+
+
+def store_media(
+    db: Session,
+    post_id: int,
+    order: int,
+    file_content: bytes,
+    filename: str,
+) -> tuple[Media, dict]:
+    """
+    Compresse une image en renditions, les envoie au slave et cree le Media associe.
+
+    Les quasi-doublons d'une photo deja presente dans le groupe sont detectes
+    avant l'envoi au slave : selon MEDIA_DUPLICATE_POLICY, le media est marque
+    (duplicate_of_id) ou refuse.
+
+    Raises:
+        HTTPException 409: Quasi-doublon refuse (politique "reject")
+
+    Returns:
+        Tuple (media cree, stats) ou stats contient compressed_size (plus grande
+        rendition) et baseline_size (meme image a qualite fixe, egal a
+        compressed_size sans mesure de reference, voir measure_baseline)
+    """
+    renditions, metadata = compress_media(file_content, filename)
+
+    post = db.get(Post, post_id)
+    group_id = post.group_id
+    duplicate = check_duplicate(db, group_id, metadata, filename)
+
+    uploaded = upload_renditions(renditions)
+
+    new_media, stats = build_media(post, order, renditions, metadata, uploaded, duplicate)
+    saved_media = media_repo.save(db, new_media)
+    if saved_media.dhash:
+        # Les rafales d'un meme post sont comparees entre elles
+        duplicate_index.add(group_id, saved_media.id, saved_media.dhash)
+    return saved_media, stats
+
+
+async def store_media_async(
+    db: AsyncSession,
+    post: Post,
+    order: int,
+    file_content: bytes,
+    filename: str,
+) -> tuple[Media, dict]:
+    """
+    Variante de store_media pour les routes async : la compression et l'envoi
+    au slave s'executent dans le pool de threads, sans bloquer la boucle.
+    """
+    renditions, metadata = await run_in_threadpool(compress_media, file_content, filename)
+    duplicate = await db.run_sync(check_duplicate, post.group_id, metadata, filename)
+    uploaded = await run_in_threadpool(upload_renditions, renditions)
+
+    new_media, stats = build_media(post, order, renditions, metadata, uploaded, duplicate)
+    saved_media = await async_media_repo.save(db, new_media)
+    if saved_media.dhash:
+        duplicate_index.add(post.group_id, saved_media.id, saved_media.dhash)
+    return saved_media, stats
+
+
+def upload_renditions(renditions: dict) -> dict[str, str]:
+    """Envoie chaque rendition sur le slave et retourne les URLs par rendition."""
+    return {
+        key: orchestrator.save_media(rendition_file, filename=rendition_filename)
+        for key, rendition_file, rendition_filename in rendition_uploads(renditions)
+    }
+
+
+def compress_media(file_content: bytes, filename: str) -> tuple[dict, dict]:
+    """
+    Compresse une image en renditions selon la configuration (moteur, GIF, qualite).
+    Les metadonnees incluent le SHA-256 du fichier envoye (content_sha256).
+    """
+    renditions, metadata = compress_renditions(
+        file_content,
+        filename,
+        gif_format=None if settings.GIF_TRANSCODE_FORMAT == "none" else settings.GIF_TRANSCODE_FORMAT,
+        keep_original_gif=settings.GIF_KEEP_ORIGINAL,
+        adaptive=get_adaptive_settings(),
+        progressive=settings.IMAGE_PROGRESSIVE_JPEG,
+        engine=settings.IMAGE_ENGINE,
+    )
+    metadata["content_sha256"] = hashlib.sha256(file_content).hexdigest()
+    return renditions, metadata
+
+
+def check_duplicate(
+    db: Session, group_id: int, metadata: dict, filename: str, exclude_sha256: Optional[str] = None
+) -> Optional[Media]:
+    """
+    Applique MEDIA_DUPLICATE_POLICY : retourne le media dont l'image est un
+    quasi-doublon (politique "flag"), ou None. Les medias au contenu identique
+    a exclude_sha256 ne comptent pas comme quasi-doublons.
+
+    Raises:
+        HTTPException 409: Quasi-doublon refuse (politique "reject")
+    """
+    if settings.MEDIA_DUPLICATE_POLICY == "off" or not metadata.get("dhash"):
+        return None
+    duplicate = find_near_duplicate(db, group_id, metadata["dhash"], exclude_sha256)
+    if duplicate and settings.MEDIA_DUPLICATE_POLICY == "reject":
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "error": "duplicate_media",
+                "message": f"{filename} is a near duplicate of a photo already in this group.",
+                "filename": filename,
+                "duplicate_of_id": duplicate.id,
+            },
+        )
+    return duplicate
+
+
+def rendition_uploads(renditions: dict) -> list[tuple[str, io.IOBase, str]]:
+    """
+    Fichiers a envoyer au slave pour un media : (cle, fichier, nom) pour chaque
+    rendition presente et l'original GIF conserve.
+    """
+    return [
+        (key, rendition_file, f"{key}{extension}")
+        for key, (rendition_file, extension) in renditions.items()
+        if key in RENDITION_SIZES or key == "original"
+    ]
+
+
+def build_media(
+    post: Post,
+    order: int,
+    renditions: dict,
+    metadata: dict,
+    uploaded: dict[str, str],
+    duplicate: Optional[Media] = None,
+) -> tuple[Media, dict]:
+    """
+    Construit le Media (non enregistre) a partir des renditions envoyees au slave.
+
+    Returns:
+        Tuple (media, stats) ou stats contient compressed_size (plus grande
+        rendition) et baseline_size (meme image a qualite fixe, egal a
+        compressed_size sans mesure de reference, voir measure_baseline)
+    """
+    # Une rendition absente (image source trop petite) reutilise la superieure
+    urls = {}
+    previous_url = None
+    compressed_size = 0
+    for name in sorted(RENDITION_SIZES, key=RENDITION_SIZES.get, reverse=True):
+        if name in renditions:
+            rendition_file, extension = renditions[name]
+            if previous_url is None:
+                compressed_size = rendition_file.seek(0, 2)
+                full_extension = extension
+            previous_url = uploaded[name]
+        urls[name] = previous_url
+
+    new_media = Media(
+        post_id=post.id,
+        group_id=post.group_id,
+        media_url=urls["full"],
+        thumbnail_url=urls["thumb"],
+        medium_url=urls["medium"],
+        # GIF original conserve a cote de sa version transcodee (si configure)
+        original_url=uploaded.get("original"),
+        # Le type du fichier principal (une video MP4 pour les GIF transcodes en H.264)
+        mime_type=EXTENSION_MIME_TYPES.get(full_extension),
+        order=order,
+        width=metadata["width"],
+        height=metadata["height"],
+        dominant_color=metadata["dominant_color"],
+        blurhash=metadata["blurhash"],
+        captured_at=metadata.get("captured_at") or post.created_at,
+        dhash=metadata.get("dhash"),
+        content_sha256=metadata.get("content_sha256"),
+        duplicate_of_id=duplicate.id if duplicate else None,
+    )
+    encoding = metadata.get("encoding", {})
+    stats = {
+        "compressed_size": compressed_size,
+        "baseline_size": encoding.get("baseline_size", compressed_size),
+        "quality": encoding.get("quality"),
+    }
+    return new_media, stats
+
+
+def find_known_hashes(db: Session, user_id: int, hashes: list[str]) -> dict[str, Media]:
+    """
+    Retourne, pour chaque hash deja stocke, un media portant ce contenu.
+    La recherche est limitee aux groupes de l'utilisateur : la reponse ne
+    revele rien des fichiers des autres groupes.
+    """
+    if not hashes:
+        return {}
+    medias = db.exec(
+        select(Media)
+        .join(GroupMember, GroupMember.group_id == Media.group_id)
+        .where(
+            GroupMember.user_id == user_id,
+            Media.content_sha256.in_(set(hashes)),
+        )
+        .order_by(Media.id)
+    ).all()
+    known = {}
+    for media in medias:
+        known.setdefault(media.content_sha256, media)
+    return known
+
+
+def attach_by_reference(db: Session, post: Post, order: int, source: Media) -> Media:
+    """
+    Cree un media qui reutilise les fichiers (renditions) et metadonnees d'un
+    media existant : aucun octet n'est renvoye ni stocke une seconde fois.
+
+    La source et ses autres references (meme content_sha256) ne sont pas des
+    quasi-doublons : seules les autres photos proches du groupe comptent.
+
+    Raises:
+        HTTPException 409: Quasi-doublon refuse (politique "reject")
+    """
+    duplicate = check_duplicate(
+        db, post.group_id, {"dhash": source.dhash}, f"sha256:{source.content_sha256}", source.content_sha256
+    )
+    new_media = Media(
+        post_id=post.id,
+        group_id=post.group_id,
+        media_url=source.media_url,
+        thumbnail_url=source.thumbnail_url,
+        medium_url=source.medium_url,
+        original_url=source.original_url,
+        mime_type=source.mime_type,
+        order=order,
+        width=source.width,
+        height=source.height,
+        dominant_color=source.dominant_color,
+        blurhash=source.blurhash,
+        captured_at=source.captured_at,
+        dhash=source.dhash,
+        content_sha256=source.content_sha256,
+        duplicate_of_id=duplicate.id if duplicate else None,
+        export_crc32=source.export_crc32,
+        export_size=source.export_size,
+    )
+    saved_media = media_repo.save(db, new_media)
+    if saved_media.dhash:
+        duplicate_index.add(post.group_id, saved_media.id, saved_media.dhash)
+    return saved_media
+
+
+def store_square_renditions(file_content: bytes) -> dict[str, str]:
+    """
+    Genere les renditions carrees d'un avatar ou d'une image de groupe et les
+    envoie au slave.
+
+    Returns:
+        Dict nom de rendition (small, medium, large) -> URL. Une rendition
+        absente (image source trop petite) reutilise la superieure.
+    """
+    renditions = generate_square_renditions(file_content)
+
+    urls = {}
+    previous_url = None
+    for name in sorted(SQUARE_SIZES, key=SQUARE_SIZES.get, reverse=True):
+        if name in renditions:
+            content, extension = renditions[name]
+            previous_url = orchestrator.save_media(io.BytesIO(content), filename=f"{name}{extension}")
+        urls[name] = previous_url
+    return urls
+
+
+def get_adaptive_settings() -> dict | None:
+    """Parametres de l'encodage adaptatif, ou None en mode qualite fixe."""
+    if settings.IMAGE_QUALITY_MODE != "adaptive":
+        return None
+    return {
+        "target_ssim": settings.IMAGE_TARGET_SSIM,
+        "min_quality": settings.IMAGE_MIN_QUALITY,
+        "max_quality": settings.IMAGE_MAX_QUALITY,
+        "budget_ms": settings.IMAGE_ENCODE_BUDGET_MS,
+    }
+
+
+def get_stored_orders(db: Session, post_id: int) -> set[int]:
+    """Retourne les positions deja traitees d'un post (reprise d'un traitement interrompu)."""
+    return set(db.exec(select(Media.order).where(Media.post_id == post_id)).all())
+
+
+def find_near_duplicate(
+    db: Session, group_id: int, dhash: str, exclude_sha256: Optional[str] = None
+) -> Optional[Media]:
+    """
+    Cherche dans le groupe un media dont le hash perceptuel est a au plus
+    MEDIA_DUPLICATE_MAX_DISTANCE bits de dhash (le plus proche en premier),
+    en ignorant ceux dont le contenu a le SHA-256 exclude_sha256.
+    """
+    # Completer l'index avec les medias ajoutes depuis sa construction
+    # (premier appel ou uploads traites par un autre worker)
+    new_hashes = db.exec(
+        select(Media.id, Media.dhash)
+        .join(Post, Media.post_id == Post.id)
+        .where(
+            Post.group_id == group_id,
+            Media.id > duplicate_index.last_media_id(group_id),
+            Media.dhash.is_not(None),
+        )
+    ).all()
+    for media_id, media_hash in new_hashes:
+        duplicate_index.add(group_id, media_id, media_hash)
+
+    for _, media_id in duplicate_index.search(group_id, dhash, settings.MEDIA_DUPLICATE_MAX_DISTANCE):
+        media = db.get(Media, media_id)
+        if media:
+            if exclude_sha256 and media.content_sha256 == exclude_sha256:
+                continue
+            return media
+        # Supprime par un autre processus : reconstruire l'index au prochain appel
+        duplicate_index.invalidate(group_id)
+    return None
+
+
+def delete_medias(db: Session, medias: list[Media]) -> None:
+    """
+    Supprime des medias : fichiers du slave (renditions incluses, sans doublon),
+    entrees du cache, lignes en base et index des quasi-doublons.
+    Les fichiers encore references par d'autres medias (rattaches par
+    reference) sont conserves.
+    """
+    media_urls = {
+        url
+        for media in medias
+        for url in (media.media_url, media.medium_url, media.thumbnail_url, media.original_url)
+        if url
+    }
+    # Les medias rattaches par reference partagent le hash du fichier source
+    hashes = {media.content_sha256 for media in medias if media.content_sha256}
+    if hashes:
+        still_referenced = db.exec(
+            select(Media).where(
+                Media.content_sha256.in_(hashes),
+                Media.id.not_in([media.id for media in medias]),
+            )
+        ).all()
+        media_urls -= {
+            url
+            for media in still_referenced
+            for url in (media.media_url, media.medium_url, media.thumbnail_url, media.original_url)
+        }
+    for media_url in media_urls:
+        # Extraire l'ID du fichier depuis l'URL (format: /media/proxy/{file_id})
+        file_id = media_url.split("/")[-1]
+        try:
+            orchestrator.delete_file_from_slave(file_id)
+            media_cache.invalidate_file(file_id)
+            print(f"  🗑️  Deleted file from slave: {file_id}")
+        except Exception as e:
+            print(f"  ⚠️  Failed to delete file from slave: {file_id} - {e}")
+
+    group_ids = {media.post.group_id for media in medias if media.post}
+    for media in medias:
+        media_repo.delete(db, media.id)
+    for group_id in group_ids:
+        duplicate_index.invalidate(group_id)
@@ -0,0 +1,214 @@
+"""
+Uploads reprenables (inspires de tus) pour les posts multi-photos.
+
+Chaque post en cours d'upload a un repertoire dans le spool (.uploads/{post_id})
+ou chaque fichier "{ordre}_{nom}" est complete par morceaux (PATCH avec
+Upload-Offset) : la taille du fichier sur disque est l'offset courant, un
+client interrompu reprend donc a l'octet pres. Le manifeste (noms et tailles
+annonces) est stocke a cote, dans .uploads/{post_id}.json.
+
+Quand tous les fichiers sont complets, le repertoire est deplace tel quel dans
+le spool de la file de traitement : les morceaux ne sont jamais recopies.
+
+Un upload sans activite depuis RESUMABLE_UPLOAD_TTL_SECONDS est supprime et son
+post passe en echec (balayage a chaque creation d'upload reprenable).
+"""
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Optional
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+from app.entities.post import Post, PostStatus
+from app.services.media_queue import SPOOL_DIR, enqueue_spooled_job
+from app.utils.core.config import settings
+from app.utils.file_validation import ALLOWED_IMAGE_MIMES, MAGIC_BYTES_LENGTH, detect_mime_type
+
+try:
+    import fcntl
+except ImportError:
+    # Windows : pas de verrou de fichier, protection limitee au processus courant
+    fcntl = None
+
+UPLOADS_DIR = SPOOL_DIR / ".uploads"
+
+# Un seul PATCH a la fois par fichier (l'offset doit rester coherent) : verrou
+# flock sur le fichier, valable entre les workers uvicorn d'une meme machine
+# (le spool est local). Sans fcntl, ensemble des fichiers en cours du processus.
+_busy: set[tuple[int, int]] = set()
+
+
+def _upload_dir(post_id: int) -> Path:
+    return UPLOADS_DIR / str(post_id)
+
+
+def _manifest_path(post_id: int) -> Path:
+    return UPLOADS_DIR / f"{post_id}.json"
+
+
+def _load_manifest(post_id: int) -> list[dict]:
+    try:
+        return json.loads(_manifest_path(post_id).read_text())["files"]
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found or already completed")
+
+
+def _file_path(post_id: int, order: int, manifest: list[dict]) -> Path:
+    if not 0 <= order < len(manifest):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return _upload_dir(post_id) / f"{order}_{Path(manifest[order]['filename']).name}"
+
+
+def _try_lock(spooled: BinaryIO, key: tuple[int, int]) -> bool:
+    if fcntl is None:
+        if key in _busy:
+            return False
+        _busy.add(key)
+        return True
+    try:
+        fcntl.flock(spooled.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _unlock(spooled: BinaryIO, key: tuple[int, int]) -> None:
+    if fcntl is None:
+        _busy.discard(key)
+    else:
+        fcntl.flock(spooled.fileno(), fcntl.LOCK_UN)
+
+
+def create_upload(post_id: int, files: list[tuple[str, int]]) -> None:
+    """Cree les fichiers vides et le manifeste d'un upload reprenable."""
+    upload_dir = _upload_dir(post_id)
+    upload_dir.mkdir(parents=True)
+    manifest = [{"filename": filename, "size": size} for filename, size in files]
+    for order in range(len(manifest)):
+        _file_path(post_id, order, manifest).touch()
+    _manifest_path(post_id).write_text(json.dumps({"files": manifest}))
+
+
+def get_offsets(post_id: int) -> list[tuple[int, int]]:
+    """Retourne (offset, taille annoncee) de chaque fichier du post."""
+    manifest = _load_manifest(post_id)
+    return [
+        (_file_path(post_id, order, manifest).stat().st_size, entry["size"])
+        for order, entry in enumerate(manifest)
+    ]
+
+
+def get_filenames(post_id: int) -> list[str]:
+    """Retourne les noms de fichiers annonces, dans l'ordre du post."""
+    return [entry["filename"] for entry in _load_manifest(post_id)]
+
+
+async def append_chunk(post_id: int, order: int, offset: int, chunks: AsyncIterator[bytes]) -> int:
+    """
+    Ajoute un morceau a un fichier a partir de offset et retourne le nouvel offset.
+    Le post est mis en file des que tous ses fichiers sont complets.
+
+    Raises:
+        HTTPException 409: offset different de l'offset courant, ou PATCH deja en cours
+        HTTPException 413: depassement de la taille annoncee
+        HTTPException 415: magic bytes d'un type non autorise
+    """
+    manifest = _load_manifest(post_id)
+    path = _file_path(post_id, order, manifest)
+    length = manifest[order]["size"]
+
+    spooled = await run_in_threadpool(open, path, "ab")
+    try:
+        if not _try_lock(spooled, (post_id, order)):
+            raise HTTPException(status_code=409, detail="Another chunk is being uploaded for this file")
+        try:
+            current = os.fstat(spooled.fileno()).st_size
+            if offset != current:
+                raise HTTPException(status_code=409, detail={"error": "offset_mismatch", "offset": current})
+
+            # Un morceau interrompu (connexion coupee) est conserve : le client
+            # reprend a l'offset retourne par HEAD
+            try:
+                async for chunk in chunks:
+                    current += len(chunk)
+                    if current > length:
+                        raise HTTPException(status_code=413, detail="Chunk exceeds the declared file size")
+                    await run_in_threadpool(spooled.write, chunk)
+            except HTTPException:
+                spooled.truncate(offset)
+                raise
+            spooled.flush()
+
+            # Verifier le type reel des que l'en-tete est complet
+            if offset < MAGIC_BYTES_LENGTH and (current >= MAGIC_BYTES_LENGTH or current == length):
+                with open(path, "rb") as written:
+                    head = written.read(MAGIC_BYTES_LENGTH)
+                if detect_mime_type(head) not in ALLOWED_IMAGE_MIMES:
+                    spooled.truncate(0)
+                    raise HTTPException(status_code=415, detail=f"{manifest[order]['filename']} : type de fichier non autorisé.")
+        finally:
+            _unlock(spooled, (post_id, order))
+    finally:
+        spooled.close()
+
+    # Sans await jusqu'a la mise en file : un seul PATCH peut completer le post
+    if current == length and _manifest_path(post_id).exists():
+        if all(offset == size for offset, size in get_offsets(post_id)):
+            _complete(post_id)
+    return current
+
+
+def _complete(post_id: int) -> None:
+    """Deplace les fichiers complets dans le spool et planifie leur traitement."""
+    _manifest_path(post_id).unlink()
+    enqueue_spooled_job(post_id, _upload_dir(post_id))
+    print(f"  ⏳ Resumable upload of post {post_id} complete, media queued")
+
+
+def discard_upload(post_id: int) -> None:
+    """Supprime un upload reprenable abandonne (post supprime)."""
+    _manifest_path(post_id).unlink(missing_ok=True)
+    shutil.rmtree(_upload_dir(post_id), ignore_errors=True)
+
+
+def _last_activity(post_id: int) -> float:
+    """Date du dernier morceau recu (ou de la creation de l'upload)."""
+    paths = [_manifest_path(post_id), *_upload_dir(post_id).glob("*")]
+    return max(path.stat().st_mtime for path in paths if path.exists())
+
+
+def sweep_abandoned_uploads(db: Session, now: Optional[float] = None) -> int:
+    """
+    Supprime les uploads reprenables sans activite depuis
+    RESUMABLE_UPLOAD_TTL_SECONDS et passe leur post en echec.
+
+    Returns:
+        Nombre d'uploads supprimes
+    """
+    if not UPLOADS_DIR.exists():
+        return 0
+    cutoff = (time.time() if now is None else now) - settings.RESUMABLE_UPLOAD_TTL_SECONDS
+
+    swept = 0
+    for manifest_path in UPLOADS_DIR.glob("*.json"):
+        post_id = int(manifest_path.stem)
+        try:
+            if _last_activity(post_id) >= cutoff:
+                continue
+        except FileNotFoundError:
+            # Upload complete ou supprime entre-temps
+            continue
+
+        discard_upload(post_id)
+        post = db.get(Post, post_id)
+        if post and post.status == PostStatus.PROCESSING:
+            post.status = PostStatus.FAILED
+            post.error_message = "Resumable upload abandoned"
+            db.add(post)
+            db.commit()
+        swept += 1
+        print(f"  🧹 Abandoned resumable upload of post {post_id} removed")
+    return swept
@@ -1,9 +1,10 @@
 import stripe
 from app.utils.core.config import settings
 from app.entities.payment import Payment, PaymentStatus
-from app.repositories.payment_repository import PaymentRepository
-from app.repositories.group_repository import GroupRepository
+from app.repositories.payment_repository import AsyncPaymentRepository, PaymentRepository
+from app.repositories.group_repository import AsyncGroupRepository, GroupRepository
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import HTTPException
 from datetime import datetime
 
@@ -11,6 +12,9 @@ stripe.api_key = settings.STRIPE_SECRET_KEY
 
 payment_repo = PaymentRepository()
 group_repo = GroupRepository()
+# Webhook Stripe (route async)
+async_payment_repo = AsyncPaymentRepository()
+async_group_repo = AsyncGroupRepository()
 
 
 def create_payment_intent(
@@ -52,8 +56,8 @@ def create_payment_intent(
     return payment
 
 
-def handle_payment_success(db: Session, payment_intent_id: str) -> Payment:
-    payment = payment_repo.get_by_payment_intent_id(db, payment_intent_id)
+async def handle_payment_success(db: AsyncSession, payment_intent_id: str) -> Payment:
+    payment = await async_payment_repo.get_by_payment_intent_id(db, payment_intent_id)
     if not payment:
         raise ValueError(f"Payment not found: {payment_intent_id}")
 
@@ -61,11 +65,11 @@ def handle_payment_success(db: Session, payment_intent_id: str) -> Payment:
     if payment.status == PaymentStatus.SUCCEEDED:
         return payment
 
-    group = group_repo.get_by_id(db, payment.group_id)
+    group = await async_group_repo.get_by_id(db, payment.group_id)
     if not group:
         payment.status = PaymentStatus.FAILED
         payment.error_message = "Group not found"
-        db.commit()
+        await db.commit()
         raise ValueError(f"Group {payment.group_id} not found")
 
     # Update quota
@@ -75,14 +79,14 @@ def handle_payment_success(db: Session, payment_intent_id: str) -> Payment:
     payment.status = PaymentStatus.SUCCEEDED
     payment.completed_at = datetime.utcnow()
 
-    db.commit()
+    await db.commit()
     return payment
 
 
-def handle_payment_failed(
-    db: Session, payment_intent_id: str, error: str | None = None
+async def handle_payment_failed(
+    db: AsyncSession, payment_intent_id: str, error: str | None = None
 ) -> Payment:
-    payment = payment_repo.get_by_payment_intent_id(db, payment_intent_id)
+    payment = await async_payment_repo.get_by_payment_intent_id(db, payment_intent_id)
     if not payment:
         raise ValueError(f"Payment not found: {payment_intent_id}")
 
@@ -90,5 +94,5 @@ def handle_payment_failed(
     payment.error_message = error
     payment.completed_at = datetime.utcnow()
 
-    db.commit()
+    await db.commit()
     return payment
@@ -0,0 +1,65 @@
+"""
+URLs de telechargement signees (HMAC) vers le stockage.
+
+Le navigateur telecharge les images directement sur le slave (via nginx sur
+/storage/) : le slave verifie la signature et l'expiration seul, sans appel au
+backend. L'expiration est arrondie a une fenetre (SIGNED_URL_BUCKET_SECONDS)
+pour qu'une meme image garde la meme URL, donc le cache du navigateur, pendant
+toute la fenetre.
+"""
+import base64
+import hashlib
+import hmac
+import math
+import time
+from typing import Annotated, Optional
+from pydantic import PlainSerializer
+from app.utils.core.config import settings
+
+# Prefixe des URLs stockees en base (servies par le proxy du backend)
+PROXY_URL_PREFIX = "/media/proxy/"
+
+
+def sign_message(message: str, key: Optional[str] = None) -> str:
+    """
+    Signature HMAC-SHA256 (base64 url, sans padding) avec la cle partagee avec le slave.
+
+    Raises:
+        RuntimeError: STORAGE_SIGNING_KEY non configuree
+    """
+    key = key or settings.STORAGE_SIGNING_KEY
+    if not key:
+        raise RuntimeError("STORAGE_SIGNING_KEY is not configured")
+    digest = hmac.new(key.encode(), message.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def compute_signature(file_id: str, expires: int, key: Optional[str] = None) -> str:
+    """Signature d'une URL de telechargement : HMAC de "{file_id}:{expires}"."""
+    return sign_message(f"{file_id}:{expires}", key)
+
+
+def sign_file_url(file_id: str, now: Optional[float] = None) -> str:
+    """
+    URL signee de telechargement direct d'un fichier du slave.
+    Valide au moins SIGNED_URL_TTL_SECONDS, au plus une fenetre de plus.
+    """
+    now = time.time() if now is None else now
+    bucket = settings.SIGNED_URL_BUCKET_SECONDS
+    expires = math.ceil((now + settings.SIGNED_URL_TTL_SECONDS) / bucket) * bucket
+    signature = compute_signature(file_id, expires)
+    return f"{settings.STORAGE_PUBLIC_URL}/public/{file_id}?expires={expires}&sig={signature}"
+
+
+def sign_media_url(url: Optional[str]) -> Optional[str]:
+    """
+    Remplace une URL de proxy (/media/proxy/{file_id}) par une URL signee si
+    SIGNED_MEDIA_URLS est active ; les autres URLs sont retournees telles quelles.
+    """
+    if not settings.SIGNED_MEDIA_URLS or not url or not url.startswith(PROXY_URL_PREFIX):
+        return url
+    return sign_file_url(url[len(PROXY_URL_PREFIX):])
+
+
+# URL de media exposee par l'API : stockee en URL de proxy, serialisee signee
+SignedUrl = Annotated[str, PlainSerializer(sign_media_url, return_type=str)]
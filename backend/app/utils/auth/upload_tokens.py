@@ -0,0 +1,111 @@
+"""
+Jetons d'upload direct vers le stockage.
+
+Le backend emet un jeton signe par fichier (post, position, nombre de fichiers,
+taille max) ; le client envoie les octets directement au slave
+(POST /storage/uploads), qui verifie le jeton seul et repond par un recu signe
+(extension detectee, taille, sha256). Le backend n'accepte ensuite que des
+recus qu'il peut verifier avec la meme cle.
+"""
+import base64
+import hmac
+import json
+import time
+import uuid
+from typing import Optional
+from fastapi import HTTPException
+from app.utils.auth.signed_urls import sign_message
+from app.utils.core.config import settings
+
+# Extensions detectees par le slave (magic bytes) acceptees a la finalisation
+RECEIPT_EXTENSIONS = {".jpg", ".png", ".gif", ".webp"}
+
+
+def _encode_payload(payload: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).rstrip(b"=").decode()
+
+
+def require_direct_uploads() -> None:
+    """
+    Verifie que l'upload direct est disponible (cle partagee avec le slave).
+
+    Raises:
+        HTTPException 503: STORAGE_SIGNING_KEY non configuree
+    """
+    if not settings.STORAGE_SIGNING_KEY:
+        raise HTTPException(status_code=503, detail="Direct uploads are disabled (STORAGE_SIGNING_KEY not set)")
+
+
+def create_upload_token(
+    post_id: int, order: int, count: int, filename: str, max_bytes: int, now: Optional[float] = None
+) -> dict:
+    """
+    Cree le jeton d'upload d'un fichier (position order parmi count fichiers).
+
+    Returns:
+        Dict avec upload_id, token, upload_url (public) et expires (timestamp)
+    """
+    now = time.time() if now is None else now
+    payload = {
+        "upload_id": str(uuid.uuid4()),
+        "post_id": post_id,
+        "order": order,
+        "count": count,
+        "filename": filename,
+        "max_bytes": max_bytes,
+        "expires": int(now) + settings.UPLOAD_TOKEN_TTL_SECONDS,
+    }
+    encoded = _encode_payload(payload)
+    return {
+        "upload_id": payload["upload_id"],
+        "token": f"{encoded}.{sign_message(f'upload:{encoded}')}",
+        "upload_url": f"{settings.STORAGE_PUBLIC_URL}/uploads",
+        "expires": payload["expires"],
+    }
+
+
+def receipt_message(receipt: dict) -> str:
+    """Message signe par le slave pour un recu d'upload."""
+    return (
+        f"receipt:{receipt['upload_id']}:{receipt['post_id']}:{receipt['order']}:{receipt['count']}"
+        f":{receipt['extension']}:{receipt['size']}:{receipt['sha256']}"
+    )
+
+
+def verify_upload_receipt(receipt: dict, post_id: int) -> None:
+    """
+    Verifie qu'un recu a bien ete signe par le slave pour ce post, avec une
+    extension acceptee.
+
+    Raises:
+        HTTPException 400: Recu invalide ou emis pour un autre post
+        HTTPException 503: Upload direct non configure
+    """
+    require_direct_uploads()
+    expected = sign_message(receipt_message(receipt))
+    if (
+        not hmac.compare_digest(expected, receipt.get("signature", ""))
+        or receipt["post_id"] != post_id
+        or receipt["extension"] not in RECEIPT_EXTENSIONS
+    ):
+        raise HTTPException(status_code=400, detail=f"Invalid upload receipt: {receipt.get('upload_id')}")
+
+
+def verify_upload_receipts(receipts: list[dict], post_id: int) -> None:
+    """
+    Verifie les recus d'un post : exactement un recu valide par fichier annonce.
+
+    Raises:
+        HTTPException 400: Recu invalide, manquant ou en double
+        HTTPException 503: Upload direct non configure
+    """
+    if not receipts:
+        raise HTTPException(status_code=400, detail="Au moins un fichier est requis.")
+    for receipt in receipts:
+        verify_upload_receipt(receipt, post_id)
+
+    # Le nombre de fichiers est signe dans chaque recu : un sous-ensemble est refuse
+    count = receipts[0]["count"]
+    orders = sorted(receipt["order"] for receipt in receipts)
+    if any(receipt["count"] != count for receipt in receipts) or orders != list(range(count)):
+        raise HTTPException(status_code=400, detail=f"Expected exactly one upload receipt per file ({count})")
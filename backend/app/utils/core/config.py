@@ -1,3 +1,4 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -12,6 +13,13 @@ class Settings(BaseSettings):
     DB_USERNAME: str
     DB_PASSWORD: str
     DB_DATABASE: str
+    DB_ECHO: bool = False  # Log de chaque requete SQL (independant de DEBUG)
+    DB_POOL_SIZE: int = 5  # Connexions gardees ouvertes par moteur (sync et async)
+    DB_MAX_OVERFLOW: int = 10  # Connexions supplementaires temporaires au-dela du pool
+    DB_POOL_TIMEOUT: int = 30  # Attente max d'une connexion libre (secondes) avant erreur
+    DB_POOL_RECYCLE: int = 1800  # Reouverture des connexions plus anciennes (secondes, -1 pour desactiver)
+    DB_POOL_PRE_PING: bool = True  # Verifie chaque connexion avant usage (coupures reseau, redemarrage)
+    DB_PGBOUNCER: bool = False  # Derriere pgbouncer en transaction pooling (sans requetes preparees nommees)
 
     # Configuration de sécurité
     SECRET_KEY: str
@@ -23,8 +31,50 @@ class Settings(BaseSettings):
     STRIPE_PUBLISHABLE_KEY: str = ""
     STRIPE_WEBHOOK_SECRET: str = ""
 
+    # Configuration des medias
+    MEDIA_PROXY_CHUNK_SIZE: int = 64 * 1024  # Taille des blocs relayes par le proxy (memoire bornee par requete)
+    MEDIA_CACHE_MEMORY_BYTES: int = 256 * 1024 * 1024  # Cache memoire des originaux et variantes (256 MB)
+    MEDIA_CACHE_DISK_DIR: str = ""  # Cache disque local (desactive si vide)
+    MEDIA_CACHE_DISK_BYTES: int = 2 * 1024 * 1024 * 1024  # Budget du cache disque (2 GB)
+    MEDIA_CACHE_MAX_OBJECT_BYTES: int = 16 * 1024 * 1024  # Fichiers plus gros : relayes sans mise en cache
+    MEDIA_SPOOL_DIR: str = "./spool"  # Uploads en attente de traitement (volume persistant, /app/spool en Docker)
+    RESUMABLE_UPLOAD_TTL_SECONDS: int = 24 * 3600  # Upload reprenable sans activite au-dela : supprime, post en echec
+    MEDIA_WORKERS: int = 2  # Nombre de workers de traitement des medias
+    EXPORT_PREFETCH_FILES: int = 4  # Fichiers lus en parallele en avance lors d'un export ZIP
+    EXPORT_BUFFER_CHUNKS: int = 16  # Blocs bufferises par fichier prelu (memoire bornee par export)
+    IMPORT_MAX_ARCHIVE_BYTES: int = 2 * 1024 * 1024 * 1024  # Taille max d'une archive d'import (zip/tar)
+    IMPORT_WORKERS: int = 4  # Threads de validation et compression d'un import
+    IMPORT_BATCH_SIZE: int = 20  # Photos envoyees au slave et inserees en base par lot
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 3600  # Duree de conservation des reponses rejouables
+    IDEMPOTENCY_LOCK_SECONDS: int = 300  # Au-dela, une requete "en cours" est consideree abandonnee
+    GIF_TRANSCODE_FORMAT: str = "webp"  # GIF animes -> "webp", "mp4" (si ffmpeg present) ou "none"
+    GIF_KEEP_ORIGINAL: bool = False  # Conserver aussi le GIF original apres transcodage
+    IMAGE_QUALITY_MODE: str = "fixed"  # "fixed" (qualite 85) ou "adaptive" (SSIM cible)
+    IMAGE_TARGET_SSIM: float = 0.985
+    IMAGE_MIN_QUALITY: int = 60
+    IMAGE_MAX_QUALITY: int = 92
+    IMAGE_ENCODE_BUDGET_MS: int = 400  # Budget CPU de la recherche de qualite par image
+    IMAGE_PROGRESSIVE_JPEG: bool = True
+    IMAGE_ENGINE: str = "pillow"  # "pillow" ou "vips" (shrink-on-load, necessite l'extra "vips" : pyvips)
+    MEDIA_DUPLICATE_POLICY: str = "flag"  # Quasi-doublons dans un groupe : "off", "flag" ou "reject" (409)
+    MEDIA_DUPLICATE_MAX_DISTANCE: int = 6  # Distance de Hamming max entre dHash (sur 64 bits)
+    SIGNED_MEDIA_URLS: bool = False  # URLs signees vers le stockage au lieu du proxy /media/proxy
+    STORAGE_PUBLIC_URL: str = "/storage"  # Prefixe public du slave (location nginx)
+    STORAGE_SIGNING_KEY: str = ""  # Cle HMAC partagee avec le slave (URLs signees et upload direct desactives si vide)
+    SIGNED_URL_TTL_SECONDS: int = 3600
+    SIGNED_URL_BUCKET_SECONDS: int = 900  # Arrondi de l'expiration (URLs stables, cache navigateur)
+    UPLOAD_TOKEN_TTL_SECONDS: int = 900  # Validite des jetons d'upload direct vers le slave
+    MEDIA_NEGOTIATED_FORMATS: list[str] = ["avif", "webp"]  # Formats servis selon Accept ([] pour desactiver)
+
     class Config:
         env_file = ".env"
 
+    @model_validator(mode="after")
+    def check_storage_signing_key(self) -> "Settings":
+        # Pas de repli sur SECRET_KEY : le slave ne doit pas detenir la cle des JWT
+        if self.SIGNED_MEDIA_URLS and not self.STORAGE_SIGNING_KEY:
+            raise ValueError("STORAGE_SIGNING_KEY is required when SIGNED_MEDIA_URLS is enabled")
+        return self
+
 
 settings = Settings()
@@ -1,13 +1,165 @@
+import threading
+import time
+from uuid import uuid4
+from sqlalchemy import Engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
 from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.utils.core.config import settings
 
 # Construction de l'URL de connexion à partir des variables d'environnement
 DATABASE_URL = f"postgresql://{settings.DB_USERNAME}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_DATABASE}"
+# Même base, pilote asyncpg pour les routes async def
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{settings.DB_USERNAME}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_DATABASE}"
 
-engine = create_engine(DATABASE_URL, echo=settings.DEBUG)
+
+class PoolMetrics:
+    """
+    Utilisation d'un pool de connexions, mesuree par les evenements publics du
+    pool (checkout, checkin, connect) : duree de detention des connexions, pic
+    d'occupation, checkouts ayant pris la derniere connexion libre (les
+    suivants attendent), ouvertures de connexions et timeouts.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.saturated = 0  # Checkouts laissant le pool plein (pool_size + max_overflow)
+        self.timeouts = 0
+        self.peak_checked_out = 0
+        self.total_hold = 0.0
+        self.max_hold = 0.0
+        self.checkins = 0
+        self.connections_opened = 0
+        self.total_connect = 0.0
+        self._lock = threading.Lock()
+
+    def attach(self, engine: Engine) -> None:
+        """Ecoute les evenements du pool de engine (conserves par engine.dispose())."""
+        capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+
+        @event.listens_for(engine, "do_connect")
+        def before_connect(dialect, connection_record, cargs, cparams):
+            connection_record.info["connect_started"] = time.perf_counter()
+
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            started = connection_record.info.pop("connect_started", None)
+            with self._lock:
+                self.connections_opened += 1
+                if started is not None:
+                    self.total_connect += time.perf_counter() - started
+
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            connection_record.info["checked_out_at"] = time.perf_counter()
+            checked_out = engine.pool.checkedout()
+            with self._lock:
+                self.checkouts += 1
+                self.peak_checked_out = max(self.peak_checked_out, checked_out)
+                if checked_out >= capacity:
+                    self.saturated += 1
+
+        @event.listens_for(engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            checked_out_at = connection_record.info.pop("checked_out_at", None)
+            if checked_out_at is None:
+                return
+            held = time.perf_counter() - checked_out_at
+            with self._lock:
+                self.checkins += 1
+                self.total_hold += held
+                self.max_hold = max(self.max_hold, held)
+
+    def record_timeout(self, pool: Pool) -> None:
+        with self._lock:
+            self.timeouts += 1
+        print(f"⚠️  Database pool exhausted: no connection after {settings.DB_POOL_TIMEOUT}s ({pool.status()})")
+
+    def stats(self, pool: Pool) -> dict:
+        with self._lock:
+            return {
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                # overflow() part de -pool_size tant que le pool n'est pas plein
+                "overflow": max(pool.overflow(), 0),
+                "peak_checked_out": self.peak_checked_out,
+                "checkouts": self.checkouts,
+                "saturated": self.saturated,
+                "timeouts": self.timeouts,
+                "avg_hold_ms": round(self.total_hold / self.checkins * 1000, 3) if self.checkins else None,
+                "max_hold_ms": round(self.max_hold * 1000, 3),
+                "connections_opened": self.connections_opened,
+                "avg_connect_ms": (
+                    round(self.total_connect / self.connections_opened * 1000, 3) if self.connections_opened else None
+                ),
+            }
+
+
+def _engine_options(pool_class: type[QueuePool]) -> dict:
+    return {
+        "echo": settings.DB_ECHO,
+        "poolclass": pool_class,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+# En transaction pooling, pgbouncer peut servir deux transactions d'une meme
+# connexion cliente par deux connexions serveur : asyncpg ne doit ni garder de
+# cache de requetes preparees ni reutiliser leurs noms (psycopg2 n'en prepare pas)
+PGBOUNCER_ASYNC_CONNECT_ARGS = {
+    "statement_cache_size": 0,
+    "prepared_statement_cache_size": 0,
+    "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+}
+
+sync_pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
+engine = create_engine(DATABASE_URL, **_engine_options(QueuePool))
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    connect_args=PGBOUNCER_ASYNC_CONNECT_ARGS if settings.DB_PGBOUNCER else {},
+    **_engine_options(AsyncAdaptedQueuePool),
+)
+sync_pool_metrics.attach(engine)
+async_pool_metrics.attach(async_engine.sync_engine)
+
+# Pas d'expiration après commit : en async, un attribut expiré ne peut pas
+# être rechargé implicitement (les objets retournés par les routes restent lisibles)
+async_session_maker = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def get_pool_stats() -> dict:
+    """Occupation et utilisation des pools de connexions (sync et async)."""
+    return {
+        "sync": sync_pool_metrics.stats(engine.pool),
+        "async": async_pool_metrics.stats(async_engine.sync_engine.pool),
+        "pgbouncer": settings.DB_PGBOUNCER,
+    }
 
 
 def get_db():
     """Dependency to get database session"""
     with Session(engine) as session:
-        yield session
+        try:
+            yield session
+        except PoolTimeoutError:
+            sync_pool_metrics.record_timeout(engine.pool)
+            raise
+
+
+async def get_async_db():
+    """Dependency to get async database session (routes async def)"""
+    async with async_session_maker() as session:
+        try:
+            yield session
+        except PoolTimeoutError:
+            async_pool_metrics.record_timeout(async_engine.sync_engine.pool)
+            raise
@@ -0,0 +1,97 @@
+"""
+Mise a niveau du schema des bases deja deployees.
+
+SQLModel.metadata.create_all cree les tables manquantes mais n'ajoute jamais
+de colonne a une table existante. Chaque colonne ajoutee a une entite
+existante est donc declaree ici, sous forme de DDL idempotent (IF NOT EXISTS),
+et executee au demarrage juste apres create_all. Les etapes sont appliquees
+dans l'ordre : ajouter les nouvelles a la fin de MIGRATIONS.
+"""
+from sqlalchemy import Engine, text
+
+MIGRATIONS: list[tuple[str, list[str]]] = [
+    (
+        "media renditions",
+        [
+            "ALTER TABLE media ADD COLUMN IF NOT EXISTS thumbnail_url VARCHAR",
+            "ALTER TABLE media ADD COLUMN IF NOT EXISTS medium_url VARCHAR",
+        ],
+    ),
+    (
+        "post processing status",
+        [
+            "DO $$ BEGIN CREATE TYPE poststatus AS ENUM ('PROCESSING', 'READY', 'FAILED'); EXCEPTION WHEN duplicate_object THEN NULL; END $$",
+            "ALTER TABLE post ADD COLUMN IF NOT EXISTS status poststatus NOT NULL DEFAULT 'READY'",
+            "ALTER TABLE post ADD COLUMN IF NOT EXISTS error_message VARCHAR",
+        ],
+    ),
+    (
+        "media layout placeholders",
+        [
+            "ALTER TABLE media ADD COLUMN IF NOT EXISTS width INTEGER",
+            "ALTER TABLE media ADD COLUMN IF NOT EXISTS height INTEGER",
+            "ALTER TABLE media ADD COLUMN IF NOT EXISTS dominant_color VARCHAR(7)",
+            "ALTER TABLE media ADD COLUMN IF NOT EXISTS blurhash VARCHAR",
+        ],
+    ),
+    (
+        "animated GIF transcoding",
+        [
+            "ALTER TABLE media ADD COLUMN IF NOT EXISTS original_url VARCHAR",
+            "ALTER TABLE media ADD COLUMN IF NOT EXISTS mime_type VARCHAR",
+        ],
+    ),
+    (
+        "near-duplicate detection",
+        [
+            "ALTER TABLE media ADD COLUMN IF NOT EXISTS dhash VARCHAR(16)",
+            "CREATE INDEX IF NOT EXISTS ix_media_dhash ON media (dhash)",
+            "ALTER TABLE media ADD COLUMN IF NOT EXISTS duplicate_of_id INTEGER REFERENCES media (id) ON DELETE SET NULL",
+        ],
+    ),
+    (
+        "square avatar and group cover renditions",
+        [
+            'ALTER TABLE "user" ADD COLUMN IF NOT EXISTS avatar_small_url VARCHAR',
+            'ALTER TABLE "user" ADD COLUMN IF NOT EXISTS avatar_medium_url VARCHAR',
+            'ALTER TABLE "group" ADD COLUMN IF NOT EXISTS image_small_url VARCHAR',
+            'ALTER TABLE "group" ADD COLUMN IF NOT EXISTS image_medium_url VARCHAR',
+        ],
+    ),
+    (
+        "media capture date and denormalised group",
+        [
+            'ALTER TABLE media ADD COLUMN IF NOT EXISTS group_id INTEGER REFERENCES "group" (id)',
+            "ALTER TABLE media ADD COLUMN IF NOT EXISTS captured_at TIMESTAMP",
+            # Medias anterieurs : groupe du post, date du post (l'EXIF n'etait pas conserve)
+            "UPDATE media SET group_id = post.group_id, captured_at = COALESCE(media.captured_at, post.created_at) FROM post WHERE media.post_id = post.id AND (media.group_id IS NULL OR media.captured_at IS NULL)",
+            "DROP INDEX IF EXISTS ix_media_group_id_captured_at",
+            "CREATE INDEX IF NOT EXISTS ix_media_group_captured_desc ON media (group_id, captured_at DESC NULLS LAST, id DESC)",
+        ],
+    ),
+    (
+        "content hashes (upload-if-absent)",
+        [
+            "ALTER TABLE media ADD COLUMN IF NOT EXISTS content_sha256 VARCHAR(64)",
+            "CREATE INDEX IF NOT EXISTS ix_media_content_sha256 ON media (content_sha256)",
+        ],
+    ),
+    (
+        "export checksums (resumable ZIP export)",
+        [
+            "ALTER TABLE media ADD COLUMN IF NOT EXISTS export_crc32 BIGINT",
+            "ALTER TABLE media ADD COLUMN IF NOT EXISTS export_size BIGINT",
+        ],
+    ),
+]
+
+
+def run_migrations(engine: Engine) -> None:
+    """Applique les etapes de MIGRATIONS (PostgreSQL uniquement)."""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as connection:
+        for _, statements in MIGRATIONS:
+            for statement in statements:
+                connection.execute(text(statement))
+    print(f"✅ Database schema up to date ({len(MIGRATIONS)} migration steps)")
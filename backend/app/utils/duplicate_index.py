@@ -0,0 +1,104 @@
+"""
+Index en memoire des hash perceptuels pour la detection des quasi-doublons.
+Un BK-tree par groupe permet de retrouver les hash proches (distance de Hamming)
+sans comparer le nouvel upload a toutes les photos du groupe.
+"""
+import threading
+from typing import Optional
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Nombre de bits differents entre deux hash."""
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """
+    Arbre de Burkhard-Keller sur la distance de Hamming. Chaque noeud range ses
+    enfants par distance : une recherche a distance d ne visite que les enfants
+    dont la distance au noeud est dans [distance - d, distance + d].
+    """
+
+    def __init__(self):
+        # Noeud : (hash, items, enfants par distance)
+        self._root: Optional[tuple[int, list, dict]] = None
+        self.size = 0
+
+    def add(self, value: int, item) -> None:
+        self.size += 1
+        if self._root is None:
+            self._root = (value, [item], {})
+            return
+
+        node = self._root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                # Hash identique : un seul noeud pour plusieurs items
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (value, [item], {})
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> list[tuple[int, object]]:
+        """Retourne les (distance, item) a au plus max_distance, du plus proche au plus eloigne."""
+        if self._root is None:
+            return []
+
+        results = []
+        candidates = [self._root]
+        while candidates:
+            node_value, items, children = candidates.pop()
+            distance = hamming_distance(value, node_value)
+            if distance <= max_distance:
+                results.extend((distance, item) for item in items)
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    candidates.append(child)
+
+        results.sort(key=lambda result: result[0])
+        return results
+
+
+class DuplicateIndex:
+    """
+    BK-trees des medias par groupe, construits a la demande. Chaque arbre retient
+    le plus grand id de media indexe pour etre complete de facon incrementale
+    avec les medias ajoutes par d'autres workers. Un arbre ne supportant pas la
+    suppression, il est invalide (puis reconstruit) quand un media est supprime.
+    """
+
+    def __init__(self):
+        self._groups: dict[int, tuple[BKTree, int]] = {}
+        self._lock = threading.Lock()
+
+    def last_media_id(self, group_id: int) -> int:
+        """Plus grand id de media indexe pour le groupe (0 si l'index est vide)."""
+        with self._lock:
+            entry = self._groups.get(group_id)
+            return entry[1] if entry else 0
+
+    def add(self, group_id: int, media_id: int, dhash: str) -> None:
+        with self._lock:
+            tree, last_id = self._groups.get(group_id) or (BKTree(), 0)
+            tree.add(int(dhash, 16), media_id)
+            self._groups[group_id] = (tree, max(last_id, media_id))
+
+    def search(self, group_id: int, dhash: str, max_distance: int) -> list[tuple[int, int]]:
+        """Retourne les (distance, media_id) proches du hash dans le groupe."""
+        with self._lock:
+            entry = self._groups.get(group_id)
+            if entry is None:
+                return []
+            return entry[0].search(int(dhash, 16), max_distance)
+
+    def invalidate(self, group_id: int) -> None:
+        with self._lock:
+            self._groups.pop(group_id, None)
+
+
+# Index partage par toutes les requetes et workers du process
+duplicate_index = DuplicateIndex()
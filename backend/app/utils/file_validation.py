@@ -2,8 +2,10 @@
 Utilitaires de validation de fichiers uploadés.
 Vérifie la taille, le type MIME réel (magic bytes), et les extensions autorisées.
 """
-from fastapi import UploadFile, HTTPException
-from typing import Optional
+from fastapi import UploadFile, HTTPException, Request, Response
+from fastapi.routing import APIRoute
+from python_multipart.multipart import MultipartParser, parse_options_header
+from typing import Callable, Optional
 
 # Import optionnel de python-magic (fallback si non disponible)
 try:
@@ -27,6 +29,15 @@ ALLOWED_IMAGE_MIMES = {
 # Extensions de fichiers autorisées
 ALLOWED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
 
+# Nombre maximal de fichiers par requête multipart (posts)
+MAX_FILES = 10
+
+# Marge accordée aux champs texte et en-têtes multipart au-delà des fichiers
+MULTIPART_OVERHEAD = 1024 * 1024  # 1 MB
+
+# Nombre d'octets lus en tête de fichier pour détecter le type MIME
+MAGIC_BYTES_LENGTH = 16
+
 
 def validate_image_file(
     file: UploadFile,
@@ -116,7 +127,7 @@ def detect_mime_type(file_content: bytes) -> str:
 def validate_media_files(
     files: list[UploadFile],
     max_size_per_file: int = MAX_UPLOAD_SIZE,
-    max_files: int = 10,
+    max_files: int = MAX_FILES,
 ) -> None:
     """
     Valide une liste de fichiers média pour les posts.
@@ -147,3 +158,202 @@ def validate_media_files(
                 status_code=e.status_code,
                 detail=f"{filename} (#{idx + 1}) : {e.detail}",
             )
+
+
+def validate_declared_files(
+    files: list[tuple[str, int]],
+    max_size_per_file: int = MAX_UPLOAD_SIZE,
+    max_files: int = MAX_FILES,
+) -> None:
+    """
+    Valide les fichiers annonces pour un upload direct vers le stockage
+    (nom et taille), avant d'emettre les jetons d'upload. Le type reel est
+    verifie par le slave sur les magic bytes.
+
+    Args:
+        files: Liste (nom de fichier, taille en octets)
+
+    Raises:
+        HTTPException: Si les fichiers annonces sont invalides
+    """
+    if not files:
+        raise HTTPException(status_code=400, detail="Au moins un fichier est requis.")
+
+    if len(files) > max_files:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Trop de fichiers. Maximum autorise: {max_files}",
+        )
+
+    for idx, (filename, size) in enumerate(files):
+        extension = "." + filename.split(".")[-1].lower() if "." in filename else ""
+        if extension not in ALLOWED_IMAGE_EXTENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{filename} (#{idx + 1}) : extension non autorisée. Extensions acceptées: {', '.join(ALLOWED_IMAGE_EXTENSIONS)}",
+            )
+        if size <= 0 or size > max_size_per_file:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{filename} (#{idx + 1}) : taille invalide ({size} octets / {max_size_per_file // (1024 * 1024)} MB max)",
+            )
+
+
+class StreamingUploadValidator:
+    """
+    Valide un corps multipart au fil de l'eau, pendant sa réception.
+
+    Les vérifications (nombre de fichiers, extension, magic bytes sur le premier
+    chunk, taille) sont faites dès que les octets concernés arrivent : un upload
+    invalide est rejeté sans être bufferisé ni écrit sur disque en entier.
+    """
+
+    def __init__(
+        self,
+        boundary: bytes,
+        max_size: int = MAX_UPLOAD_SIZE,
+        max_files: int = MAX_FILES,
+        allowed_mimes: Optional[dict] = None,
+    ):
+        self.max_size = max_size
+        self.max_files = max_files
+        self.allowed_mimes = allowed_mimes if allowed_mimes is not None else ALLOWED_IMAGE_MIMES
+        self.file_count = 0
+        self._parser = MultipartParser(
+            boundary,
+            callbacks={
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            },
+        )
+
+    def feed(self, chunk: bytes) -> None:
+        """Analyse un chunk du corps. Lève HTTPException dès qu'une règle est violée."""
+        if chunk:
+            self._parser.write(chunk)
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._filename = None
+        self._size = 0
+        self._head = b""
+        self._checked = False
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition"))
+        if b"filename" not in options:
+            # Champ texte (group_id, caption...) : pas de validation ici
+            return
+
+        self._filename = options[b"filename"].decode("utf-8", "replace")
+        self.file_count += 1
+        if self.file_count > self.max_files:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Trop de fichiers. Maximum autorise: {self.max_files}",
+            )
+
+        if not self._filename:
+            raise HTTPException(status_code=400, detail="Le nom de fichier est requis.")
+
+        extension = "." + self._filename.split(".")[-1].lower() if "." in self._filename else ""
+        if extension not in ALLOWED_IMAGE_EXTENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{self._filename} : extension non autorisée. Extensions acceptées: {', '.join(ALLOWED_IMAGE_EXTENSIONS)}",
+            )
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._filename is None:
+            return
+
+        self._size += end - start
+        if self._size > self.max_size:
+            max_mb = self.max_size / (1024 * 1024)
+            raise HTTPException(
+                status_code=400,
+                detail=f"{self._filename} trop volumineux (plus de {max_mb:.0f} MB)",
+            )
+
+        if not self._checked:
+            self._head += data[start:min(end, start + MAGIC_BYTES_LENGTH)]
+            if len(self._head) >= MAGIC_BYTES_LENGTH:
+                self._check_magic_bytes()
+
+    def _on_part_end(self) -> None:
+        if self._filename is not None and not self._checked:
+            self._check_magic_bytes()
+
+    def _check_magic_bytes(self) -> None:
+        self._checked = True
+        if not self._head:
+            raise HTTPException(status_code=400, detail=f"{self._filename} : le fichier est vide.")
+
+        if detect_mime_type(self._head) not in self.allowed_mimes:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{self._filename} : type de fichier non autorisé. Types acceptés: JPEG, PNG, GIF, WebP",
+            )
+
+
+class StreamingUploadRoute(APIRoute):
+    """
+    Route FastAPI qui valide les uploads multipart pendant leur réception,
+    avant que le corps ne soit parsé et spoolé par FastAPI.
+
+    Usage: APIRouter(route_class=StreamingUploadRoute.with_limits(max_files=1))
+    """
+
+    max_size: int = MAX_UPLOAD_SIZE
+    max_files: int = MAX_FILES
+
+    @classmethod
+    def with_limits(
+        cls, max_size: int = MAX_UPLOAD_SIZE, max_files: int = MAX_FILES
+    ) -> type["StreamingUploadRoute"]:
+        return type(cls.__name__, (cls,), {"max_size": max_size, "max_files": max_files})
+
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+        max_size, max_files = self.max_size, self.max_files
+
+        async def streaming_validation_route_handler(request: Request) -> Response:
+            content_type, options = parse_options_header(request.headers.get("content-type"))
+            if content_type != b"multipart/form-data" or b"boundary" not in options:
+                return await original_route_handler(request)
+
+            # Rejet immédiat si le corps annoncé dépasse ce qui peut être accepté
+            content_length = request.headers.get("content-length", "")
+            if content_length.isdigit() and int(content_length) > max_files * max_size + MULTIPART_OVERHEAD:
+                raise HTTPException(status_code=413, detail="Requête trop volumineuse.")
+
+            validator = StreamingUploadValidator(options[b"boundary"], max_size=max_size, max_files=max_files)
+            receive = request.receive
+
+            async def validating_receive():
+                message = await receive()
+                if message["type"] == "http.request":
+                    validator.feed(message.get("body", b""))
+                return message
+
+            return await original_route_handler(Request(request.scope, validating_receive))
+
+        return streaming_validation_route_handler
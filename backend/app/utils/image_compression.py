@@ -2,10 +2,19 @@
 Utilitaires de compression d'images.
 Compresse les images avant stockage pour optimiser l'espace et les performances.
 """
-from PIL import Image
+from PIL import ExifTags, Image, ImageMath, ImageOps, ImageSequence, features
 from fastapi import UploadFile
 import io
-from typing import BinaryIO
+import base64
+import math
+import shutil
+import subprocess
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from array import array
+from datetime import datetime
+from typing import BinaryIO, Optional
 
 
 # Configuration de compression
@@ -14,46 +23,86 @@ JPEG_QUALITY = 85  # Qualité JPEG (0-100)
 WEBP_QUALITY = 85  # Qualité WebP (0-100)
 
 
-def compress_image(
-    file_content: bytes,
-    max_dimension: int = MAX_DIMENSION,
-    quality: int = JPEG_QUALITY,
-    output_format: str = "JPEG",
-) -> tuple[bytes, str]:
+# Renditions generees a l'upload (nom -> dimension maximale), de la plus petite a la plus grande
+RENDITION_SIZES = {
+    "thumb": 256,
+    "medium": 1024,
+    "full": MAX_DIMENSION,
+}
+
+# Renditions carrees des avatars et images de groupe (nom -> cote en pixels)
+SQUARE_SIZES = {
+    "small": 96,
+    "medium": 256,
+    "large": 512,
+}
+
+
+# Tags EXIF de la date de prise de vue (IFD Exif)
+EXIF_DATETIME_ORIGINAL = 0x9003
+EXIF_OFFSET_TIME_ORIGINAL = 0x9011
+
+
+def parse_exif_datetime(value: Optional[str], offset: Optional[str] = None) -> Optional[datetime]:
     """
-    Compresse une image et la redimensionne si necessaire.
+    Convertit une date EXIF ("AAAA:MM:JJ HH:MM:SS") en datetime naif.
 
-    Args:
-        file_content: Contenu brut de l'image
-        max_dimension: Dimension maximale (largeur ou hauteur)
-        quality: Qualite de compression (0-100)
-        output_format: Format de sortie (JPEG, WEBP, PNG)
+    Sans decalage horaire (cas le plus courant), la date reste l'heure locale
+    de la prise de vue ; avec OffsetTimeOriginal ("+02:00"), elle est ramenee
+    en UTC. Retourne None si la date est absente ou invalide (appareil non
+    regle : "0000:00:00 00:00:00").
+    """
+    if not value:
+        return None
+    try:
+        captured_at = datetime.strptime(value.strip("\x00 ")[:19], "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return None
 
-    Returns:
-        Tuple (contenu compresse, extension du fichier)
+    if offset:
+        try:
+            shift = datetime.strptime(offset.strip("\x00 "), "%z").utcoffset()
+            captured_at -= shift
+        except ValueError:
+            pass
+    return captured_at
+
+
+def _open_image(file_content: bytes) -> Image.Image:
+    """
+    Decode une image et applique l'orientation EXIF si presente.
+    La date de prise de vue EXIF est lue dans la meme passe et exposee dans
+    img.info["captured_at"] (None si absente).
     """
     img = Image.open(io.BytesIO(file_content))
+    captured_at = None
 
     # Conserver l'orientation EXIF si presente
     try:
-        from PIL import ExifTags
-        for orientation in ExifTags.TAGS.keys():
-            if ExifTags.TAGS[orientation] == 'Orientation':
-                break
-
-        exif = img._getexif()
-        if exif is not None:
-            orientation_value = exif.get(orientation)
-            if orientation_value == 3:
-                img = img.rotate(180, expand=True)
-            elif orientation_value == 6:
-                img = img.rotate(270, expand=True)
-            elif orientation_value == 8:
-                img = img.rotate(90, expand=True)
-    except (AttributeError, KeyError, IndexError):
+        exif = img.getexif()
+        exif_ifd = exif.get_ifd(ExifTags.IFD.Exif)
+        captured_at = parse_exif_datetime(
+            exif_ifd.get(EXIF_DATETIME_ORIGINAL), exif_ifd.get(EXIF_OFFSET_TIME_ORIGINAL)
+        )
+
+        orientation_value = exif.get(ExifTags.Base.Orientation)
+        if orientation_value == 3:
+            img = img.rotate(180, expand=True)
+        elif orientation_value == 6:
+            img = img.rotate(270, expand=True)
+        elif orientation_value == 8:
+            img = img.rotate(90, expand=True)
+    except (AttributeError, KeyError, IndexError, TypeError):
         pass
 
-    # Convertir RGBA/LA/P en RGB pour JPEG
+    img.info["captured_at"] = captured_at
+    return img
+
+
+def _prepare_for_format(img: Image.Image, output_format: str) -> Image.Image:
+    """
+    Convertit RGBA/LA/P en RGB sur fond blanc pour les formats sans transparence.
+    """
     if output_format == "JPEG" and img.mode in ('RGBA', 'LA', 'P'):
         background = Image.new('RGB', img.size, (255, 255, 255))
         if img.mode == 'RGBA':
@@ -65,15 +114,22 @@ def compress_image(
             background.paste(img)
         img = background
 
-    # Redimensionner si l'image depasse la dimension maximale
-    if max(img.size) > max_dimension:
-        img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    return img
 
-    # Compresser
+
+def _encode_image(
+    img: Image.Image, output_format: str, quality: int, progressive: bool = False
+) -> tuple[bytes, str]:
+    """
+    Encode une image deja preparee.
+
+    Returns:
+        Tuple (contenu encode, extension du fichier)
+    """
     output = io.BytesIO()
 
     if output_format == "JPEG":
-        img.save(output, format='JPEG', quality=quality, optimize=True)
+        img.save(output, format='JPEG', quality=quality, optimize=True, progressive=progressive)
         extension = ".jpg"
     elif output_format == "WEBP":
         img.save(output, format='WEBP', quality=quality)
@@ -81,6 +137,9 @@ def compress_image(
     elif output_format == "PNG":
         img.save(output, format='PNG', optimize=True)
         extension = ".png"
+    elif output_format == "AVIF":
+        img.save(output, format='AVIF', quality=quality)
+        extension = ".avif"
     else:
         img.save(output, format='JPEG', quality=quality, optimize=True)
         extension = ".jpg"
@@ -88,49 +147,634 @@ def compress_image(
     return output.getvalue(), extension
 
 
-def compress_upload_file(
-    file: UploadFile,
+# Encodage adaptatif : qualite recherchee pour atteindre une SSIM cible
+TARGET_SSIM = 0.985
+MIN_ADAPTIVE_QUALITY = 60
+MAX_ADAPTIVE_QUALITY = 92
+ADAPTIVE_BUDGET_MS = 400  # Temps CPU maximal consacre a la recherche
+ADAPTIVE_SEARCH_SIZE = 512  # La recherche encode une version reduite, plus rapide
+SSIM_SAMPLE_SIZE = 256  # La SSIM est calculee sur une version reduite en niveaux de gris
+SSIM_BLOCK = 8
+
+
+def compute_ssim(reference: Image.Image, candidate: Image.Image) -> float:
+    """
+    Calcule la SSIM moyenne (blocs 8x8, niveaux de gris) entre deux images de meme taille.
+
+    Les moyennes par bloc sont obtenues en reduisant des images flottantes
+    d'un facteur SSIM_BLOCK (filtre BOX) : tout le calcul reste dans Pillow.
+
+    Returns:
+        Score entre -1 et 1 (1 = identiques)
+    """
+    a = reference.convert("L")
+    b = candidate.convert("L")
+    if max(a.size) > SSIM_SAMPLE_SIZE:
+        a.thumbnail((SSIM_SAMPLE_SIZE, SSIM_SAMPLE_SIZE), Image.Resampling.BOX)
+        b = b.resize(a.size, Image.Resampling.BOX)
+
+    columns, rows = a.width // SSIM_BLOCK, a.height // SSIM_BLOCK
+    if not columns or not rows:
+        return 1.0
+    box = (0, 0, columns * SSIM_BLOCK, rows * SSIM_BLOCK)
+    a = a.crop(box).convert("F")
+    b = b.crop(box).convert("F")
+
+    def block_mean(image: Image.Image) -> Image.Image:
+        return image.resize((columns, rows), Image.Resampling.BOX)
+
+    mean_a, mean_b = block_mean(a), block_mean(b)
+    mean_aa = block_mean(ImageMath.lambda_eval(lambda args: args["a"] * args["a"], a=a))
+    mean_bb = block_mean(ImageMath.lambda_eval(lambda args: args["b"] * args["b"], b=b))
+    mean_ab = block_mean(ImageMath.lambda_eval(lambda args: args["a"] * args["b"], a=a, b=b))
+
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    ssim_map = ImageMath.lambda_eval(
+        lambda args: (
+            (2 * args["ma"] * args["mb"] + c1)
+            * (2 * (args["mab"] - args["ma"] * args["mb"]) + c2)
+        ) / (
+            (args["ma"] * args["ma"] + args["mb"] * args["mb"] + c1)
+            * (args["maa"] - args["ma"] * args["ma"] + args["mbb"] - args["mb"] * args["mb"] + c2)
+        ),
+        ma=mean_a, mb=mean_b, maa=mean_aa, mbb=mean_bb, mab=mean_ab,
+    )
+    # ImageStat ne gere pas le mode "F" : la carte (une valeur par bloc) est lue directement
+    scores = array("f", ssim_map.tobytes())
+    return sum(scores) / len(scores)
+
+
+def encode_adaptive(
+    img: Image.Image,
+    output_format: str,
+    target_ssim: float = TARGET_SSIM,
+    min_quality: int = MIN_ADAPTIVE_QUALITY,
+    max_quality: int = MAX_ADAPTIVE_QUALITY,
+    budget_ms: int = ADAPTIVE_BUDGET_MS,
+    progressive: bool = True,
+) -> tuple[bytes, str, int, float]:
+    """
+    Recherche par dichotomie la plus basse qualite atteignant la SSIM cible,
+    dans la limite d'un budget de temps. La recherche se fait sur une copie
+    reduite de l'image ; seule la qualite retenue est appliquee a l'image
+    complete. Un essai n'est lance que s'il peut se terminer avant l'echeance
+    (duree estimee d'apres l'essai precedent). Sans resultat satisfaisant dans
+    le budget, la qualite maximale est utilisee.
+
+    Returns:
+        Tuple (contenu encode, extension, qualite retenue, SSIM obtenue sur la copie reduite)
+    """
+    if output_format not in ("JPEG", "WEBP"):
+        content, extension = _encode_image(img, output_format, max_quality, progressive)
+        return content, extension, max_quality, 1.0
+
+    deadline = time.perf_counter() + budget_ms / 1000
+    sample = img.copy()
+    sample.thumbnail((ADAPTIVE_SEARCH_SIZE, ADAPTIVE_SEARCH_SIZE), Image.Resampling.BOX)
+
+    def measure(quality: int) -> float:
+        candidate, _ = _encode_image(sample, output_format, quality, progressive)
+        return compute_ssim(sample, Image.open(io.BytesIO(candidate)))
+
+    low, high = min_quality, max_quality
+    found_quality, found_ssim = None, None
+    best_ssim = None  # SSIM de la plus haute qualite essayee (sans succes)
+    step_duration = 0.0
+    now = time.perf_counter()
+    while low <= high and now + step_duration < deadline:
+        quality = (low + high) // 2
+        step_start = now
+        ssim = measure(quality)
+        if ssim >= target_ssim:
+            found_quality, found_ssim = quality, ssim
+            high = quality - 1
+        else:
+            best_ssim = ssim
+            low = quality + 1
+        now = time.perf_counter()
+        step_duration = now - step_start
+
+    if found_quality is None:
+        found_quality = max_quality
+        # Mesure de la qualite maximale seulement s'il reste du budget ;
+        # sinon la SSIM du meilleur essai sert de borne inferieure
+        if best_ssim is None or now + step_duration < deadline:
+            best_ssim = measure(found_quality)
+        found_ssim = best_ssim
+
+    content, extension = _encode_image(img, output_format, found_quality, progressive)
+    return content, extension, found_quality, found_ssim
+
+
+# Placeholders (BlurHash) : composantes horizontales x verticales et taille d'analyse
+BLURHASH_COMPONENTS = (4, 3)
+BLURHASH_SAMPLE_SIZE = 32
+
+_BASE83_CHARS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+_SRGB_TO_LINEAR = [
+    v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+    for v in (c / 255 for c in range(256))
+]
+
+
+def _encode_base83(value: int, length: int) -> str:
+    return "".join(
+        _BASE83_CHARS[(value // 83 ** (length - i - 1)) % 83] for i in range(length)
+    )
+
+
+def _linear_to_srgb(value: float) -> int:
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def compute_blurhash(img: Image.Image, components: tuple[int, int] = BLURHASH_COMPONENTS) -> str:
+    """
+    Calcule le BlurHash d'une image (https://blurha.sh) sur une version reduite.
+
+    Args:
+        img: Image decodee (n'importe quelle taille, elle est reduite a 32px)
+        components: Nombre de composantes (horizontales, verticales), de 1 a 9
+
+    Returns:
+        La chaine BlurHash (une trentaine de caracteres)
+    """
+    components_x, components_y = components
+    sample = img.convert("RGB")
+    sample.thumbnail((BLURHASH_SAMPLE_SIZE, BLURHASH_SAMPLE_SIZE), Image.Resampling.BOX)
+    width, height = sample.size
+    data = sample.tobytes()
+    pixels = [
+        (_SRGB_TO_LINEAR[data[k]], _SRGB_TO_LINEAR[data[k + 1]], _SRGB_TO_LINEAR[data[k + 2]])
+        for k in range(0, len(data), 3)
+    ]
+
+    factors = []
+    for j in range(components_y):
+        basis_y = [math.cos(math.pi * j * y / height) for y in range(height)]
+        for i in range(components_x):
+            basis_x = [math.cos(math.pi * i * x / width) for x in range(width)]
+            r = g = b = 0.0
+            for y in range(height):
+                row = y * width
+                for x in range(width):
+                    basis = basis_x[x] * basis_y[y]
+                    pr, pg, pb = pixels[row + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = (1 if i == 0 and j == 0 else 2) / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+
+    blurhash = _encode_base83((components_x - 1) + (components_y - 1) * 9, 1)
+    if ac:
+        actual_max = max(abs(value) for factor in ac for value in factor)
+        quantised_max = max(0, min(82, int(math.floor(actual_max * 166 - 0.5))))
+        max_value = (quantised_max + 1) / 166
+        blurhash += _encode_base83(quantised_max, 1)
+    else:
+        max_value = 1.0
+        blurhash += _encode_base83(0, 1)
+
+    dc_value = (_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2])
+    blurhash += _encode_base83(dc_value, 4)
+
+    for factor in ac:
+        r, g, b = (
+            max(0, min(18, int(math.floor(math.copysign(abs(v / max_value) ** 0.5, v) * 9 + 9.5))))
+            for v in factor
+        )
+        blurhash += _encode_base83(r * 19 * 19 + g * 19 + b, 2)
+
+    return blurhash
+
+
+def compute_dhash(img: Image.Image, hash_size: int = 8) -> str:
+    """
+    Calcule le hash perceptuel par difference (dHash) d'une image : chaque bit
+    indique si un pixel est plus clair que son voisin de droite sur une version
+    reduite en niveaux de gris. Deux photos quasi identiques (recadrage leger,
+    recompression, redimensionnement) ont une faible distance de Hamming.
+
+    Returns:
+        Hash de hash_size * hash_size bits en hexadecimal (16 caracteres par defaut)
+    """
+    width = hash_size + 1
+    pixels = img.convert("L").resize((width, hash_size), Image.Resampling.LANCZOS).tobytes()
+
+    value = 0
+    for y in range(hash_size):
+        row = y * width
+        for x in range(hash_size):
+            value = (value << 1) | (pixels[row + x] > pixels[row + x + 1])
+    return f"{value:0{hash_size * hash_size // 4}x}"
+
+
+def compute_image_metadata(img: Image.Image) -> dict:
+    """
+    Calcule les informations permettant au client de mettre en page et de
+    previsualiser une image sans la telecharger, ainsi que son hash perceptuel
+    (detection des quasi-doublons).
+
+    Returns:
+        Dict avec width, height, dominant_color (#rrggbb), blurhash et dhash
+    """
+    width, height = img.size
+    r, g, b = img.convert("RGB").resize((1, 1), Image.Resampling.BOX).getpixel((0, 0))
+    return {
+        "width": width,
+        "height": height,
+        "dominant_color": f"#{r:02x}{g:02x}{b:02x}",
+        "blurhash": compute_blurhash(img),
+        "dhash": compute_dhash(img),
+    }
+
+
+# Moteur de traitement utilise par defaut (voir get_image_engine)
+DEFAULT_ENGINE = "pillow"
+
+
+class ImageEngine(ABC):
+    """
+    Interface des moteurs de traitement d'image utilises a l'upload.
+    Un moteur decode, redimensionne et encode ; les formats et parametres
+    sont ceux de compress_image et generate_renditions.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def compress(
+        self,
+        file_content: bytes,
+        max_dimension: int,
+        quality: int,
+        output_format: str,
+    ) -> tuple[bytes, str]:
+        ...
+
+    @abstractmethod
+    def renditions(
+        self,
+        file_content: bytes,
+        sizes: dict[str, int],
+        quality: int,
+        output_format: str,
+        adaptive: Optional[dict],
+        progressive: bool,
+    ) -> tuple[dict[str, tuple[bytes, str]], dict]:
+        ...
+
+
+class PillowEngine(ImageEngine):
+    """Moteur par defaut : decodage complet puis redimensionnement LANCZOS avec Pillow."""
+
+    name = "pillow"
+
+    def compress(
+        self,
+        file_content: bytes,
+        max_dimension: int,
+        quality: int,
+        output_format: str,
+    ) -> tuple[bytes, str]:
+        img = _prepare_for_format(_open_image(file_content), output_format)
+
+        # Redimensionner si l'image depasse la dimension maximale
+        if max(img.size) > max_dimension:
+            img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+        return _encode_image(img, output_format, quality)
+
+    def renditions(
+        self,
+        file_content: bytes,
+        sizes: dict[str, int],
+        quality: int,
+        output_format: str,
+        adaptive: Optional[dict],
+        progressive: bool,
+    ) -> tuple[dict[str, tuple[bytes, str]], dict]:
+        img = _open_image(file_content)
+        captured_at = img.info["captured_at"]
+        img = _prepare_for_format(img, output_format)
+
+        renditions = {}
+        metadata = None
+        previous_size = None
+        for name, max_dimension in sorted(sizes.items(), key=lambda item: item[1], reverse=True):
+            if max(img.size) > max_dimension:
+                img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+            elif previous_size is not None:
+                # Identique a la rendition superieure, inutile de la stocker
+                continue
+
+            if metadata is None:
+                metadata = {"width": img.width, "height": img.height, "captured_at": captured_at}
+                if adaptive is not None:
+                    # Recherche de qualite sur la plus grande rendition, reutilisee ensuite
+                    renditions[name], quality, metadata["encoding"] = _encode_largest_adaptive(
+                        img, output_format, quality, adaptive, progressive
+                    )
+                    previous_size = img.size
+                    continue
+
+            renditions[name] = _encode_image(img, output_format, quality, progressive)
+            previous_size = img.size
+
+        # Placeholder calcule sur la plus petite rendition (deja en memoire)
+        metadata.update(
+            {key: value for key, value in compute_image_metadata(img).items() if key not in metadata}
+        )
+
+        return renditions, metadata
+
+
+def _encode_largest_adaptive(
+    img: Image.Image,
+    output_format: str,
+    quality: int,
+    adaptive: dict,
+    progressive: bool,
+) -> tuple[tuple[bytes, str], int, dict]:
+    """
+    Encode la plus grande rendition en mode adaptatif.
+
+    L'encodage de reference a qualite fixe (baseline_size, pour mesurer le
+    gain) double le cout : il n'est fait que si adaptive["measure_baseline"]
+    est vrai (benchmarks).
+
+    Returns:
+        Tuple ((contenu, extension), qualite retenue, stats d'encodage)
+    """
+    params = {key: value for key, value in adaptive.items() if key != "measure_baseline"}
+    content, extension, found_quality, ssim = encode_adaptive(
+        img, output_format, progressive=progressive, **params
+    )
+    encoding = {"quality": found_quality, "ssim": round(ssim, 4)}
+    if adaptive.get("measure_baseline"):
+        baseline, _ = _encode_image(img, output_format, quality, progressive)
+        encoding["baseline_size"] = len(baseline)
+    return (content, extension), found_quality, encoding
+
+
+_ENGINES: dict[str, ImageEngine] = {"pillow": PillowEngine()}
+# Moteurs demandes mais indisponibles (avertissement affiche une seule fois)
+_MISSING_ENGINES: set[str] = set()
+
+
+def get_image_engine(name: str = DEFAULT_ENGINE) -> ImageEngine:
+    """
+    Retourne le moteur demande. Le moteur "vips" n'est charge qu'a la demande
+    (pyvips est optionnel) ; s'il est indisponible, Pillow est utilise (sans
+    etre memorise : le moteur demande est recherche a nouveau au prochain appel).
+    """
+    if name not in _ENGINES and name == "vips":
+        from app.utils.vips_engine import HAS_VIPS, VipsEngine
+
+        if HAS_VIPS:
+            _ENGINES["vips"] = VipsEngine()
+
+    engine = _ENGINES.get(name)
+    if engine is None:
+        if name not in _MISSING_ENGINES:
+            _MISSING_ENGINES.add(name)
+            print(f"⚠️  Image engine '{name}' unavailable, falling back to {DEFAULT_ENGINE}")
+        engine = _ENGINES[DEFAULT_ENGINE]
+    return engine
+
+
+def compress_image(
+    file_content: bytes,
     max_dimension: int = MAX_DIMENSION,
     quality: int = JPEG_QUALITY,
-) -> BinaryIO:
+    output_format: str = "JPEG",
+    engine: str = DEFAULT_ENGINE,
+) -> tuple[bytes, str]:
     """
-    Compresse un fichier UploadFile et retourne un file-like object.
+    Compresse une image et la redimensionne si necessaire.
 
     Args:
-        file: Fichier uploade par l'utilisateur
-        max_dimension: Dimension maximale
-        quality: Qualite de compression
+        file_content: Contenu brut de l'image
+        max_dimension: Dimension maximale (largeur ou hauteur)
+        quality: Qualite de compression (0-100)
+        output_format: Format de sortie (JPEG, WEBP, PNG)
+        engine: Moteur de traitement ("pillow" ou "vips")
 
     Returns:
-        File-like object contenant l'image compressee
+        Tuple (contenu compresse, extension du fichier)
     """
-    # Lire le contenu du fichier
-    file_content = file.file.read()
-    file.file.seek(0)  # Reset pour d'eventuelles autres lectures
+    return get_image_engine(engine).compress(file_content, max_dimension, quality, output_format)
+
+
+def generate_renditions(
+    file_content: bytes,
+    sizes: dict[str, int] = RENDITION_SIZES,
+    quality: int = JPEG_QUALITY,
+    output_format: str = "JPEG",
+    adaptive: Optional[dict] = None,
+    progressive: bool = False,
+    engine: str = DEFAULT_ENGINE,
+) -> tuple[dict[str, tuple[bytes, str]], dict]:
+    """
+    Genere plusieurs tailles d'une image a partir d'un seul decodage,
+    ainsi que ses metadonnees d'affichage (dimensions, couleur, BlurHash).
+
+    En mode adaptatif, la qualite est recherchee sur la plus grande rendition
+    (voir encode_adaptive) puis reutilisee pour les suivantes. Les metadonnees
+    contiennent alors "encoding" : qualite, SSIM et, si demande
+    (measure_baseline), taille de reference a qualite fixe.
+
+    Chaque rendition est reduite a partir de la precedente (de la plus grande
+    a la plus petite). Une rendition qui ne serait pas plus petite que la
+    suivante (image source deja petite) n'est pas generee : l'appelant doit
+    se rabattre sur la rendition superieure.
+
+    Args:
+        file_content: Contenu brut de l'image
+        sizes: Renditions a produire (nom -> dimension maximale)
+        quality: Qualite de compression (0-100), reference en mode adaptatif
+        output_format: Format de sortie (JPEG, WEBP, PNG)
+        adaptive: Parametres de encode_adaptive (target_ssim, min_quality,
+            max_quality, budget_ms) et measure_baseline, None pour une qualite fixe
+        progressive: Produire des JPEG progressifs
+        engine: Moteur de traitement ("pillow" ou "vips")
+
+    Returns:
+        Tuple (dict nom -> (contenu compresse, extension), metadonnees). La plus
+        grande rendition est toujours presente ; les dimensions des metadonnees
+        sont les siennes. captured_at est la date de prise de vue EXIF (ou None).
+    """
+    return get_image_engine(engine).renditions(
+        file_content, sizes, quality, output_format, adaptive, progressive
+    )
+
+
+# Largeurs autorisees pour les variantes a la demande (borne le nombre d'entrees en cache)
+VARIANT_WIDTHS = (160, 320, 640, 1024, 1600, MAX_DIMENSION)
+
+# Formats de sortie des variantes -> (format Pillow, content-type)
+VARIANT_FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+    "png": ("PNG", "image/png"),
+}
+
+# AVIF uniquement si Pillow a ete compile avec libavif
+if features.check("avif"):
+    VARIANT_FORMATS["avif"] = ("AVIF", "image/avif")
+
+# Formats sources pouvant etre re-encodes dans un format negocie (pas les GIF animes)
+NEGOTIABLE_SOURCE_FORMATS = {"JPEG", "PNG"}
+
+
+def negotiate_image_format(accept: Optional[str], candidates: list[str]) -> Optional[str]:
+    """
+    Choisit le meilleur format moderne accepte par le client d'apres l'en-tete Accept.
+
+    Seuls les types explicitement listes sont pris en compte (image/* ne prouve pas
+    le support de WebP/AVIF). A qualite egale, l'ordre de `candidates` departage.
+
+    Args:
+        accept: Valeur de l'en-tete Accept
+        candidates: Formats proposes par ordre de preference (ex: ["avif", "webp"])
+
+    Returns:
+        Le format retenu (cle de VARIANT_FORMATS) ou None
+    """
+    if not accept:
+        return None
+
+    accepted = {}
+    for part in accept.split(","):
+        media_range, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[media_range.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for fmt in candidates:
+        if fmt not in VARIANT_FORMATS:
+            continue
+        q = accepted.get(VARIANT_FORMATS[fmt][1], 0.0)
+        if q > best_q:
+            best, best_q = fmt, q
+    return best
+
+
+def snap_variant_width(width: int) -> int:
+    """Arrondit une largeur demandee a la largeur autorisee immediatement superieure."""
+    for allowed in VARIANT_WIDTHS:
+        if width <= allowed:
+            return allowed
+    return VARIANT_WIDTHS[-1]
+
+
+def render_variant(
+    file_content: bytes,
+    width: Optional[int] = None,
+    fmt: Optional[str] = None,
+    quality: int = JPEG_QUALITY,
+    negotiated: Optional[str] = None,
+) -> tuple[bytes, str]:
+    """
+    Produit une variante redimensionnee et/ou re-encodee d'une image stockee.
+
+    Args:
+        file_content: Contenu de l'image stockee
+        width: Largeur maximale (None pour conserver la largeur d'origine)
+        fmt: Format de sortie (cle de VARIANT_FORMATS), None pour garder un format equivalent
+        quality: Qualite de compression (0-100)
+        negotiated: Format negocie via Accept, utilise quand fmt est None et que
+            la source est un JPEG ou un PNG
+
+    Returns:
+        Tuple (contenu encode, content-type)
+    """
+    img = _open_image(file_content)
 
-    # Determiner le format de sortie selon le type original
-    filename = file.filename or ""
+    if fmt is None:
+        # Le format source est lu avant toute rotation (qui le perd)
+        source_format = Image.open(io.BytesIO(file_content)).format
+        if negotiated and source_format in NEGOTIABLE_SOURCE_FORMATS:
+            fmt = negotiated
+        else:
+            fmt = {"PNG": "png", "WEBP": "webp"}.get(source_format, "jpeg")
+    output_format, content_type = VARIANT_FORMATS[fmt]
+
+    img = _prepare_for_format(img, output_format)
+
+    # Ne jamais agrandir : seule la largeur est contrainte
+    if width is not None and img.width > width:
+        img.thumbnail((width, img.height), Image.Resampling.LANCZOS)
+
+    content, _ = _encode_image(img, output_format, quality)
+    return content, content_type
+
+
+def _detect_output_format(file_content: bytes, filename: str) -> Optional[str]:
+    """
+    Determine le format de sortie selon le type original.
+
+    Returns:
+        Le format de sortie, ou None si le fichier doit etre conserve tel quel
+    """
     extension = filename.lower().split(".")[-1] if "." in filename else ""
 
     # Les GIF animes ne doivent pas etre compressee (perte d'animation)
     if extension == "gif":
-        return io.BytesIO(file_content)
+        return None
 
     # Utiliser WEBP pour les images WEBP, JPEG pour le reste
     if extension == "webp":
-        output_format = "WEBP"
+        return "WEBP"
     elif extension == "png":
         # PNG avec transparence -> garder PNG, sinon convertir en JPEG
         try:
             img = Image.open(io.BytesIO(file_content))
             if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-                output_format = "PNG"
+                return "PNG"
             else:
-                output_format = "JPEG"
+                return "JPEG"
         except Exception:
-            output_format = "JPEG"
+            return "JPEG"
     else:
-        output_format = "JPEG"
+        return "JPEG"
+
+
+def compress_upload_file(
+    file: UploadFile,
+    max_dimension: int = MAX_DIMENSION,
+    quality: int = JPEG_QUALITY,
+) -> BinaryIO:
+    """
+    Compresse un fichier UploadFile et retourne un file-like object.
+
+    Args:
+        file: Fichier uploade par l'utilisateur
+        max_dimension: Dimension maximale
+        quality: Qualite de compression
+
+    Returns:
+        File-like object contenant l'image compressee
+    """
+    # Lire le contenu du fichier
+    file_content = file.file.read()
+    file.file.seek(0)  # Reset pour d'eventuelles autres lectures
+
+    output_format = _detect_output_format(file_content, file.filename or "")
+    if output_format is None:
+        return io.BytesIO(file_content)
 
     # Compresser l'image
     compressed_content, _ = compress_image(
@@ -143,6 +787,241 @@ def compress_upload_file(
     return io.BytesIO(compressed_content)
 
 
+# Type MIME des fichiers produits, par extension
+EXTENSION_MIME_TYPES = {
+    ".jpg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+    ".avif": "image/avif",
+    ".mp4": "video/mp4",
+}
+
+# Delai maximal accorde a ffmpeg pour transcoder un GIF (secondes)
+FFMPEG_TIMEOUT = 60
+
+
+def is_animated_gif(file_content: bytes) -> bool:
+    """Indique si le contenu est un GIF comportant plusieurs images."""
+    try:
+        img = Image.open(io.BytesIO(file_content))
+        return img.format == "GIF" and getattr(img, "n_frames", 1) > 1
+    except Exception:
+        return False
+
+
+def _transcode_gif_to_webp(file_content: bytes, max_dimension: int, quality: int) -> bytes:
+    """Transcode un GIF anime en WebP anime en conservant durees et boucle."""
+    img = Image.open(io.BytesIO(file_content))
+    durations = [frame.info.get("duration", 100) for frame in ImageSequence.Iterator(img)]
+    options = {
+        "format": "WEBP",
+        "save_all": True,
+        "duration": durations,
+        "loop": img.info.get("loop", 0),
+        "quality": quality,
+        "method": 4,
+    }
+
+    output = io.BytesIO()
+    if max(img.size) <= max_dimension:
+        # Pillow parcourt lui-meme les images du GIF : une seule image en memoire a la fois
+        img.seek(0)
+        img.save(output, **options)
+    else:
+        frames = []
+        for frame in ImageSequence.Iterator(img):
+            frame = frame.convert("RGBA")
+            frame.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+            frames.append(frame)
+        frames[0].save(output, append_images=frames[1:], **options)
+
+    return output.getvalue()
+
+
+def _transcode_gif_to_mp4(file_content: bytes, max_dimension: int) -> Optional[bytes]:
+    """
+    Transcode un GIF anime en MP4 H.264 avec ffmpeg.
+
+    Returns:
+        Le contenu MP4, ou None si ffmpeg est absent ou a echoue
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return None
+
+    # H.264 yuv420p impose des dimensions paires
+    scale = (
+        f"scale='min({max_dimension},iw)':'min({max_dimension},ih)':force_original_aspect_ratio=decrease,"
+        "scale=trunc(iw/2)*2:trunc(ih/2)*2"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = f"{tmp_dir}/source.gif"
+        target = f"{tmp_dir}/target.mp4"
+        with open(source, "wb") as f:
+            f.write(file_content)
+        try:
+            subprocess.run(
+                [
+                    ffmpeg, "-y", "-loglevel", "error", "-i", source,
+                    "-vf", scale, "-c:v", "libx264", "-pix_fmt", "yuv420p",
+                    "-crf", "23", "-movflags", "+faststart", "-an", target,
+                ],
+                check=True,
+                timeout=FFMPEG_TIMEOUT,
+            )
+        except (subprocess.SubprocessError, OSError):
+            return None
+        with open(target, "rb") as f:
+            return f.read()
+
+
+def transcode_animated_gif(
+    file_content: bytes,
+    target_format: str = "webp",
+    max_dimension: int = MAX_DIMENSION,
+    quality: int = WEBP_QUALITY,
+) -> tuple[bytes, str]:
+    """
+    Transcode un GIF anime en WebP anime, ou en MP4 si demande et si ffmpeg est disponible.
+
+    Args:
+        file_content: Contenu du GIF
+        target_format: "mp4" ou "webp" (repli sur WebP si ffmpeg est indisponible)
+        max_dimension: Dimension maximale
+        quality: Qualite WebP (0-100)
+
+    Returns:
+        Tuple (contenu transcode, extension)
+    """
+    if target_format == "mp4":
+        content = _transcode_gif_to_mp4(file_content, max_dimension)
+        if content is not None:
+            return content, ".mp4"
+
+    return _transcode_gif_to_webp(file_content, max_dimension, quality), ".webp"
+
+
+def generate_square_renditions(
+    file_content: bytes,
+    sizes: dict[str, int] = SQUARE_SIZES,
+    quality: int = WEBP_QUALITY,
+    output_format: str = "WEBP",
+) -> dict[str, tuple[bytes, str]]:
+    """
+    Genere les renditions carrees d'un avatar ou d'une image de groupe :
+    recadrage centre puis redimensionnement a chaque taille. Pour un GIF
+    anime, seule la premiere image est conservee.
+
+    Args:
+        file_content: Contenu brut de l'image
+        sizes: Renditions a produire (nom -> cote en pixels)
+        quality: Qualite de compression (0-100)
+        output_format: Format de sortie (WEBP ou JPEG)
+
+    Returns:
+        Dict nom -> (contenu compresse, extension). Une image source plus
+        petite que la plus grande taille n'est pas agrandie ; les renditions
+        qui ne seraient pas plus petites que la superieure sont omises.
+    """
+    img = _prepare_for_format(_open_image(file_content), output_format)
+
+    # Recadrage centre au carre, a la plus grande taille demandee (sans agrandir)
+    side = min(max(sizes.values()), *img.size)
+    img = ImageOps.fit(img, (side, side), Image.Resampling.LANCZOS)
+
+    renditions = {}
+    for name, size in sorted(sizes.items(), key=lambda item: item[1], reverse=True):
+        if size < img.width:
+            img = img.resize((size, size), Image.Resampling.LANCZOS)
+        elif renditions:
+            # Identique a la rendition superieure, inutile de la stocker
+            continue
+        renditions[name] = _encode_image(img, output_format, quality)
+    return renditions
+
+
+def _still_renditions(file_content: bytes, sizes: dict[str, int], quality: int) -> dict[str, tuple[BinaryIO, str]]:
+    """Renditions JPEG fixes de la premiere image d'une animation (vignettes de la grille)."""
+    with Image.open(io.BytesIO(file_content)) as img:
+        frame = _prepare_for_format(img.convert("RGBA"), "JPEG")
+
+    renditions = {}
+    # De la plus grande a la plus petite, chacune reduite depuis la precedente
+    for name in sorted(sizes, key=sizes.get, reverse=True):
+        frame.thumbnail((sizes[name], sizes[name]), Image.Resampling.LANCZOS)
+        content, extension = _encode_image(frame, "JPEG", quality)
+        renditions[name] = (io.BytesIO(content), extension)
+    return renditions
+
+
+def compress_renditions(
+    file_content: bytes,
+    filename: str,
+    sizes: dict[str, int] = RENDITION_SIZES,
+    quality: int = JPEG_QUALITY,
+    gif_format: Optional[str] = "webp",
+    keep_original_gif: bool = False,
+    adaptive: Optional[dict] = None,
+    progressive: bool = False,
+    engine: str = DEFAULT_ENGINE,
+) -> tuple[dict[str, tuple[BinaryIO, str]], dict]:
+    """
+    Compresse le contenu brut d'un fichier en plusieurs renditions.
+
+    Args:
+        file_content: Contenu brut de l'image
+        filename: Nom du fichier original (determine le format de sortie)
+        sizes: Renditions a produire (nom -> dimension maximale)
+        quality: Qualite de compression
+        gif_format: Format cible des GIF animes ("webp", "mp4"), None pour les conserver tels quels
+        keep_original_gif: Conserver aussi le GIF original (cle "original")
+        adaptive: Parametres de l'encodage adaptatif (voir generate_renditions)
+        progressive: Produire des JPEG progressifs
+        engine: Moteur de traitement ("pillow" ou "vips")
+
+    Returns:
+        Tuple (dict nom -> (file-like object, extension), metadonnees). Pour un
+        GIF anime transcode, la plus grande rendition est animee et les autres
+        sont des JPEG fixes (premiere image), plus "original" si demande. Un GIF
+        conserve tel quel n'a que la plus grande rendition.
+    """
+    output_format = _detect_output_format(file_content, filename)
+    if output_format is None:
+        largest = max(sizes, key=sizes.get)
+        metadata = compute_image_metadata(Image.open(io.BytesIO(file_content)))
+
+        if gif_format is None or not is_animated_gif(file_content):
+            return {largest: (io.BytesIO(file_content), ".gif")}, metadata
+
+        content, extension = transcode_animated_gif(
+            file_content, gif_format, max_dimension=sizes[largest]
+        )
+        renditions = {largest: (io.BytesIO(content), extension)}
+        # Vignettes fixes : la grille reste composee d'images, meme pour un MP4
+        renditions.update(
+            _still_renditions(file_content, {name: size for name, size in sizes.items() if name != largest}, quality)
+        )
+        if keep_original_gif:
+            renditions["original"] = (io.BytesIO(file_content), ".gif")
+        return renditions, metadata
+
+    renditions, metadata = generate_renditions(
+        file_content,
+        sizes=sizes,
+        quality=quality,
+        output_format=output_format,
+        adaptive=adaptive,
+        progressive=progressive,
+        engine=engine,
+    )
+
+    return {
+        name: (io.BytesIO(content), extension)
+        for name, (content, extension) in renditions.items()
+    }, metadata
+
+
 def get_compression_stats(original_size: int, compressed_size: int) -> dict:
     """
     Calcule les statistiques de compression.
@@ -0,0 +1,319 @@
+"""
+Cache des medias servis par le proxy (originaux et variantes).
+Deux niveaux : LRU en memoire borne en octets, puis cache disque local optionnel
+borne en taille. Les fichiers du slave etant immuables, une entree n'est
+invalidee qu'a la suppression du fichier. Coalescence des generations
+concurrentes d'une meme cle.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+from app.utils.core.config import settings
+
+T = TypeVar("T")
+
+
+class LRUByteCache:
+    """
+    Cache LRU dont la taille est bornee par le nombre total d'octets stockes.
+    Les entrees les moins recemment utilisees sont evincees en premier.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[bytes, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[tuple[bytes, str]]:
+        """Retourne (contenu, content-type) ou None si absent."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry
+
+    def set(self, key: str, content: bytes, content_type: str) -> None:
+        """Ajoute une entree et evince les plus anciennes si le budget est depasse."""
+        size = len(content)
+        if size > self.max_bytes:
+            # Trop volumineux pour le cache : ne pas vider tout le cache pour lui
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous[0])
+
+            self._entries[key] = (content, content_type)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+                self.evictions += 1
+
+    def invalidate_prefix(self, prefix: str) -> None:
+        """Supprime toutes les entrees dont la cle commence par le prefixe."""
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                content, _ = self._entries.pop(key)
+                self.current_bytes -= len(content)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return _stats(self, len(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCache:
+    """
+    Cache disque local borne en octets, evince par date de dernier acces.
+    Chaque entree est un fichier "{file_id}__{hash de la cle}" dont la premiere
+    ligne est le content-type : l'index est reconstruit au demarrage en
+    parcourant le repertoire et l'invalidation par fichier reste possible.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, int] = OrderedDict()  # nom de fichier -> taille
+        self._lock = threading.Lock()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = [path for path in self.directory.iterdir() if path.is_file() and "__" in path.name]
+        for path in sorted(files, key=lambda path: path.stat().st_atime):
+            size = path.stat().st_size
+            self._entries[path.name] = size
+            self.current_bytes += size
+        self._evict()
+
+    @staticmethod
+    def _filename(key: str) -> str:
+        file_id = key.split(":", 1)[0]
+        if not re.fullmatch(r"[A-Za-z0-9._-]+", file_id):
+            file_id = hashlib.sha256(file_id.encode()).hexdigest()[:32]
+        return f"{file_id}__{hashlib.sha256(key.encode()).hexdigest()[:32]}"
+
+    def get(self, key: str) -> Optional[tuple[bytes, str]]:
+        name = self._filename(key)
+        with self._lock:
+            if name not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(name)
+
+        try:
+            data = (self.directory / name).read_bytes()
+        except OSError:
+            # Supprime entre-temps (invalidation concurrente)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        content_type, _, content = data.partition(b"\n")
+        with self._lock:
+            self.hits += 1
+        return content, content_type.decode()
+
+    def set(self, key: str, content: bytes, content_type: str) -> None:
+        size = len(content) + len(content_type) + 1
+        if size > self.max_bytes:
+            return
+
+        name = self._filename(key)
+        # Ecriture atomique : un lecteur ne voit jamais un fichier partiel
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(content_type.encode() + b"\n")
+            tmp.write(content)
+        os.replace(tmp_path, self.directory / name)
+
+        with self._lock:
+            previous = self._entries.pop(name, None)
+            if previous is not None:
+                self.current_bytes -= previous
+            self._entries[name] = size
+            self.current_bytes += size
+            self._evict()
+
+    def _evict(self) -> None:
+        while self.current_bytes > self.max_bytes:
+            name, size = self._entries.popitem(last=False)
+            self.current_bytes -= size
+            self.evictions += 1
+            (self.directory / name).unlink(missing_ok=True)
+
+    def invalidate_prefix(self, prefix: str) -> None:
+        """Supprime les entrees d'un fichier (prefixe "{file_id}:")."""
+        file_prefix = self._filename(prefix).split("__", 1)[0] + "__"
+        with self._lock:
+            for name in [name for name in self._entries if name.startswith(file_prefix)]:
+                self.current_bytes -= self._entries.pop(name)
+                (self.directory / name).unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return _stats(self, len(self._entries))
+
+
+class TieredCache:
+    """
+    Cache a deux niveaux : memoire puis disque (optionnel). Une entree trouvee
+    sur disque est remontee en memoire ; une entree ajoutee va dans les deux.
+    """
+
+    def __init__(self, memory: LRUByteCache, disk: Optional[DiskCache] = None):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str) -> Optional[tuple[bytes, str]]:
+        entry = self.memory.get(key)
+        if entry is None and self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                self.memory.set(key, *entry)
+        return entry
+
+    def set(self, key: str, content: bytes, content_type: str) -> None:
+        self.memory.set(key, content, content_type)
+        if self.disk is not None:
+            self.disk.set(key, content, content_type)
+
+    def invalidate_prefix(self, prefix: str) -> None:
+        self.memory.invalidate_prefix(prefix)
+        if self.disk is not None:
+            self.disk.invalidate_prefix(prefix)
+
+    def stats(self) -> dict:
+        return {
+            "memory": self.memory.stats(),
+            "disk": self.disk.stats() if self.disk is not None else None,
+        }
+
+
+def _stats(cache, entries: int) -> dict:
+    lookups = cache.hits + cache.misses
+    return {
+        "entries": entries,
+        "bytes": cache.current_bytes,
+        "max_bytes": cache.max_bytes,
+        "hits": cache.hits,
+        "misses": cache.misses,
+        "hit_ratio": round(cache.hits / lookups, 4) if lookups else None,
+        "evictions": cache.evictions,
+    }
+
+
+class SingleFlight:
+    """
+    Coalesce les appels concurrents pour une meme cle : le premier appel lance
+    la fonction, tous recoivent le meme resultat (ou la meme erreur).
+
+    La fonction s'execute dans une tache detachee : l'annulation d'un appelant,
+    y compris le premier (client deconnecte), n'interrompt pas le calcul et ne
+    se propage pas aux autres appelants.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Marquer l'exception comme lue si plus personne n'attendait
+            task.exception()
+
+
+class SharedStream:
+    """
+    Corps d'une reponse en cours de reception, partage par plusieurs lecteurs.
+    Un producteur unique ajoute les blocs ; chaque lecteur les relit depuis le
+    debut puis suit les suivants au fur et a mesure (un lecteur arrive en cours
+    de route ne manque rien). Les blocs restent en memoire jusqu'a la fin.
+    """
+
+    def __init__(self, content_type: str, headers: dict[str, str]):
+        self.content_type = content_type
+        self.headers = headers
+        self.chunks: list[bytes] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.task: Optional[asyncio.Task] = None  # Producteur (reference conservee)
+        self._changed = asyncio.Condition()
+
+    async def feed(self, chunk: bytes) -> None:
+        async with self._changed:
+            self.chunks.append(chunk)
+            self._changed.notify_all()
+
+    async def finish(self, error: Optional[BaseException] = None) -> None:
+        async with self._changed:
+            self.done = True
+            self.error = error
+            self._changed.notify_all()
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        index = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: index < len(self.chunks) or self.done)
+                pending = self.chunks[index:]
+                finished = self.done
+            for chunk in pending:
+                yield chunk
+            index += len(pending)
+            if finished and index == len(self.chunks):
+                if self.error is not None:
+                    raise self.error
+                return
+
+    async def read(self) -> bytes:
+        """Attend la fin de la reception et retourne le contenu complet."""
+        return b"".join([chunk async for chunk in self])
+
+
+# Cache des originaux et des variantes (partage par toutes les requetes du process)
+hot_cache = TieredCache(
+    LRUByteCache(settings.MEDIA_CACHE_MEMORY_BYTES),
+    DiskCache(settings.MEDIA_CACHE_DISK_DIR, settings.MEDIA_CACHE_DISK_BYTES) if settings.MEDIA_CACHE_DISK_DIR else None,
+)
+variant_flight = SingleFlight()
+original_flight = SingleFlight()
+
+
+def original_key(file_id: str) -> str:
+    """Cle de cache d'un fichier original servi par le proxy."""
+    return f"{file_id}:original"
+
+
+def invalidate_file(file_id: str) -> None:
+    """Invalide toutes les entrees en cache (original et variantes) d'un fichier supprime."""
+    hot_cache.invalidate_prefix(f"{file_id}:")
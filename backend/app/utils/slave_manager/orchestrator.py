@@ -44,14 +44,17 @@ def load_media(url: str):
     return response.json().get("files", [])
 
 
-def save_media(file) -> str:
-    """Upload a file to the optimised slave and return a proxy URL via the backend."""
+def save_media(file, filename: str | None = None) -> str:
+    """
+    Upload a file to the optimised slave and return a proxy URL via the backend.
+    The optional filename lets the slave keep the extension (and thus the MIME type).
+    """
     slave_base_url = get_optimised_slave()
     upload_url = slave_base_url + "/files"
 
     response = httpx.post(
         upload_url,
-        files={"file": file},
+        files={"file": (filename, file) if filename else file},
         headers={"X-API-Key": settings.SECRET_KEY},
     )
 
@@ -64,6 +67,23 @@ def save_media(file) -> str:
     return proxy_url
 
 
+def save_media_batch(files: list[tuple]) -> list[str]:
+    """
+    Upload several (file, filename) pairs to the optimised slave in one request
+    and return their proxy URLs, in the same order.
+    """
+    slave_base_url = get_optimised_slave()
+    response = httpx.post(
+        slave_base_url + "/files/batch",
+        files=[("files", (filename, file)) for file, filename in files],
+        headers={"X-API-Key": settings.SECRET_KEY},
+        timeout=httpx.Timeout(120.0, connect=5.0),
+    )
+
+    response.raise_for_status()
+    return [f"/media/proxy/{data['id']}" for data in response.json()]
+
+
 def fetch_file_from_slave(file_id: str) -> httpx.Response:
     """Fetch a file from the optimised slave storage node."""
     slave_url = get_optimised_slave()
@@ -77,6 +97,81 @@ def fetch_file_from_slave(file_id: str) -> httpx.Response:
     return response
 
 
+def download_file_from_slave(file_id: str, destination: Path) -> int:
+    """
+    Stream a file from the optimised slave storage node to destination,
+    chunk by chunk (the file is never held in memory). Returns its size.
+    """
+    slave_url = get_optimised_slave()
+    size = 0
+    with httpx.stream(
+        "GET",
+        f"{slave_url}/files/{file_id}",
+        headers={"X-API-Key": settings.SECRET_KEY},
+        follow_redirects=True,
+        timeout=httpx.Timeout(60.0, connect=5.0),
+    ) as response:
+        response.raise_for_status()
+        with open(destination, "wb") as f:
+            for chunk in response.iter_raw(settings.MEDIA_PROXY_CHUNK_SIZE):
+                f.write(chunk)
+                size += len(chunk)
+    return size
+
+
+# Client HTTP asynchrone partage (pool de connexions vers les slaves)
+_async_client: httpx.AsyncClient | None = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the shared async client, created on first use."""
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(
+            headers={"X-API-Key": settings.SECRET_KEY},
+            follow_redirects=True,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+        )
+    return _async_client
+
+
+async def close_async_client() -> None:
+    """Close the shared async client (application shutdown)."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def open_file_stream(file_id: str) -> httpx.Response:
+    """
+    Open a streamed request for a file on the optimised slave.
+    Only the headers are read: the caller iterates the body and must close
+    the response (response.aclose()).
+    """
+    slave_url = get_optimised_slave()
+    client = get_async_client()
+    request = client.build_request("GET", f"{slave_url}/files/{file_id}")
+    response = await client.send(request, stream=True)
+    try:
+        response.raise_for_status()
+    except httpx.HTTPStatusError:
+        await response.aclose()
+        raise
+    return response
+
+
+async def stat_files(file_ids: list[str]) -> dict[str, dict]:
+    """
+    Return the stored filename and size of several files in one request.
+    Unknown IDs are absent from the result.
+    """
+    slave_url = get_optimised_slave()
+    response = await get_async_client().post(f"{slave_url}/files/stat", json={"ids": file_ids})
+    response.raise_for_status()
+    return response.json()["files"]
+
+
 def list_all_files_from_slave() -> dict:
     """List all files from the slave storage."""
     slave_url = get_optimised_slave()
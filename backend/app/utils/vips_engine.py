@@ -0,0 +1,150 @@
+"""
+Moteur de traitement d'image base sur libvips (pyvips, optionnel).
+
+libvips decode en streaming et reduit l'image au chargement (shrink-on-load
+JPEG/WebP) : la memoire et le temps CPU ne dependent presque plus de la
+resolution du telephone source. Les metadonnees (BlurHash, couleur) et
+l'encodage adaptatif restent calcules avec Pillow sur des images deja reduites.
+"""
+from typing import Optional
+from PIL import Image
+from datetime import datetime
+from app.utils.image_compression import (
+    ImageEngine,
+    _encode_largest_adaptive,
+    compute_image_metadata,
+    parse_exif_datetime,
+)
+
+try:
+    import pyvips
+    HAS_VIPS = True
+except (ImportError, OSError):
+    # pyvips absent ou libvips introuvable
+    HAS_VIPS = False
+
+# Extension (qui determine aussi l'encodeur libvips) par format de sortie
+_EXTENSIONS = {
+    "JPEG": ".jpg",
+    "WEBP": ".webp",
+    "PNG": ".png",
+    "AVIF": ".avif",
+}
+
+
+def _load_thumbnail(file_content: bytes, max_dimension: int) -> "pyvips.Image":
+    """Decode l'image deja reduite a max_dimension (orientation EXIF appliquee)."""
+    return pyvips.Image.thumbnail_buffer(
+        file_content,
+        max_dimension,
+        height=max_dimension,
+        size="down",
+    )
+
+
+def _exif_field(image: "pyvips.Image", name: str) -> Optional[str]:
+    """Valeur brute d'un champ EXIF ("valeur (valeur, type, ...)" chez libvips)."""
+    field = f"exif-ifd2-{name}"
+    if image.get_typeof(field) == 0:
+        return None
+    return image.get(field).split(" (", 1)[0]
+
+
+def _read_capture_time(image: "pyvips.Image") -> Optional[datetime]:
+    return parse_exif_datetime(_exif_field(image, "DateTimeOriginal"), _exif_field(image, "OffsetTimeOriginal"))
+
+
+def _prepare_for_format(image: "pyvips.Image", output_format: str) -> "pyvips.Image":
+    """Equivalent de image_compression._prepare_for_format pour libvips."""
+    if image.interpretation not in ("srgb", "b-w"):
+        image = image.colourspace("srgb")
+    if output_format == "JPEG" and image.hasalpha():
+        # Fond blanc pour la transparence
+        image = image.flatten(background=[255] * (image.bands - 1))
+    return image
+
+
+def _encode(image: "pyvips.Image", output_format: str, quality: int, progressive: bool = False) -> tuple[bytes, str]:
+    """Encode une image libvips et retourne (contenu, extension)."""
+    suffix = _EXTENSIONS.get(output_format, ".jpg")
+    if output_format == "PNG":
+        if image.get_typeof("palette") and image.get("palette"):
+            # Source indexee : Pillow conserve la palette (mode P)
+            content = image.write_to_buffer(suffix, compression=9, palette=True, strip=True)
+        else:
+            # Filtrage adaptatif par ligne comme Pillow (libvips n'en applique aucun par defaut)
+            content = image.write_to_buffer(suffix, compression=9, filter="all", strip=True)
+    elif suffix == ".jpg":
+        content = image.write_to_buffer(
+            suffix,
+            Q=quality,
+            optimize_coding=True,
+            interlace=progressive,
+            strip=True,
+        )
+    else:
+        content = image.write_to_buffer(suffix, Q=quality, strip=True)
+    return content, suffix
+
+
+def _to_pil(image: "pyvips.Image") -> Image.Image:
+    """Convertit une image libvips (8 bits) en image Pillow."""
+    mode = {1: "L", 2: "LA", 3: "RGB", 4: "RGBA"}[image.bands]
+    return Image.frombytes(mode, (image.width, image.height), image.cast("uchar").write_to_memory())
+
+
+class VipsEngine(ImageEngine):
+    """Moteur libvips : shrink-on-load et redimensionnement en streaming."""
+
+    name = "vips"
+
+    def compress(
+        self,
+        file_content: bytes,
+        max_dimension: int,
+        quality: int,
+        output_format: str,
+    ) -> tuple[bytes, str]:
+        image = _prepare_for_format(_load_thumbnail(file_content, max_dimension), output_format)
+        return _encode(image, output_format, quality)
+
+    def renditions(
+        self,
+        file_content: bytes,
+        sizes: dict[str, int],
+        quality: int,
+        output_format: str,
+        adaptive: Optional[dict],
+        progressive: bool,
+    ) -> tuple[dict[str, tuple[bytes, str]], dict]:
+        ordered = sorted(sizes.items(), key=lambda item: item[1], reverse=True)
+        largest = _load_thumbnail(file_content, ordered[0][1])
+        captured_at = _read_capture_time(largest)
+        # Materialiser la plus grande rendition une seule fois pour les suivantes
+        largest = _prepare_for_format(largest, output_format).copy_memory()
+
+        renditions = {}
+        metadata = {"width": largest.width, "height": largest.height, "captured_at": captured_at}
+        image = largest
+        for index, (name, max_dimension) in enumerate(ordered):
+            if index > 0:
+                if max(image.width, image.height) <= max_dimension:
+                    # Identique a la rendition superieure, inutile de la stocker
+                    continue
+                image = largest.thumbnail_image(max_dimension, height=max_dimension, size="down")
+
+            if index == 0 and adaptive is not None:
+                # Recherche de qualite sur la plus grande rendition, reutilisee ensuite
+                renditions[name], quality, metadata["encoding"] = _encode_largest_adaptive(
+                    _to_pil(image), output_format, quality, adaptive, progressive
+                )
+                continue
+
+            renditions[name] = _encode(image, output_format, quality, progressive)
+
+        # Placeholder calcule sur la plus petite rendition
+        metadata.update(
+            {key: value for key, value in compute_image_metadata(_to_pil(image)).items() if key not in metadata}
+        )
+
+        return renditions, metadata
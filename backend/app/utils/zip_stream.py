@@ -0,0 +1,252 @@
+"""
+Ecriture d'archives ZIP en streaming (mode stored, sans compression).
+
+Les photos sont deja compressees : les stocker telles quelles evite tout
+travail CPU, et la taille de chaque entree est connue d'avance. La position de
+chaque octet de l'archive est donc deterministe (ZipLayout), ce qui permet
+d'annoncer Content-Length et de reprendre un telechargement a un offset.
+
+Les CRC ne sont connus qu'apres lecture des donnees : ils sont ecrits dans un
+data descriptor apres chaque entree (bit 3) et dans le repertoire central.
+Une entree dont le CRC est deja connu (ZipEntry.crc) et situee entierement
+avant le debut d'une reprise n'est pas relue.
+Les extensions ZIP64 sont utilisees entree par entree, seulement au-dela de 4 Go.
+"""
+import struct
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP64_COUNT_LIMIT = 0xFFFF
+
+# Bit 3 : CRC et tailles dans le data descriptor ; bit 11 : noms en UTF-8
+FLAGS = 0x0808
+VERSION_DEFAULT = 20
+VERSION_ZIP64 = 45
+
+
+class ZipEntry:
+    """Fichier de l'archive : nom, taille exacte et date de modification."""
+
+    def __init__(self, name: str, size: int, modified: datetime, key: str, crc: Optional[int] = None):
+        self.name = name
+        self.size = size
+        self.modified = modified
+        # Identifiant transmis a la fonction de lecture (ID du fichier sur le slave)
+        self.key = key
+        # CRC32 du contenu : connu d'avance, ou renseigne par stream_zip apres lecture
+        self.crc = crc
+        self.encoded_name = name.encode("utf-8")
+        self.zip64 = size >= ZIP64_LIMIT
+        self.offset = 0
+
+    @property
+    def header_size(self) -> int:
+        return 30 + len(self.encoded_name) + (20 if self.zip64 else 0)
+
+    @property
+    def descriptor_size(self) -> int:
+        return 24 if self.zip64 else 16
+
+    @property
+    def total_size(self) -> int:
+        return self.header_size + self.size + self.descriptor_size
+
+
+def _dos_datetime(value: datetime) -> tuple[int, int]:
+    """Date et heure au format MS-DOS (annees 1980 a 2107)."""
+    year = min(max(value.year, 1980), 2107)
+    time = (value.hour << 11) | (value.minute << 5) | (value.second // 2)
+    date = ((year - 1980) << 9) | (value.month << 5) | value.day
+    return time, date
+
+
+def local_header(entry: ZipEntry) -> bytes:
+    time, date = _dos_datetime(entry.modified)
+    if entry.zip64:
+        # Tailles reelles dans le data descriptor ; extra ZIP64 vide requis
+        sizes, extra = ZIP64_LIMIT, struct.pack("<HHQQ", 0x0001, 16, 0, 0)
+    else:
+        sizes, extra = 0, b""
+    return struct.pack(
+        "<IHHHHHIIIHH",
+        0x04034B50,
+        VERSION_ZIP64 if entry.zip64 else VERSION_DEFAULT,
+        FLAGS,
+        0,  # stored
+        time,
+        date,
+        0,
+        sizes,
+        sizes,
+        len(entry.encoded_name),
+        len(extra),
+    ) + entry.encoded_name + extra
+
+
+def data_descriptor(entry: ZipEntry, crc: int) -> bytes:
+    if entry.zip64:
+        return struct.pack("<IIQQ", 0x08074B50, crc, entry.size, entry.size)
+    return struct.pack("<IIII", 0x08074B50, crc, entry.size, entry.size)
+
+
+class ZipLayout:
+    """Position de chaque entree et taille totale d'une archive stored."""
+
+    def __init__(self, entries: list[ZipEntry]):
+        self.entries = entries
+        offset = 0
+        for entry in entries:
+            entry.offset = offset
+            offset += entry.total_size
+        self.central_directory_offset = offset
+        self.central_directory_size = sum(self._central_header_size(entry) for entry in entries)
+        self.zip64 = (
+            len(entries) >= ZIP64_COUNT_LIMIT
+            or self.central_directory_offset >= ZIP64_LIMIT
+            or self.central_directory_size >= ZIP64_LIMIT
+        )
+        self.total_size = offset + self.central_directory_size + (56 + 20 if self.zip64 else 0) + 22
+
+    def entries_to_read(self, start: int) -> list[ZipEntry]:
+        """Entrees dont le contenu doit etre lu pour produire l'archive a partir de start."""
+        return [entry for entry in self.entries if not _skippable(entry, start)]
+
+    @staticmethod
+    def _zip64_fields(entry: ZipEntry) -> list[int]:
+        fields = [entry.size, entry.size] if entry.zip64 else []
+        if entry.offset >= ZIP64_LIMIT:
+            fields.append(entry.offset)
+        return fields
+
+    def _central_header_size(self, entry: ZipEntry) -> int:
+        fields = self._zip64_fields(entry)
+        return 46 + len(entry.encoded_name) + (4 + 8 * len(fields) if fields else 0)
+
+    def central_header(self, entry: ZipEntry, crc: int) -> bytes:
+        time, date = _dos_datetime(entry.modified)
+        fields = self._zip64_fields(entry)
+        extra = struct.pack(f"<HH{len(fields)}Q", 0x0001, 8 * len(fields), *fields) if fields else b""
+        needs_zip64 = bool(fields)
+        return struct.pack(
+            "<IHHHHHHIIIHHHHHII",
+            0x02014B50,
+            VERSION_ZIP64,
+            VERSION_ZIP64 if needs_zip64 else VERSION_DEFAULT,
+            FLAGS,
+            0,
+            time,
+            date,
+            crc,
+            ZIP64_LIMIT if entry.zip64 else entry.size,
+            ZIP64_LIMIT if entry.zip64 else entry.size,
+            len(entry.encoded_name),
+            len(extra),
+            0,
+            0,
+            0,
+            0,
+            ZIP64_LIMIT if entry.offset >= ZIP64_LIMIT else entry.offset,
+        ) + entry.encoded_name + extra
+
+    def end_records(self) -> bytes:
+        count = len(self.entries)
+        records = b""
+        if self.zip64:
+            zip64_end_offset = self.central_directory_offset + self.central_directory_size
+            records += struct.pack(
+                "<IQHHIIQQQQ",
+                0x06064B50,
+                44,
+                VERSION_ZIP64,
+                VERSION_ZIP64,
+                0,
+                0,
+                count,
+                count,
+                self.central_directory_size,
+                self.central_directory_offset,
+            )
+            records += struct.pack("<IIQI", 0x07064B50, 0, zip64_end_offset, 1)
+        records += struct.pack(
+            "<IHHHHIIH",
+            0x06054B50,
+            0,
+            0,
+            min(count, ZIP64_COUNT_LIMIT),
+            min(count, ZIP64_COUNT_LIMIT),
+            min(self.central_directory_size, ZIP64_LIMIT),
+            min(self.central_directory_offset, ZIP64_LIMIT),
+            0,
+        )
+        return records
+
+
+def _skippable(entry: ZipEntry, start: int) -> bool:
+    # Entree entierement avant start et dont le CRC est connu : inutile de la lire
+    return entry.crc is not None and entry.offset + entry.total_size <= start
+
+
+async def stream_zip(
+    layout: ZipLayout,
+    contents: AsyncIterator[AsyncIterator[bytes]],
+    start: int = 0,
+    end: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Produit les octets [start, end] (inclus) de l'archive.
+
+    contents fournit, dans l'ordre, le contenu de chaque entree de
+    layout.entries_to_read(start). Les autres entrees (avant start, CRC connu)
+    sont sautees ; celles situees avant start mais sans CRC connu sont lues
+    sans etre envoyees : leur CRC est necessaire au repertoire central.
+    Le CRC de chaque entree lue est renseigne dans entry.crc.
+
+    Raises:
+        ValueError: si un fichier n'a pas la taille annoncee (archive invalide)
+    """
+    end = layout.total_size - 1 if end is None else end
+    position = 0
+
+    def window(data: bytes) -> bytes:
+        # Partie de data (commencant a position) comprise dans [start, end]
+        return data[max(start - position, 0):max(end + 1 - position, 0)]
+
+    for entry in layout.entries:
+        if _skippable(entry, start):
+            position += entry.total_size
+            continue
+
+        chunks = await anext(contents)
+        header = local_header(entry)
+        if part := window(header):
+            yield part
+        position += len(header)
+
+        crc = 0
+        received = 0
+        async for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+            received += len(chunk)
+            if part := window(chunk):
+                yield part
+            position += len(chunk)
+        if received != entry.size:
+            raise ValueError(f"{entry.name}: expected {entry.size} bytes, got {received}")
+        entry.crc = crc
+
+        descriptor = data_descriptor(entry, crc)
+        if part := window(descriptor):
+            yield part
+        position += len(descriptor)
+
+        if position > end:
+            # Fin de la plage demandee atteinte avant le repertoire central
+            return
+
+    trailer = b"".join(layout.central_header(entry, entry.crc) for entry in layout.entries)
+    trailer += layout.end_records()
+    if part := window(trailer):
+        yield part
+
@@ -0,0 +1,105 @@
+"""
+Corpus de photos de reference pour les benchmarks.
+
+Les images sont generees de maniere deterministe (graine fixe) pour que les
+mesures soient comparables d'une machine et d'une execution a l'autre :
+degrades, bruit de capteur et formes floues, aux resolutions des telephones.
+"""
+import io
+import random
+from PIL import Image, ImageDraw, ImageFilter
+
+# Resolutions typiques des appareils photo de telephones (largeur, hauteur)
+PHONE_RESOLUTIONS = {
+    "12mp": (4032, 3024),
+    "8mp": (3264, 2448),
+    "fhd": (1920, 1080),
+}
+
+SEED = 1234
+
+# Les GIF animes sont des formats de petite taille (memes, animations courtes)
+GIF_RESOLUTION = (480, 480)
+
+
+def generate_photo(width: int, height: int, seed: int = SEED, alpha: bool = False) -> Image.Image:
+    """Genere une image proche d'une photo (basses frequences + grain)."""
+    rng = random.Random(seed)
+
+    # Fond : degrade de deux couleurs aleatoires
+    start = tuple(rng.randrange(256) for _ in range(3))
+    end = tuple(rng.randrange(256) for _ in range(3))
+    mask = Image.linear_gradient("L").resize((width, height))
+    img = Image.composite(Image.new("RGB", (width, height), end), Image.new("RGB", (width, height), start), mask)
+
+    # Formes floues (sujets)
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x, y = rng.randrange(width), rng.randrange(height)
+        radius = rng.randrange(min(width, height) // 20, min(width, height) // 4)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=color)
+    img = img.filter(ImageFilter.GaussianBlur(radius=max(width, height) // 400 + 1))
+
+    # Details fins et grain du capteur
+    noise = Image.effect_noise((width, height), 24).convert("RGB")
+    img = Image.blend(img, noise, 0.12)
+
+    if alpha:
+        img.putalpha(Image.radial_gradient("L").resize((width, height)))
+    return img
+
+
+def encode(img: Image.Image, fmt: str, **params) -> bytes:
+    """Encode une image du corpus dans le format demande."""
+    output = io.BytesIO()
+    img.save(output, format=fmt, **params)
+    return output.getvalue()
+
+
+def generate_gif(width: int, height: int, frames: int = 8, seed: int = SEED) -> bytes:
+    """Genere un GIF anime (un cadre qui se deplace sur une photo)."""
+    base = generate_photo(width, height, seed).convert("P", palette=Image.Palette.ADAPTIVE)
+    images = []
+    for i in range(frames):
+        frame = base.copy()
+        ImageDraw.Draw(frame).rectangle(
+            (i * width // frames, 0, (i + 1) * width // frames, height // 4), fill=0
+        )
+        images.append(frame)
+    output = io.BytesIO()
+    images[0].save(output, format="GIF", save_all=True, append_images=images[1:], duration=100, loop=0)
+    return output.getvalue()
+
+
+def build_corpus(resolutions: dict[str, tuple[int, int]] = PHONE_RESOLUTIONS) -> list[tuple[str, str, bytes]]:
+    """
+    Construit le corpus de photos JPEG (format des appareils photo).
+
+    Returns:
+        Liste de (nom, format, contenu)
+    """
+    corpus = []
+    for index, (label, (width, height)) in enumerate(resolutions.items()):
+        img = generate_photo(width, height, SEED + index)
+        corpus.append((f"{label}.jpg", "jpeg", encode(img, "JPEG", quality=92)))
+    return corpus
+
+
+def build_format_corpus(resolution: str = "12mp") -> dict[str, tuple[str, bytes]]:
+    """
+    Construit une image par format d'upload accepte, a la resolution donnee
+    (sauf le GIF anime, genere en GIF_RESOLUTION).
+
+    Returns:
+        Dict format -> (nom de fichier, contenu)
+    """
+    width, height = PHONE_RESOLUTIONS[resolution]
+    img = generate_photo(width, height)
+    return {
+        "jpeg": ("photo.jpg", encode(img, "JPEG", quality=92)),
+        "png": ("photo.png", encode(img, "PNG")),
+        "png_alpha": ("photo_alpha.png", encode(generate_photo(width, height, alpha=True), "PNG")),
+        "webp": ("photo.webp", encode(img, "WEBP", quality=90)),
+        "gif": ("animation.gif", generate_gif(*GIF_RESOLUTION)),
+    }
@@ -0,0 +1,84 @@
+"""
+Compare les moteurs de traitement d'image (Pillow, libvips) sur le corpus de reference.
+
+Usage (depuis backend/) :
+    python -m benchmarks.engines [--runs 5]
+
+Verifie aussi que les PNG produits par libvips ne sont pas plus lourds que
+ceux de Pillow (code 1 sinon).
+"""
+import argparse
+import statistics
+import sys
+import time
+from app.utils.image_compression import RENDITION_SIZES, generate_renditions, get_image_engine
+from benchmarks.corpus import build_format_corpus, build_corpus
+
+ENGINES = ["pillow", "vips"]
+
+# Ecart de taille tolere entre les PNG libvips et Pillow
+PNG_SIZE_TOLERANCE = 1.05
+
+
+def bench_engine(engine: str, corpus: list[tuple[str, str, bytes]], runs: int) -> dict:
+    """Mesure la generation des renditions d'upload pour chaque image du corpus."""
+    results = {}
+    for name, _, content in corpus:
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            renditions, _ = generate_renditions(content, RENDITION_SIZES, engine=engine)
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = {
+            "median_ms": statistics.median(timings),
+            "output_bytes": sum(len(data) for data, _ in renditions.values()),
+        }
+    return results
+
+
+def check_png_sizes(engines: list[str]) -> list[str]:
+    """Compare la taille des renditions PNG de chaque moteur a celles de Pillow. Retourne les ecarts."""
+    failures = []
+    for fmt, (filename, content) in build_format_corpus("fhd").items():
+        if fmt not in ("png", "png_alpha"):
+            continue
+        sizes = {}
+        for engine in engines:
+            renditions, _ = generate_renditions(content, RENDITION_SIZES, output_format="PNG", engine=engine)
+            sizes[engine] = sum(len(data) for data, _ in renditions.values())
+        print(f"{filename:<16}" + "".join(f"{sizes[engine] / 1024:>14.1f}" for engine in engines))
+        for engine in engines:
+            if sizes[engine] > sizes["pillow"] * PNG_SIZE_TOLERANCE:
+                failures.append(f"{engine} {filename}: {sizes[engine]} bytes vs {sizes['pillow']} (pillow)")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Nombre d'executions par image")
+    args = parser.parse_args()
+
+    corpus = build_corpus()
+    engines = [engine for engine in ENGINES if get_image_engine(engine).name == engine]
+
+    print(f"📊 Renditions {', '.join(RENDITION_SIZES)} - {args.runs} runs par image\n")
+    print(f"{'image':<12}" + "".join(f"{engine + ' ms':>14}{engine + ' KB':>14}" for engine in engines))
+
+    results = {engine: bench_engine(engine, corpus, args.runs) for engine in engines}
+    for name, _, _ in corpus:
+        row = f"{name:<12}"
+        for engine in engines:
+            result = results[engine][name]
+            row += f"{result['median_ms']:>14.1f}{result['output_bytes'] / 1024:>14.1f}"
+        print(row)
+
+    print("\n📊 Renditions PNG (KB)\n")
+    print(f"{'image':<16}" + "".join(f"{engine + ' KB':>14}" for engine in engines))
+    failures = check_png_sizes(engines)
+    if failures:
+        print("\n❌ PNG output larger than Pillow's:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
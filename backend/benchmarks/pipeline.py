@@ -0,0 +1,232 @@
+"""
+Benchmark du pipeline d'upload des images : validate_image_file, compress_image
+et compress_renditions (chemin d'upload, avec chaque moteur disponible) sur le
+corpus de reference (JPEG, PNG avec et sans alpha, WebP, GIF anime) aux
+resolutions des telephones.
+
+Pour chaque fonction et chaque format : debit (images/s), latences p50 et p99,
+pic de RSS et taille de sortie. Chaque cas tourne dans un processus neuf pour
+que le pic de RSS lui soit propre.
+
+Usage (depuis backend/) :
+    python -m benchmarks.pipeline                # mesure et affiche
+    python -m benchmarks.pipeline --save         # enregistre la baseline
+    python -m benchmarks.pipeline --compare      # compare a la baseline (code 1 si regression)
+
+Les baselines dependent de la machine : les regenerer avec --save sur la
+machine de reference apres un changement volontaire du pipeline.
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from benchmarks.corpus import PHONE_RESOLUTIONS, build_format_corpus
+
+BASELINES_DIR = Path(__file__).parent / "baselines"
+CORPUS_CACHE_DIR = Path(tempfile.gettempdir()) / "closo_bench_corpus"
+
+FUNCTIONS = [
+    "validate_image_file",
+    "compress_image",
+    "compress_renditions[pillow]",
+    "compress_renditions[vips]",
+]
+
+# Seuils de regression du mode --compare
+MAX_LATENCY_REGRESSION = 0.15  # +15% sur p50
+MAX_RSS_REGRESSION = 0.15
+MAX_OUTPUT_REGRESSION = 0.02
+MIN_LATENCY_DELTA_MS = 1.0  # En dessous, l'ecart est du bruit de mesure
+
+
+def load_corpus(resolution: str) -> dict[str, Path]:
+    """Genere le corpus une seule fois et le garde sur disque pour les processus de mesure."""
+    corpus_dir = CORPUS_CACHE_DIR / resolution
+    if not corpus_dir.exists():
+        print(f"🖼️  Generating {resolution} corpus in {corpus_dir}...")
+        tmp_dir = corpus_dir.with_suffix(".tmp")
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        for fmt, (filename, content) in build_format_corpus(resolution).items():
+            (tmp_dir / f"{fmt}__{filename}").write_bytes(content)
+        tmp_dir.rename(corpus_dir)
+
+    return {path.name.split("__", 1)[0]: path for path in corpus_dir.iterdir()}
+
+
+def _reset_peak_rss() -> None:
+    """
+    Remet a zero le pic de RSS du processus (Linux uniquement) : sinon un
+    processus lance depuis le parent herite de son pic (generation du corpus).
+    """
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb() -> float:
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sur macOS, en kilo-octets sur Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _engine(function: str) -> str:
+    """Moteur d'une fonction parametree : "compress_renditions[vips]" -> "vips"."""
+    return function.partition("[")[2].rstrip("]")
+
+
+def _available(function: str) -> bool:
+    if _engine(function) != "vips":
+        return True
+    from app.utils.vips_engine import HAS_VIPS
+
+    return HAS_VIPS
+
+
+def run_case(function: str, path: Path, runs: int, warmup: int) -> dict:
+    """Execute une fonction du pipeline sur une image (dans un processus dedie)."""
+    from fastapi import UploadFile
+    from app.utils.file_validation import validate_image_file
+    from app.utils.image_compression import compress_image, compress_renditions
+
+    content = path.read_bytes()
+    filename = path.name.split("__", 1)[1]
+
+    def call() -> int:
+        if function == "validate_image_file":
+            validate_image_file(UploadFile(io.BytesIO(content), filename=filename), max_size=len(content))
+            return 0
+        if function == "compress_image":
+            return len(compress_image(content)[0])
+        renditions, _ = compress_renditions(content, filename, engine=_engine(function))
+        return sum(rendition_file.seek(0, 2) for rendition_file, _ in renditions.values())
+
+    _reset_peak_rss()
+    for _ in range(warmup):
+        call()
+
+    timings = []
+    output_bytes = 0
+    start_all = time.perf_counter()
+    for _ in range(runs):
+        start = time.perf_counter()
+        output_bytes = call()
+        timings.append((time.perf_counter() - start) * 1000)
+    elapsed = time.perf_counter() - start_all
+
+    percentiles = statistics.quantiles(timings, n=100, method="inclusive")
+    return {
+        "input_bytes": len(content),
+        "throughput": runs / elapsed,
+        "p50_ms": percentiles[49],
+        "p99_ms": percentiles[98],
+        "peak_rss_mb": _peak_rss_mb(),
+        "output_bytes": output_bytes,
+    }
+
+
+def run_suite(resolution: str, runs: int, warmup: int) -> dict:
+    corpus = load_corpus(resolution)
+    results = {}
+    # Un processus neuf par cas : le pic de RSS d'un format ne pollue pas les suivants
+    context = multiprocessing.get_context("spawn")
+    for function in FUNCTIONS:
+        if not _available(function):
+            print(f"⚠️  Skipping {function}: engine unavailable")
+            continue
+        results[function] = {}
+        for fmt, path in sorted(corpus.items()):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                results[function][fmt] = pool.submit(run_case, function, path, runs, warmup).result()
+    return results
+
+
+def print_results(results: dict, baseline: dict | None = None) -> list[str]:
+    """Affiche les resultats (et les ecarts a la baseline). Retourne les regressions."""
+    regressions = []
+    header = f"{'format':<11}{'img/s':>9}{'p50 ms':>10}{'p99 ms':>10}{'RSS MB':>9}{'out KB':>10}"
+    for function, formats in results.items():
+        print(f"\n📊 {function}")
+        print(header + ("   vs baseline" if baseline else ""))
+        for fmt, result in formats.items():
+            row = (
+                f"{fmt:<11}{result['throughput']:>9.2f}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                f"{result['peak_rss_mb']:>9.0f}{result['output_bytes'] / 1024:>10.1f}"
+            )
+            reference = (baseline or {}).get(function, {}).get(fmt)
+            if reference:
+                row += "   " + _compare(function, fmt, result, reference, regressions)
+            print(row)
+    return regressions
+
+
+def _compare(function: str, fmt: str, result: dict, reference: dict, regressions: list[str]) -> str:
+    if result["input_bytes"] != reference["input_bytes"]:
+        # Corpus different (autre version de Pillow/zlib) : tailles non comparables
+        return "⚠️  corpus differs from baseline"
+
+    deltas = []
+    for metric, threshold in (
+        ("p50_ms", MAX_LATENCY_REGRESSION),
+        ("peak_rss_mb", MAX_RSS_REGRESSION),
+        ("output_bytes", MAX_OUTPUT_REGRESSION),
+    ):
+        if not reference[metric]:
+            continue
+        delta = result[metric] / reference[metric] - 1
+        deltas.append(f"{metric} {delta:+.1%}")
+        if metric == "p50_ms" and result[metric] - reference[metric] < MIN_LATENCY_DELTA_MS:
+            continue
+        if delta > threshold:
+            regressions.append(f"{function}/{fmt}: {metric} {delta:+.1%} (max {threshold:+.0%})")
+    return ", ".join(deltas)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolution", choices=PHONE_RESOLUTIONS, default="12mp")
+    parser.add_argument("--runs", type=int, default=10, help="Nombre d'executions mesurees par cas")
+    parser.add_argument("--warmup", type=int, default=1, help="Executions non mesurees par cas")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--save", action="store_true", help="Enregistrer les resultats comme baseline")
+    mode.add_argument("--compare", action="store_true", help="Comparer a la baseline enregistree")
+    args = parser.parse_args()
+
+    baseline_path = BASELINES_DIR / f"pipeline_{args.resolution}.json"
+    baseline = None
+    if args.compare:
+        if not baseline_path.exists():
+            sys.exit(f"❌ No baseline at {baseline_path}, run with --save first")
+        baseline = json.loads(baseline_path.read_text())["results"]
+
+    results = run_suite(args.resolution, args.runs, args.warmup)
+    regressions = print_results(results, baseline)
+
+    if args.save:
+        BASELINES_DIR.mkdir(exist_ok=True)
+        payload = {"resolution": args.resolution, "runs": args.runs, "results": results}
+        baseline_path.write_text(json.dumps(payload, indent=2) + "\n")
+        print(f"\n✅ Baseline saved to {baseline_path}")
+
+    if regressions:
+        print("\n❌ Regressions:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Configuration minimale pour importer l'application sans fichier .env :
+les tests unitaires n'ouvrent aucune connexion a la base ni au slave.
+"""
+import os
+
+for name, value in {
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_USERNAME": "test",
+    "DB_PASSWORD": "test",
+    "DB_DATABASE": "test",
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "STORAGE_SIGNING_KEY": "test-signing-key",
+}.items():
+    os.environ.setdefault(name, value)
+
+import pytest  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from sqlmodel import Session, SQLModel, create_engine  # noqa: E402
+
+# Toutes les tables dans SQLModel.metadata
+from app.entities import group, groupmember, idempotency_key, import_job, media, post, role, user  # noqa: E402,F401
+
+
+@pytest.fixture
+def db():
+    """Base SQLite en memoire avec toutes les tables (cles etrangeres non verifiees)."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
@@ -0,0 +1,69 @@
+import asyncio
+from datetime import datetime, timezone
+
+from app.entities.media import Media
+from app.entities.post import Post
+from app.services import album_export
+from app.services.album_export import AlbumEntry
+from app.utils.zip_stream import ZipLayout
+
+
+def test_legacy_media_use_post_date(db):
+    db.add(Post(id=1, group_id=1, created_at=datetime(2023, 1, 2, 3, 4, 5, tzinfo=timezone.utc)))
+    db.add(Media(id=1, post_id=1, group_id=1, media_url="/media/proxy/a", order=0))
+    db.add(Media(
+        id=2, post_id=1, group_id=1, media_url="/media/proxy/b", order=1,
+        captured_at=datetime(2022, 6, 1, tzinfo=timezone.utc),
+    ))
+    db.commit()
+
+    medias = album_export._group_medias(db, 1)
+    assert [(media.id, captured_at.replace(tzinfo=None)) for media, captured_at in medias] == [
+        (2, datetime(2022, 6, 1)),
+        (1, datetime(2023, 1, 2, 3, 4, 5)),
+    ]
+
+
+class FakeResponse:
+    """Reponse du slave en streaming dont on verifie la fermeture."""
+
+    opened: list["FakeResponse"] = []
+
+    def __init__(self, size: int):
+        self.size = size
+        self.closed = False
+        FakeResponse.opened.append(self)
+
+    async def aiter_raw(self, chunk_size: int):
+        for _ in range(self.size):
+            yield b"x"
+            await asyncio.sleep(0)
+
+    async def aclose(self):
+        self.closed = True
+
+
+def test_stream_album_stops_prefetch_when_closed(monkeypatch):
+    FakeResponse.opened = []
+
+    async def open_file_stream(file_id: str):
+        return FakeResponse(1000)
+
+    monkeypatch.setattr(album_export.orchestrator, "open_file_stream", open_file_stream)
+    monkeypatch.setattr(album_export, "save_checksums", lambda entries: None)
+    layout = ZipLayout([
+        AlbumEntry(f"{index}.jpg", 1000, datetime(2024, 1, 1), f"file-{index}", index, None)
+        for index in range(4)
+    ])
+
+    async def run():
+        stream = album_export.stream_album(layout, 0, layout.total_size - 1)
+        await anext(stream)
+        # Les lectures en avance sont lancees
+        await asyncio.sleep(0.01)
+        await stream.aclose()
+        # Laisser les taches annulees se terminer
+        await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert FakeResponse.opened and all(response.closed for response in FakeResponse.opened)
@@ -0,0 +1,199 @@
+import asyncio
+import io
+import random
+import tarfile
+import zipfile
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+from sqlmodel import select
+
+from app.entities.group import Group
+from app.entities.groupmember import GroupMember
+from app.entities.import_job import ImportJob
+from app.entities.media import Media
+from app.services import album_import
+from app.utils.core.config import settings
+from app.utils.duplicate_index import duplicate_index
+
+
+def make_image(seed: int, noise: int = 0) -> bytes:
+    """PNG 64x64 aleatoire ; noise modifie quelques pixels (quasi-doublon)."""
+    rng = random.Random(seed)
+    image = Image.new("L", (8, 8))
+    image.putdata([rng.randrange(256) for _ in range(64)])
+    image = image.resize((64, 64)).convert("RGB")
+    for index in range(noise):
+        image.putpixel((index, 0), (255, 255, 255))
+    output = io.BytesIO()
+    image.save(output, "PNG")
+    return output.getvalue()
+
+
+def write_zip(path, files: dict[str, bytes]) -> None:
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+
+
+class FakeSlave:
+    """Remplace le slave : enregistre les fichiers envoyes et supprimes."""
+
+    def __init__(self):
+        self.saved: list[str] = []
+        self.deleted: list[str] = []
+
+    def save_media_batch(self, files: list[tuple]) -> list[str]:
+        urls = [f"/media/proxy/file-{len(self.saved) + index}" for index in range(len(files))]
+        self.saved += urls
+        return urls
+
+    def delete_file_from_slave(self, file_id: str) -> dict:
+        self.deleted.append(f"/media/proxy/{file_id}")
+        return {}
+
+
+@pytest.fixture
+def slave(monkeypatch):
+    fake = FakeSlave()
+    monkeypatch.setattr(album_import.orchestrator, "save_media_batch", fake.save_media_batch)
+    monkeypatch.setattr(album_import.orchestrator, "delete_file_from_slave", fake.delete_file_from_slave)
+    return fake
+
+
+@pytest.fixture
+def job(db):
+    db.add(Group(id=1, nom="Album", user_creator_id=1, max_photos=10))
+    db.add(GroupMember(id=1, user_id=1, group_id=1))
+    job = ImportJob(user_id=1, group_id=1, caption="Import")
+    db.add(job)
+    db.commit()
+    duplicate_index.invalidate(1)
+    yield job
+    duplicate_index.invalidate(1)
+
+
+def test_zip_entries_skip_hidden_and_non_images(tmp_path):
+    path = tmp_path / "album.zip"
+    write_zip(path, {
+        "a.jpg": b"a",
+        "photos/b.PNG": b"bb",
+        "notes.txt": b"x",
+        ".hidden.jpg": b"x",
+        "__MACOSX/photos/._b.PNG": b"x",
+    })
+    entries = [(name, size, read()) for name, size, read in album_import._archive_entries(path)]
+    assert entries == [("a.jpg", 1, b"a"), ("photos/b.PNG", 2, b"bb")]
+
+
+def test_tar_gz_entries(tmp_path):
+    path = tmp_path / "album.tar.gz"
+    with tarfile.open(path, "w:gz") as archive:
+        for name, content in {"a.webp": b"abc", "b.doc": b"x"}.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    assert [(name, size, read()) for name, size, read in album_import._archive_entries(path)] == [("a.webp", 3, b"abc")]
+
+
+def test_unknown_archive_format(tmp_path):
+    path = tmp_path / "album.bin"
+    path.write_bytes(b"not an archive")
+    with pytest.raises(ValueError):
+        list(album_import._archive_entries(path))
+
+
+def test_receive_archive_size_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(album_import, "IMPORTS_DIR", tmp_path)
+    monkeypatch.setattr(settings, "IMPORT_MAX_ARCHIVE_BYTES", 10)
+
+    async def chunks(*parts):
+        for part in parts:
+            yield part
+
+    assert asyncio.run(album_import.receive_archive(1, chunks(b"12345", b"67890"))).read_bytes() == b"1234567890"
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(album_import.receive_archive(2, chunks(b"123456", b"789012")))
+    assert error.value.status_code == 413
+    assert not (tmp_path / "2.archive").exists()
+
+
+def test_import_skips_invalid_and_oversized_files(db, job, slave, tmp_path, monkeypatch):
+    monkeypatch.setattr(album_import, "MAX_UPLOAD_SIZE", 10_000)
+    path = tmp_path / "album.zip"
+    write_zip(path, {
+        "a.png": make_image(1),
+        "fake.jpg": b"not an image",
+        "big.png": make_image(2) + b"\0" * 10_000,
+        "b.png": make_image(3),
+    })
+    album_import._import_archive(db, job, path)
+
+    assert (job.total_files, job.processed_files, job.imported_files, job.skipped_files) == (4, 4, 2, 2)
+    assert job.post_count == 1
+    assert len(db.exec(select(Media)).all()) == 2
+
+
+def test_near_duplicates_within_a_batch(db, job, slave, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_DUPLICATE_POLICY", "flag")
+    path = tmp_path / "album.zip"
+    write_zip(path, {"a.png": make_image(1), "a-copy.png": make_image(1, noise=1), "b.png": make_image(3)})
+    album_import._import_archive(db, job, path)
+
+    medias = db.exec(select(Media).order_by(Media.id)).all()
+    assert [media.duplicate_of_id for media in medias] == [None, medias[0].id, None]
+
+
+def test_near_duplicates_rejected(db, job, slave, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_DUPLICATE_POLICY", "reject")
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+    path = tmp_path / "album.zip"
+    write_zip(path, {
+        "a.png": make_image(1),
+        "a-copy.png": make_image(1, noise=1),  # meme lot
+        "b.png": make_image(3),
+        "a-again.png": make_image(1, noise=2),  # lot suivant
+    })
+    album_import._import_archive(db, job, path)
+
+    assert (job.imported_files, job.skipped_files) == (2, 2)
+
+
+def test_quota_checked_for_each_batch(db, job, slave, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "MEDIA_DUPLICATE_POLICY", "off")
+    group = db.get(Group, 1)
+    group.max_photos = 3
+    db.commit()
+
+    flush_batch = album_import._flush_batch
+
+    def concurrent_upload(db, *args):
+        # Une photo ajoutee au groupe pendant l'import, avant le premier lot
+        if not db.exec(select(Media)).first():
+            db.add(Media(post_id=999, group_id=1, media_url="/media/proxy/other", order=0))
+            db.commit()
+        flush_batch(db, *args)
+
+    monkeypatch.setattr(album_import, "_flush_batch", concurrent_upload)
+    path = tmp_path / "album.zip"
+    write_zip(path, {f"{seed}.png": make_image(seed) for seed in range(3)})
+    album_import._import_archive(db, job, path)
+
+    # 3 photos acceptees au depart, mais une ajoutee par ailleurs
+    assert len(db.exec(select(Media).where(Media.group_id == 1)).all()) == 3
+    assert (job.imported_files, job.skipped_files) == (2, 1)
+    assert job.error_message.startswith("Group quota reached")
+
+
+def test_failed_insert_deletes_uploaded_files(db, job, slave, tmp_path, monkeypatch):
+    def failing_insert(*args):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(album_import, "_insert_medias", failing_insert)
+    path = tmp_path / "album.zip"
+    write_zip(path, {"a.png": make_image(1)})
+    with pytest.raises(RuntimeError):
+        album_import._import_archive(db, job, path)
+    assert slave.saved and sorted(slave.deleted) == sorted(slave.saved)
@@ -0,0 +1,64 @@
+import io
+
+from PIL import Image, ImageSequence
+
+from app.utils import image_compression
+from app.utils.image_compression import compress_renditions, is_animated_gif, transcode_animated_gif
+
+
+def make_gif(frames: int = 3, size: tuple[int, int] = (120, 60)) -> bytes:
+    images = [Image.new("RGB", size, (80 * index, 40, 200)) for index in range(frames)]
+    output = io.BytesIO()
+    images[0].save(output, "GIF", save_all=True, append_images=images[1:], duration=[50, 100, 150][:frames], loop=0)
+    return output.getvalue()
+
+
+def test_is_animated_gif():
+    assert is_animated_gif(make_gif())
+    assert not is_animated_gif(make_gif(frames=1))
+    assert not is_animated_gif(b"not an image")
+
+
+def test_transcode_to_animated_webp_keeps_frames_and_durations():
+    content, extension = transcode_animated_gif(make_gif(), max_dimension=60)
+    img = Image.open(io.BytesIO(content))
+
+    assert (extension, img.format, img.n_frames) == (".webp", "WEBP", 3)
+    assert img.size == (60, 30)
+    durations = []
+    for frame in ImageSequence.Iterator(img):
+        frame.load()  # La duree n'est lue qu'au decodage de l'image
+        durations.append(frame.info["duration"])
+    assert durations == [50, 100, 150]
+
+
+def test_mp4_falls_back_to_webp_without_ffmpeg(monkeypatch):
+    monkeypatch.setattr(image_compression.shutil, "which", lambda name: None)
+    _, extension = transcode_animated_gif(make_gif(), target_format="mp4")
+    assert extension == ".webp"
+
+
+def test_animated_gif_renditions():
+    sizes = {"thumb": 32, "medium": 64, "full": 2048}
+    renditions, metadata = compress_renditions(make_gif(), "anim.gif", sizes=sizes, keep_original_gif=True)
+
+    full = Image.open(renditions["full"][0])
+    assert (renditions["full"][1], full.n_frames) == (".webp", 3)
+    # Vignettes fixes (premiere image) pour la grille
+    for name, side in (("thumb", 32), ("medium", 64)):
+        content, extension = renditions[name]
+        still = Image.open(content)
+        assert (extension, still.format, max(still.size)) == (".jpg", "JPEG", side)
+    assert renditions["original"][1] == ".gif"
+    assert (metadata["width"], metadata["height"]) == (120, 60)
+
+
+def test_gif_kept_as_is():
+    gif = make_gif()
+    renditions, _ = compress_renditions(gif, "anim.gif", gif_format=None)
+    assert list(renditions) == ["full"]
+    assert renditions["full"][0].read() == gif
+
+    still = make_gif(frames=1)
+    renditions, _ = compress_renditions(still, "still.gif")
+    assert renditions["full"][0].read() == still
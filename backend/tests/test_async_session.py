@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.entities.group import Group
+from app.entities.groupmember import GroupMember
+from app.repositories.group_repository import AsyncGroupRepository
+from app.repositories.groupmember_repository import AsyncGroupMemberRepository
+from app.services.idempotency import fingerprint, run_idempotent_async
+
+pytest.importorskip("aiosqlite")
+
+
+def run_with_session(test):
+    """Execute test(session) sur une base SQLite en memoire via le pilote aiosqlite."""
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all)
+        # Memes options que async_session_maker de l'application
+        async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+            result = await test(session)
+        await engine.dispose()
+        return result
+
+    return asyncio.run(run())
+
+
+def test_async_repositories():
+    async def test(db):
+        groups, members = AsyncGroupRepository(), AsyncGroupMemberRepository()
+        group = await groups.save(db, Group(nom="Vacances", user_creator_id=1))
+        await members.save(db, GroupMember(user_id=1, group_id=group.id))
+        await groups.save(db, Group(nom="Autre", user_creator_id=2))
+
+        # Attribut lisible apres commit sans rechargement (expire_on_commit=False)
+        updated = await groups.save(db, Group(id=group.id, nom="Ete"))
+        return (
+            updated.nom,
+            [g.nom for g in await groups.get_groups_by_user_id(db, 1)],
+            await members.count_members_in_group(db, group.id),
+            await members.get_by_user_and_group(db, 2, group.id),
+        )
+
+    assert run_with_session(test) == ("Ete", ["Ete"], 1, None)
+
+
+def test_run_idempotent_async_replays_and_rejects_other_parameters():
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        return {"id": len(calls)}
+
+    async def test(db):
+        first = await run_idempotent_async(db, 1, "key", "POST /posts", fingerprint("a"), handler, status_code=201)
+        replay = await run_idempotent_async(db, 1, "key", "POST /posts", fingerprint("a"), handler, status_code=201)
+        with pytest.raises(HTTPException) as error:
+            await run_idempotent_async(db, 1, "key", "POST /posts", fingerprint("b"), handler)
+        return first, replay, error.value.status_code
+
+    first, replay, conflict = run_with_session(test)
+    assert calls == [1]
+    assert (first.status_code, replay.status_code, conflict) == (201, 201, 422)
+    assert json.loads(replay.body) == {"id": 1}
+    assert replay.headers["Idempotent-Replayed"] == "true"
+
+
+def test_run_idempotent_async_releases_key_on_failure():
+    async def failing():
+        raise RuntimeError("slave unavailable")
+
+    async def succeeding():
+        return {"id": 1}
+
+    async def test(db):
+        with pytest.raises(RuntimeError):
+            await run_idempotent_async(db, 1, "key", "POST /posts", fingerprint("a"), failing)
+        # La cle liberee peut etre reutilisee pour reessayer
+        return await run_idempotent_async(db, 1, "key", "POST /posts", fingerprint("a"), succeeding)
+
+    assert json.loads(run_with_session(test).body) == {"id": 1}
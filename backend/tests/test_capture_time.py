@@ -0,0 +1,73 @@
+import io
+from datetime import datetime, timezone
+
+import pytest
+from PIL import ExifTags, Image
+
+from app.entities.groupmember import GroupMember
+from app.entities.media import Media
+from app.entities.user import User
+from app.routers.media import get_medias_by_group_id
+from app.utils.image_compression import (
+    EXIF_DATETIME_ORIGINAL,
+    EXIF_OFFSET_TIME_ORIGINAL,
+    generate_renditions,
+    parse_exif_datetime,
+)
+
+
+@pytest.mark.parametrize("value, offset, expected", [
+    ("2023:07:14 18:30:05", None, datetime(2023, 7, 14, 18, 30, 5)),
+    ("2023:07:14 18:30:05", "+02:00", datetime(2023, 7, 14, 16, 30, 5)),
+    ("2023:07:14 01:00:00", "-05:30", datetime(2023, 7, 14, 6, 30)),
+    ("2023:12:31 23:30:00", "-01:00", datetime(2024, 1, 1, 0, 30)),
+    ("2023:07:14 18:30:05\x00", "+02:00\x00", datetime(2023, 7, 14, 16, 30, 5)),
+    ("2023:07:14 18:30:05", "invalid", datetime(2023, 7, 14, 18, 30, 5)),
+    ("0000:00:00 00:00:00", None, None),
+    ("", None, None),
+    (None, "+02:00", None),
+])
+def test_parse_exif_datetime(value, offset, expected):
+    assert parse_exif_datetime(value, offset) == expected
+
+
+def make_photo(date: str, offset: str = None) -> bytes:
+    exif = Image.Exif()
+    exif_ifd = exif.get_ifd(ExifTags.IFD.Exif)
+    exif_ifd[EXIF_DATETIME_ORIGINAL] = date
+    if offset:
+        exif_ifd[EXIF_OFFSET_TIME_ORIGINAL] = offset
+    output = io.BytesIO()
+    Image.new("RGB", (64, 48), (10, 20, 30)).save(output, "JPEG", exif=exif)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("engine", ["pillow", "vips"])
+def test_renditions_report_capture_time(engine):
+    if engine == "vips":
+        pytest.importorskip("pyvips")
+    _, metadata = generate_renditions(make_photo("2023:07:14 18:30:05", "+02:00"), engine=engine)
+    assert metadata["captured_at"] == datetime(2023, 7, 14, 16, 30, 5)
+
+    _, metadata = generate_renditions(make_photo("0000:00:00 00:00:00"), engine=engine)
+    assert metadata["captured_at"] is None
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_group_gallery_sorted_by_capture_date(db):
+    db.add(GroupMember(id=1, user_id=1, group_id=1))
+    for media_id, captured_at in ((1, utc(2023, 5, 1)), (2, None), (3, utc(2024, 1, 1)), (4, utc(2022, 1, 1))):
+        db.add(Media(id=media_id, post_id=1, group_id=1, media_url=f"/media/proxy/{media_id}", captured_at=captured_at))
+    db.commit()
+    user = User(id=1, email="a@example.com", hashed_password="", role_id=1)
+
+    def gallery(**filters) -> list[int]:
+        return [media.id for media in get_medias_by_group_id(1, db=db, current_user=user, **filters)]
+
+    # Plus recents en premier, medias sans date en fin de galerie
+    assert gallery() == [3, 1, 4, 2]
+    assert gallery(skip=1, limit=2) == [1, 4]
+    assert gallery(captured_after=utc(2023, 1, 1), captured_before=utc(2024, 1, 1)) == [1]
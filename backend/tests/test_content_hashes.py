@@ -0,0 +1,72 @@
+import hashlib
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.entities.groupmember import GroupMember
+from app.entities.media import Media
+from app.entities.post import Post
+from app.routers.post import verify_content_hashes
+from app.services import media_service
+from app.utils.core.config import settings
+from app.utils.duplicate_index import duplicate_index
+
+
+def sha256(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def test_verify_content_hashes():
+    files = [UploadFile(io.BytesIO(b"a"), filename="a.jpg"), UploadFile(io.BytesIO(b"b"), filename="b.jpg")]
+    verify_content_hashes(files, [sha256(b"a"), sha256(b"b")])
+    # Les fichiers restent lisibles depuis le debut apres la verification
+    assert files[0].file.read() == b"a"
+
+    with pytest.raises(HTTPException) as error:
+        verify_content_hashes(files, [sha256(b"a"), sha256(b"a")])
+    assert error.value.status_code == 400
+    assert (error.value.detail["error"], error.value.detail["filenames"]) == ("hash_mismatch", ["b.jpg"])
+
+
+@pytest.fixture
+def group_media(db):
+    """Un media dans le groupe 1 (dont l'utilisateur 1 est membre) et un dans le groupe 2."""
+    db.add(GroupMember(user_id=1, group_id=1))
+    db.add(Post(id=1, group_id=1))
+    db.add(Post(id=2, group_id=2))
+    source = Media(
+        id=1, post_id=1, group_id=1, media_url="/media/proxy/a", thumbnail_url="/media/proxy/a-thumb",
+        dhash="0f0f0f0f0f0f0f0f", content_sha256=sha256(b"a"),
+    )
+    db.add(source)
+    db.add(Media(id=2, post_id=2, group_id=2, media_url="/media/proxy/b", content_sha256=sha256(b"b")))
+    db.commit()
+    duplicate_index.invalidate(1)
+    yield source
+    duplicate_index.invalidate(1)
+
+
+def test_known_hashes_are_limited_to_user_groups(db, group_media):
+    known = media_service.find_known_hashes(db, 1, [sha256(b"a"), sha256(b"b"), sha256(b"c")])
+    assert {content_hash: media.id for content_hash, media in known.items()} == {sha256(b"a"): 1}
+    assert media_service.find_known_hashes(db, 1, []) == {}
+
+
+def test_attach_by_reference_reuses_files_without_self_match(db, group_media, monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_DUPLICATE_POLICY", "reject")
+    attached = media_service.attach_by_reference(db, db.get(Post, 1), 3, group_media)
+
+    assert (attached.media_url, attached.thumbnail_url, attached.order) == ("/media/proxy/a", "/media/proxy/a-thumb", 3)
+    assert attached.content_sha256 == sha256(b"a") and attached.duplicate_of_id is None
+    # Une seconde reference ne bute pas non plus sur la premiere
+    assert media_service.attach_by_reference(db, db.get(Post, 1), 4, group_media).duplicate_of_id is None
+
+
+def test_attach_by_reference_flags_other_near_duplicates(db, group_media, monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_DUPLICATE_POLICY", "flag")
+    db.add(Media(id=3, post_id=1, group_id=1, media_url="/media/proxy/c", dhash="0f0f0f0f0f0f0f0e", content_sha256=sha256(b"c")))
+    db.commit()
+
+    attached = media_service.attach_by_reference(db, db.get(Post, 1), 5, group_media)
+    assert attached.duplicate_of_id == 3
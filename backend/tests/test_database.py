@@ -0,0 +1,35 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from app.utils.core.config import settings
+from app.utils.core.database import PoolMetrics
+
+
+def test_pool_metrics_from_events(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 1)
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}", poolclass=QueuePool, pool_size=1, max_overflow=1)
+    metrics = PoolMetrics()
+    metrics.attach(engine)
+
+    with engine.connect() as first:
+        first.execute(text("SELECT 1"))
+        with engine.connect() as second:
+            second.execute(text("SELECT 1"))
+    with engine.connect() as third:
+        third.execute(text("SELECT 1"))
+
+    stats = metrics.stats(engine.pool)
+    assert stats["checkouts"] == 3
+    assert stats["peak_checked_out"] == 2
+    assert stats["saturated"] == 1  # La deuxieme connexion a rempli le pool
+    assert stats["connections_opened"] == 2
+    assert stats["avg_connect_ms"] is not None
+    assert stats["checked_out"] == 0
+    assert stats["avg_hold_ms"] > 0 and stats["max_hold_ms"] >= stats["avg_hold_ms"]
+
+    # Les evenements restent actifs apres engine.dispose() (nouveau pool)
+    engine.dispose()
+    with engine.connect():
+        pass
+    assert metrics.stats(engine.pool)["checkouts"] == 4
@@ -0,0 +1,60 @@
+import random
+
+from app.utils.duplicate_index import BKTree, DuplicateIndex, hamming_distance
+
+
+def test_hamming_distance():
+    assert hamming_distance(0b1011, 0b1011) == 0
+    assert hamming_distance(0b1011, 0b0010) == 2
+    assert hamming_distance(0, (1 << 64) - 1) == 64
+
+
+def test_search_matches_brute_force():
+    rng = random.Random(42)
+    values = [rng.getrandbits(64) for _ in range(500)]
+    # Quelques hash proches des premiers
+    values += [value ^ (1 << rng.randrange(64)) for value in values[:50]]
+    tree = BKTree()
+    for item, value in enumerate(values):
+        tree.add(value, item)
+    assert tree.size == len(values)
+
+    for query in values[:20] + [rng.getrandbits(64) for _ in range(20)]:
+        for max_distance in (0, 4, 10, 24):
+            expected = sorted(
+                (hamming_distance(query, value), item)
+                for item, value in enumerate(values)
+                if hamming_distance(query, value) <= max_distance
+            )
+            results = tree.search(query, max_distance)
+            assert sorted(results) == expected
+            assert [distance for distance, _ in results] == sorted(distance for distance, _ in results)
+
+
+def test_identical_hashes_share_a_node():
+    tree = BKTree()
+    tree.add(0xFF, "a")
+    tree.add(0xFF, "b")
+    tree.add(0xFE, "c")
+    assert tree.size == 3
+    assert sorted(tree.search(0xFF, 0)) == [(0, "a"), (0, "b")]
+    assert tree.search(0xFF, 1)[-1] == (1, "c")
+
+
+def test_empty_tree():
+    assert BKTree().search(0, 64) == []
+
+
+def test_duplicate_index_per_group():
+    index = DuplicateIndex()
+    index.add(1, 10, "00000000000000ff")
+    index.add(1, 12, "00000000000000fe")
+    index.add(2, 11, "00000000000000ff")
+
+    assert index.last_media_id(1) == 12
+    assert index.search(1, "00000000000000ff", 1) == [(0, 10), (1, 12)]
+    assert index.search(2, "00000000000000fe", 0) == []
+
+    index.invalidate(1)
+    assert index.last_media_id(1) == 0
+    assert index.search(1, "00000000000000ff", 64) == []
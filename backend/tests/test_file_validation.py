@@ -0,0 +1,92 @@
+import pytest
+from fastapi import APIRouter, FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+from app.utils.file_validation import StreamingUploadRoute, StreamingUploadValidator
+
+BOUNDARY = b"boundary"
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 100
+
+
+def multipart(*parts: tuple[str, str, bytes]) -> bytes:
+    """Corps multipart : (champ, nom de fichier ou "" pour un champ texte, contenu)."""
+    body = b""
+    for name, filename, content in parts:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+        body += b"--" + BOUNDARY + b"\r\nContent-Disposition: " + disposition.encode() + b"\r\n\r\n" + content + b"\r\n"
+    return body + b"--" + BOUNDARY + b"--\r\n"
+
+
+def feed(body: bytes, chunk_size: int = 7, **limits) -> StreamingUploadValidator:
+    validator = StreamingUploadValidator(BOUNDARY, **limits)
+    for start in range(0, len(body), chunk_size):
+        validator.feed(body[start:start + chunk_size])
+    return validator
+
+
+def rejected(body: bytes, **limits) -> str:
+    with pytest.raises(HTTPException) as error:
+        feed(body, **limits)
+    assert error.value.status_code == 400
+    return error.value.detail
+
+
+def test_valid_upload_with_text_fields():
+    validator = feed(multipart(("caption", "", b"hello.exe"), ("files", "a.png", PNG), ("files", "b.PNG", PNG)))
+    assert validator.file_count == 2
+
+
+def test_rejects_too_many_files():
+    assert "Trop de fichiers" in rejected(multipart(*[("files", f"{i}.png", PNG) for i in range(3)]), max_files=2)
+
+
+def test_rejects_extension_before_data():
+    assert "extension" in rejected(multipart(("files", "a.exe", PNG)))
+
+
+def test_rejects_spoofed_content():
+    assert "type de fichier" in rejected(multipart(("files", "a.png", b"MZ" + b"\0" * 100)))
+
+
+def test_rejects_empty_and_short_files():
+    assert "vide" in rejected(multipart(("files", "a.png", b"")))
+    assert "type de fichier" in rejected(multipart(("files", "a.png", b"GIF")))
+
+
+def test_rejects_oversized_file_while_streaming():
+    validator = StreamingUploadValidator(BOUNDARY, max_size=200)
+    body = multipart(("files", "a.png", PNG + b"\0" * 1000))
+    with pytest.raises(HTTPException):
+        # Le rejet a lieu avant la fin du corps
+        validator.feed(body[:400])
+
+
+def make_client(received: list) -> TestClient:
+    router = APIRouter(route_class=StreamingUploadRoute.with_limits(max_size=200, max_files=1))
+
+    @router.post("/upload")
+    def upload(files: list[UploadFile] = File(...)):
+        received.append(len(files))
+        return {"ok": True}
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_route_validates_before_handler():
+    received = []
+    client = make_client(received)
+    headers = {"content-type": "multipart/form-data; boundary=boundary"}
+
+    assert client.post("/upload", content=multipart(("files", "a.png", PNG)), headers=headers).status_code == 200
+    response = client.post("/upload", content=multipart(("files", "a.png", PNG), ("files", "b.png", PNG)), headers=headers)
+    assert response.status_code == 400
+    assert received == [1]
+
+
+def test_route_rejects_declared_length_over_limit():
+    client = make_client([])
+    body = multipart(("files", "a.png", PNG + b"\0" * (1024 * 1024 + 1000)))
+    response = client.post("/upload", content=body, headers={"content-type": "multipart/form-data; boundary=boundary"})
+    assert response.status_code == 413
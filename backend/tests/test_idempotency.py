@@ -0,0 +1,86 @@
+import io
+import json
+
+import pytest
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from app.services.idempotency import file_digest, fingerprint, run_idempotent
+
+ENDPOINT = "POST /posts"
+
+
+def test_without_key_runs_handler(db):
+    assert run_idempotent(db, 1, None, ENDPOINT, fingerprint("a"), lambda: {"id": 1}) == {"id": 1}
+
+
+def test_replay_returns_original_response(db):
+    calls = []
+
+    def handler():
+        calls.append(1)
+        return {"id": len(calls)}
+
+    first = run_idempotent(db, 1, "key", ENDPOINT, fingerprint("a"), handler)
+    replay = run_idempotent(db, 1, "key", ENDPOINT, fingerprint("a"), handler)
+    assert calls == [1]
+    assert json.loads(first.body) == json.loads(replay.body) == {"id": 1}
+    assert replay.headers["Idempotent-Replayed"] == "true"
+
+    # Une cle est propre a un utilisateur
+    run_idempotent(db, 2, "key", ENDPOINT, fingerprint("a"), handler)
+    assert calls == [1, 1]
+
+
+def test_key_reused_with_other_parameters(db):
+    run_idempotent(db, 1, "key", ENDPOINT, fingerprint("a"), lambda: {"id": 1})
+    with pytest.raises(HTTPException) as error:
+        run_idempotent(db, 1, "key", ENDPOINT, fingerprint("b"), lambda: {"id": 2})
+    assert error.value.status_code == 422
+
+
+def test_request_in_progress_conflicts(db):
+    def handler():
+        # Requete rejouee pendant que la premiere s'execute
+        run_idempotent(db, 1, "key", ENDPOINT, fingerprint("a"), lambda: {"id": 2})
+
+    with pytest.raises(HTTPException) as error:
+        run_idempotent(db, 1, "key", ENDPOINT, fingerprint("a"), handler)
+    assert error.value.status_code == 409
+
+
+def test_failure_releases_key(db):
+    def failing():
+        raise HTTPException(status_code=400, detail="invalid")
+
+    with pytest.raises(HTTPException):
+        run_idempotent(db, 1, "key", ENDPOINT, fingerprint("a"), failing)
+    response = run_idempotent(db, 1, "key", ENDPOINT, fingerprint("a"), lambda: {"id": 3})
+    assert json.loads(response.body) == {"id": 3}
+
+
+def test_key_too_long(db):
+    with pytest.raises(HTTPException) as error:
+        run_idempotent(db, 1, "k" * 256, ENDPOINT, fingerprint("a"), lambda: {})
+    assert error.value.status_code == 400
+
+
+def test_replay_keeps_status_code(db):
+    def created():
+        return JSONResponse(content={"id": 1}, status_code=201)
+
+    first = run_idempotent(db, 1, "key", ENDPOINT, fingerprint("a"), created)
+    replay = run_idempotent(db, 1, "key", ENDPOINT, fingerprint("a"), created)
+    assert first.status_code == replay.status_code == 201
+
+    default = run_idempotent(db, 1, "other", ENDPOINT, fingerprint("a"), lambda: {"id": 2}, status_code=202)
+    assert default.status_code == 202
+
+
+def test_fingerprint_includes_file_content():
+    same_name_and_size = [io.BytesIO(b"aaaa"), io.BytesIO(b"bbbb")]
+    digests = [file_digest(file) for file in same_name_and_size]
+    assert digests[0] != digests[1]
+    assert fingerprint([("a.jpg", 4, digests[0])]) != fingerprint([("a.jpg", 4, digests[1])])
+    # Position remise au debut pour les lectures suivantes
+    assert same_name_and_size[0].read() == b"aaaa"
@@ -0,0 +1,197 @@
+import io
+import random
+
+import pytest
+from PIL import Image
+
+from app.utils import image_compression
+from app.utils.image_compression import (
+    ImageEngine,
+    PillowEngine,
+    compute_blurhash,
+    compute_dhash,
+    compute_ssim,
+    encode_adaptive,
+    get_image_engine,
+    negotiate_image_format,
+    render_variant,
+    snap_variant_width,
+)
+from app.utils.duplicate_index import hamming_distance
+
+
+def test_image_engine_is_abstract():
+    with pytest.raises(TypeError):
+        ImageEngine()
+
+
+def test_unknown_engine_falls_back_without_caching(monkeypatch):
+    monkeypatch.setattr(image_compression, "_ENGINES", {"pillow": PillowEngine()})
+    assert isinstance(get_image_engine("vipz"), PillowEngine)
+    assert "vipz" not in image_compression._ENGINES
+
+
+def make_image(width: int, height: int, mode: str = "RGB", fmt: str = "JPEG") -> bytes:
+    image = Image.new(mode, (width, height), (200, 100, 50) if mode == "RGB" else (200, 100, 50, 128))
+    output = io.BytesIO()
+    image.save(output, fmt)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("width, expected", [(1, 160), (160, 160), (161, 320), (1500, 1600), (10_000, 2048)])
+def test_snap_variant_width(width, expected):
+    assert snap_variant_width(width) == expected
+
+
+def test_render_variant_resizes_without_upscaling():
+    content, content_type = render_variant(make_image(800, 400), width=320)
+    assert content_type == "image/jpeg"
+    assert Image.open(io.BytesIO(content)).size == (320, 160)
+
+    content, _ = render_variant(make_image(100, 50), width=320)
+    assert Image.open(io.BytesIO(content)).size == (100, 50)
+
+
+def test_render_variant_keeps_png_and_converts_on_request():
+    png = make_image(64, 64, "RGBA", "PNG")
+    content, content_type = render_variant(png)
+    assert content_type == "image/png"
+    assert Image.open(io.BytesIO(content)).mode == "RGBA"
+
+    content, content_type = render_variant(png, fmt="webp")
+    assert content_type == "image/webp"
+    assert Image.open(io.BytesIO(content)).format == "WEBP"
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, None),
+    ("image/*,*/*;q=0.8", None),  # image/* ne prouve pas le support de WebP
+    ("image/webp,*/*", "webp"),
+    ("image/avif;q=0.5,image/webp", "webp"),
+    ("image/webp;q=0,image/jpeg", None),
+    ("image/webp;q=abc", None),
+])
+def test_negotiate_image_format(accept, expected):
+    assert negotiate_image_format(accept, ["webp"]) == expected
+
+
+def test_negotiate_prefers_candidate_order_on_equal_quality(monkeypatch):
+    monkeypatch.setitem(image_compression.VARIANT_FORMATS, "avif", ("AVIF", "image/avif"))
+    assert negotiate_image_format("image/webp,image/avif", ["avif", "webp"]) == "avif"
+    assert negotiate_image_format("image/webp,image/avif;q=0.9", ["avif", "webp"]) == "webp"
+
+
+def test_render_variant_uses_negotiated_format_for_jpeg_only():
+    _, content_type = render_variant(make_image(64, 64), negotiated="webp")
+    assert content_type == "image/webp"
+
+    gif = make_image(64, 64, fmt="GIF")
+    _, content_type = render_variant(gif, negotiated="webp")
+    assert content_type == "image/jpeg"
+
+
+BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def decode_base83(value: str) -> int:
+    result = 0
+    for char in value:
+        result = result * 83 + BASE83.index(char)
+    return result
+
+
+def test_blurhash_of_uniform_image():
+    blurhash = compute_blurhash(Image.new("RGB", (300, 200), (200, 100, 50)))
+
+    # Taille (4x3 composantes), amplitude, couleur moyenne puis 11 composantes AC
+    assert len(blurhash) == 6 + 2 * 11
+    assert decode_base83(blurhash[0]) == 3 + 2 * 9
+    assert decode_base83(blurhash[2:6]) == (200 << 16) + (100 << 8) + 50
+
+
+def test_blurhash_components_and_gradient():
+    dark_left = Image.linear_gradient("L").rotate(90).convert("RGB")
+    dark_right = dark_left.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+
+    def horizontal_component(img: Image.Image) -> tuple[int, int, int]:
+        blurhash = compute_blurhash(img, components=(2, 1))
+        assert len(blurhash) == 6 + 2
+        return tuple(decode_base83(blurhash[6:8]) // 19 ** k % 19 for k in (2, 1, 0))
+
+    # 9 = composante nulle ; le signe suit le sens du degrade, identique sur les 3 canaux
+    r, g, b = horizontal_component(dark_left)
+    assert r == g == b < 9
+    r, g, b = horizontal_component(dark_right)
+    assert r == g == b > 9
+
+
+def test_image_metadata():
+    metadata = image_compression.compute_image_metadata(Image.new("RGB", (30, 20), (16, 32, 48)))
+    assert (metadata["width"], metadata["height"], metadata["dominant_color"]) == (30, 20, "#102030")
+    assert metadata["blurhash"] == compute_blurhash(Image.new("RGB", (30, 20), (16, 32, 48)))
+
+
+def make_photo(size: int = 256) -> Image.Image:
+    """Image texturee (degrade + bruit) : la qualite JPEG y a un effet mesurable."""
+    rng = random.Random(0)
+    noise = Image.new("L", (size, size))
+    noise.putdata([rng.randrange(256) for _ in range(size * size)])
+    gradient = Image.linear_gradient("L").resize((size, size))
+    return Image.merge("RGB", (gradient, noise, gradient.rotate(90)))
+
+
+def ssim_at(img: Image.Image, quality: int) -> float:
+    output = io.BytesIO()
+    img.save(output, "JPEG", quality=quality)
+    return compute_ssim(img, Image.open(output))
+
+
+def test_ssim_of_identical_and_degraded_images():
+    img = make_photo()
+    assert compute_ssim(img, img.copy()) == pytest.approx(1.0)
+    assert ssim_at(img, 30) < ssim_at(img, 90) < 1.0
+    # Trop petite pour un bloc : consideree identique
+    assert compute_ssim(Image.new("L", (4, 4)), Image.new("L", (4, 4), 255)) == 1.0
+
+
+def test_encode_adaptive_picks_lowest_quality_reaching_target():
+    img = make_photo()
+    target = ssim_at(img, 75)
+    content, extension, quality, ssim = encode_adaptive(
+        img, "JPEG", target_ssim=target, min_quality=40, max_quality=95, budget_ms=60_000, progressive=False
+    )
+
+    assert extension == ".jpg" and Image.open(io.BytesIO(content)).format == "JPEG"
+    assert 40 < quality <= 75 and ssim >= target
+    assert ssim_at(img, quality - 1) < target
+
+
+def test_encode_adaptive_falls_back_to_max_quality():
+    img = make_photo()
+    # Cible inatteignable, puis budget epuise : qualite maximale dans les deux cas
+    assert encode_adaptive(img, "JPEG", target_ssim=1.01, budget_ms=60_000)[2] == image_compression.MAX_ADAPTIVE_QUALITY
+    assert encode_adaptive(img, "JPEG", target_ssim=0.5, budget_ms=0)[2] == image_compression.MAX_ADAPTIVE_QUALITY
+
+
+def test_encode_adaptive_keeps_lossless_formats():
+    _, extension, quality, ssim = encode_adaptive(make_photo(32), "PNG", max_quality=90)
+    assert (extension, quality, ssim) == (".png", 90, 1.0)
+
+
+def test_dhash_is_stable_across_resizing_and_recompression():
+    img = make_photo()
+    dhash = compute_dhash(img)
+    assert len(dhash) == 16
+
+    output = io.BytesIO()
+    img.resize((200, 200)).save(output, "JPEG", quality=50)
+    near_duplicate = compute_dhash(Image.open(output))
+    other = compute_dhash(make_photo().transpose(Image.Transpose.FLIP_LEFT_RIGHT))
+
+    assert hamming_distance(int(dhash, 16), int(near_duplicate, 16)) <= 4
+    assert hamming_distance(int(dhash, 16), int(other, 16)) > 16
+
+
+def test_dhash_of_uniform_image():
+    assert compute_dhash(Image.new("RGB", (50, 50), (10, 20, 30))) == "0" * 16
+    assert len(compute_dhash(Image.new("RGB", (50, 50)), hash_size=16)) == 64
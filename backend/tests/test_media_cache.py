@@ -0,0 +1,180 @@
+import asyncio
+
+import pytest
+
+from app.utils.media_cache import DiskCache, LRUByteCache, SharedStream, SingleFlight, TieredCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUByteCache(10)
+    cache.set("a", b"1234", "image/jpeg")
+    cache.set("b", b"1234", "image/jpeg")
+    assert cache.get("a") == (b"1234", "image/jpeg")
+    cache.set("c", b"1234", "image/png")
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert (cache.current_bytes, cache.evictions) == (8, 1)
+
+
+def test_lru_replaces_entry_and_ignores_oversized():
+    cache = LRUByteCache(10)
+    cache.set("a", b"123456", "image/jpeg")
+    cache.set("a", b"12", "image/webp")
+    assert cache.get("a") == (b"12", "image/webp")
+    assert cache.current_bytes == 2
+
+    cache.set("big", b"x" * 11, "image/jpeg")
+    assert cache.get("big") is None and cache.get("a") is not None
+
+
+def test_lru_invalidate_prefix_and_stats():
+    cache = LRUByteCache(100)
+    cache.set("file:original", b"123", "image/jpeg")
+    cache.set("file:320::", b"12", "image/jpeg")
+    cache.set("other:original", b"1", "image/jpeg")
+    cache.invalidate_prefix("file:")
+
+    assert len(cache) == 1 and cache.current_bytes == 1
+    cache.get("other:original")
+    cache.get("file:original")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+
+def test_single_flight_runs_once_for_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return b"variant"
+
+    async def run():
+        return await asyncio.gather(*[flight.do("key", generate) for _ in range(5)])
+
+    assert asyncio.run(run()) == [b"variant"] * 5
+    assert len(calls) == 1
+
+
+def test_single_flight_shares_errors_then_retries():
+    flight = SingleFlight()
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0)
+        if len(calls) == 1:
+            raise ValueError("slave unavailable")
+        return b"ok"
+
+    async def run():
+        results = await asyncio.gather(flight.do("key", generate), flight.do("key", generate), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        # Une erreur n'est pas conservee : l'appel suivant relance la fonction
+        return await flight.do("key", generate)
+
+    assert asyncio.run(run()) == b"ok"
+    assert len(calls) == 2
+
+
+def test_single_flight_survives_leader_cancellation():
+    flight = SingleFlight()
+
+    async def generate():
+        await asyncio.sleep(0.01)
+        return b"variant"
+
+    async def run():
+        leader = asyncio.create_task(flight.do("key", generate))
+        follower = asyncio.create_task(flight.do("key", generate))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == b"variant"
+
+
+def test_disk_cache_round_trip_and_restart(tmp_path):
+    cache = DiskCache(str(tmp_path), 1000)
+    cache.set("file-1:original", b"jpeg bytes", "image/jpeg")
+    assert cache.get("file-1:original") == (b"jpeg bytes", "image/jpeg")
+    assert cache.get("file-1:320::") is None
+
+    # L'index est reconstruit depuis le repertoire au redemarrage
+    restarted = DiskCache(str(tmp_path), 1000)
+    assert restarted.get("file-1:original") == (b"jpeg bytes", "image/jpeg")
+    assert restarted.current_bytes == cache.current_bytes
+
+
+def test_disk_cache_evicts_and_invalidates(tmp_path):
+    cache = DiskCache(str(tmp_path), 80)  # Deux entrees de 31 octets (content-type compris)
+    cache.set("a:original", b"x" * 20, "image/jpeg")
+    cache.set("b:original", b"x" * 20, "image/jpeg")
+    cache.get("a:original")
+    cache.set("c:original", b"x" * 20, "image/jpeg")
+
+    assert cache.get("b:original") is None and cache.evictions == 1
+    assert len(list(tmp_path.iterdir())) == 2
+
+    cache.set("a:320::", b"x", "image/jpeg")
+    cache.invalidate_prefix("a:")
+    assert cache.get("a:original") is None and cache.get("a:320::") is None
+    assert cache.get("c:original") is not None
+
+
+def test_disk_cache_hashes_unsafe_file_ids(tmp_path):
+    cache = DiskCache(str(tmp_path), 1000)
+    cache.set("../../etc/passwd:original", b"x", "image/jpeg")
+    assert [path.parent for path in tmp_path.iterdir()] == [tmp_path]
+    assert cache.get("../../etc/passwd:original") == (b"x", "image/jpeg")
+
+
+def test_tiered_cache_promotes_disk_hits(tmp_path):
+    disk = DiskCache(str(tmp_path), 1000)
+    disk.set("a:original", b"jpeg", "image/jpeg")
+    cache = TieredCache(LRUByteCache(100), disk)
+
+    assert cache.get("a:original") == (b"jpeg", "image/jpeg")
+    assert cache.memory.get("a:original") == (b"jpeg", "image/jpeg")
+
+    cache.set("b:original", b"png", "image/png")
+    assert disk.get("b:original") == (b"png", "image/png")
+    cache.invalidate_prefix("b:")
+    assert cache.get("b:original") is None
+    assert cache.stats()["disk"]["entries"] == 1
+
+
+def test_memory_only_tiered_cache():
+    cache = TieredCache(LRUByteCache(100))
+    cache.set("a:original", b"jpeg", "image/jpeg")
+    assert cache.get("a:original") == (b"jpeg", "image/jpeg")
+    assert cache.stats()["disk"] is None
+
+
+def test_shared_stream_replays_chunks_to_late_readers():
+    async def run():
+        stream = SharedStream("image/jpeg", {})
+        await stream.feed(b"a")
+        early = asyncio.create_task(stream.read())
+        await asyncio.sleep(0)
+        await stream.feed(b"b")
+        late = asyncio.create_task(stream.read())
+        await stream.finish()
+        return await early, await late
+
+    assert asyncio.run(run()) == (b"ab", b"ab")
+
+
+def test_shared_stream_propagates_errors():
+    async def run():
+        stream = SharedStream("image/jpeg", {})
+        await stream.feed(b"a")
+        await stream.finish(OSError("connection reset"))
+        return await stream.read()
+
+    with pytest.raises(OSError):
+        asyncio.run(run())
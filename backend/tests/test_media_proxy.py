@@ -0,0 +1,128 @@
+import asyncio
+
+import httpx
+from fastapi import BackgroundTasks
+
+from app.routers import media
+from app.utils.core.config import settings
+from app.utils.media_cache import LRUByteCache, TieredCache, original_key
+
+
+def serve(monkeypatch, entries: dict, accept: str, negotiated_formats: list[str]):
+    """Appelle le proxy avec un cache pre-rempli (aucun appel au slave)."""
+    cache = TieredCache(LRUByteCache(10_000))
+    for key, entry in entries.items():
+        cache.set(key, *entry)
+    monkeypatch.setattr(media, "hot_cache", cache)
+    monkeypatch.setattr(settings, "MEDIA_NEGOTIATED_FORMATS", negotiated_formats)
+    return asyncio.run(media.proxy_file("file", BackgroundTasks(), w=None, fmt=None, accept=accept))
+
+
+def test_response_varies_on_accept_even_without_variant(monkeypatch):
+    response = serve(monkeypatch, {original_key("file"): (b"jpeg", "image/jpeg")}, "text/html", ["webp"])
+    assert response.headers["vary"] == "Accept"
+    assert response.body == b"jpeg"
+
+
+def test_no_vary_when_negotiation_is_disabled(monkeypatch):
+    response = serve(monkeypatch, {original_key("file"): (b"jpeg", "image/jpeg")}, "image/webp", [])
+    assert "vary" not in response.headers
+    assert response.body == b"jpeg"
+
+
+def test_cached_negotiated_variant_is_served(monkeypatch):
+    response = serve(monkeypatch, {
+        original_key("file"): (b"jpeg", "image/jpeg"),
+        media.variant_key("file", None, None, "webp"): (b"webp", "image/webp"),
+    }, "image/webp,*/*;q=0.8", ["webp"])
+    assert (response.body, response.media_type, response.headers["vary"]) == (b"webp", "image/webp", "Accept")
+
+
+class FakeUpstream:
+    """Reponse du slave ouverte en streaming."""
+
+    def __init__(self, content: bytes, headers: dict):
+        self.content = content
+        self.headers = httpx.Headers(headers)
+        self.closed = False
+
+    async def aiter_raw(self, chunk_size: int):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    async def aclose(self):
+        self.closed = True
+
+
+def stream_large_file(monkeypatch, upstream: FakeUpstream):
+    async def open_file_stream(file_id: str):
+        return upstream
+
+    monkeypatch.setattr(media, "hot_cache", TieredCache(LRUByteCache(10_000)))
+    monkeypatch.setattr(media, "open_file_stream", open_file_stream)
+    monkeypatch.setattr(settings, "MEDIA_NEGOTIATED_FORMATS", [])
+    monkeypatch.setattr(settings, "MEDIA_CACHE_MAX_OBJECT_BYTES", 10)
+    monkeypatch.setattr(settings, "MEDIA_PROXY_CHUNK_SIZE", 4)
+    return asyncio.run(media.proxy_file("file", BackgroundTasks(), w=None, fmt=None, accept=None))
+
+
+def test_large_file_is_relayed_with_upstream_headers(monkeypatch):
+    upstream = FakeUpstream(b"0123456789abcdef", {
+        "content-type": "image/jpeg", "content-length": "16", "etag": '"v1"', "x-internal": "hidden",
+    })
+    response = stream_large_file(monkeypatch, upstream)
+
+    async def read():
+        return [chunk async for chunk in response.body_iterator]
+
+    assert asyncio.run(read()) == [b"0123", b"4567", b"89ab", b"cdef"]
+    assert (response.media_type, response.headers["content-length"], response.headers["etag"]) == ("image/jpeg", "16", '"v1"')
+    assert "x-internal" not in response.headers
+    assert upstream.closed
+
+
+def test_relay_closes_upstream_when_client_disconnects(monkeypatch):
+    upstream = FakeUpstream(b"0123456789abcdef", {"content-type": "image/jpeg", "content-length": "16"})
+    response = stream_large_file(monkeypatch, upstream)
+
+    async def disconnect():
+        await anext(response.body_iterator)
+        await response.body_iterator.aclose()
+
+    asyncio.run(disconnect())
+    assert upstream.closed
+
+
+def test_concurrent_misses_share_one_slave_fetch(monkeypatch):
+    opened = []
+
+    async def open_file_stream(file_id: str):
+        opened.append(FakeUpstream(b"0123456789", {"content-type": "image/png", "content-length": "10"}))
+        return opened[-1]
+
+    cache = TieredCache(LRUByteCache(10_000))
+    monkeypatch.setattr(media, "hot_cache", cache)
+    monkeypatch.setattr(media, "open_file_stream", open_file_stream)
+    monkeypatch.setattr(settings, "MEDIA_CACHE_MAX_OBJECT_BYTES", 100)
+
+    async def run():
+        return await asyncio.gather(*[media.fetch_original("file") for _ in range(3)])
+
+    assert asyncio.run(run()) == [b"0123456789"] * 3
+    assert len(opened) == 1 and opened[0].closed
+    assert cache.get(original_key("file")) == (b"0123456789", "image/png")
+
+
+def test_unshared_original_reuses_the_open_response(monkeypatch):
+    opened = []
+
+    async def open_file_stream(file_id: str):
+        opened.append(FakeUpstream(b"0123456789", {"content-type": "image/png"}))
+        return opened[-1]
+
+    monkeypatch.setattr(media, "open_file_stream", open_file_stream)
+    shared, upstream = asyncio.run(media.open_shared_original("file"))
+
+    # Taille inconnue : ni partage ni cache, mais pas de second appel au slave
+    assert shared is None and upstream is opened[0]
+    assert len(opened) == 1
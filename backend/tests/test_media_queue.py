@@ -0,0 +1,91 @@
+import io
+import queue
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.entities.post import Post, PostStatus
+from app.services import media_queue
+from app.utils.core.config import settings
+
+
+@pytest.fixture
+def spool(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_queue, "SPOOL_DIR", tmp_path)
+    monkeypatch.setattr(media_queue, "INCOMING_DIR", tmp_path / ".incoming")
+    monkeypatch.setattr(media_queue, "_jobs", queue.Queue())
+    monkeypatch.setattr(media_queue, "_workers", [])
+    monkeypatch.setattr(settings, "MEDIA_WORKERS", 0)
+    return tmp_path
+
+
+@pytest.fixture
+def post(db, monkeypatch):
+    monkeypatch.setattr(media_queue, "engine", db.get_bind())
+    post = Post(id=1, group_id=1, status=PostStatus.PROCESSING)
+    db.add(post)
+    db.commit()
+    return post
+
+
+def queued(jobs: queue.Queue) -> list[int]:
+    return [jobs.get_nowait() for _ in range(jobs.qsize())]
+
+
+def test_enqueue_writes_ordered_files(spool):
+    files = [UploadFile(io.BytesIO(b"a"), filename="../a.jpg"), UploadFile(io.BytesIO(b"b"), filename="b.png")]
+    media_queue.enqueue_post_media(1, files, orders=[3, 5])
+
+    assert sorted(path.name for path in (spool / "1").iterdir()) == ["3_a.jpg", "5_b.png"]
+    assert (spool / "1" / "5_b.png").read_bytes() == b"b"
+    assert queued(media_queue._jobs) == [1]
+
+
+def test_start_workers_resumes_spooled_jobs(spool):
+    (spool / "4").mkdir()
+    (spool / "7").mkdir()
+    (spool / ".incoming" / "9").mkdir(parents=True)
+    media_queue.start_workers()
+
+    assert sorted(queued(media_queue._jobs)) == [4, 7]
+    # Telechargement interrompu : abandonne
+    assert not (spool / ".incoming").exists()
+
+
+def test_process_post_skips_stored_orders_and_rejected_duplicates(db, spool, post, monkeypatch):
+    job_dir = spool / "1"
+    job_dir.mkdir()
+    for name in ("0_a.jpg", "1_b.jpg", "2_c.jpg", "10_d.jpg"):
+        (job_dir / name).write_bytes(name.encode())
+
+    stored = []
+
+    def store_media(db, post_id, order, content, filename):
+        if filename == "c.jpg":
+            raise HTTPException(status_code=409, detail="Near duplicate")
+        stored.append(order)
+        return type("Media", (), {"media_url": f"/media/proxy/{order}"}), {"compressed_size": len(content)}
+
+    monkeypatch.setattr(media_queue, "get_stored_orders", lambda db, post_id: {0})
+    monkeypatch.setattr(media_queue, "store_media", store_media)
+    media_queue._process_post(1)
+
+    db.refresh(post)
+    assert stored == [1, 10]
+    assert (post.status, post.error_message) == (PostStatus.READY, "Near duplicates rejected: c.jpg")
+    assert not job_dir.exists()
+
+
+def test_process_post_marks_failure(db, spool, post, monkeypatch):
+    (spool / "1").mkdir()
+    (spool / "1" / "0_a.jpg").write_bytes(b"a")
+
+    def store_media(*args):
+        raise RuntimeError("slave unavailable")
+
+    monkeypatch.setattr(media_queue, "get_stored_orders", lambda db, post_id: set())
+    monkeypatch.setattr(media_queue, "store_media", store_media)
+    media_queue._process_post(1)
+
+    db.refresh(post)
+    assert (post.status, post.error_message) == (PostStatus.FAILED, "slave unavailable")
@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.entities.post import Post, PostStatus
+from app.services import resumable_uploads
+from app.utils.core.config import settings
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 24  # 32 octets
+
+
+@pytest.fixture
+def queued(tmp_path, monkeypatch):
+    monkeypatch.setattr(resumable_uploads, "UPLOADS_DIR", tmp_path / ".uploads")
+    jobs = []
+    monkeypatch.setattr(resumable_uploads, "enqueue_spooled_job", lambda post_id, job_dir: jobs.append(post_id))
+    resumable_uploads.create_upload(1, [("a.png", len(PNG)), ("b.png", len(PNG))])
+    return jobs
+
+
+def append(order: int, offset: int, *parts: bytes) -> int:
+    async def chunks():
+        for part in parts:
+            yield part
+
+    return asyncio.run(resumable_uploads.append_chunk(1, order, offset, chunks()))
+
+
+def rejected(order: int, offset: int, *parts: bytes) -> HTTPException:
+    with pytest.raises(HTTPException) as error:
+        append(order, offset, *parts)
+    return error.value
+
+
+def test_chunks_advance_offset_and_complete_post(queued):
+    assert append(0, 0, PNG[:10]) == 10
+    assert append(0, 10, PNG[10:20], PNG[20:]) == 32
+    assert resumable_uploads.get_offsets(1) == [(32, 32), (0, 32)]
+    assert queued == []
+
+    assert append(1, 0, PNG) == 32
+    assert queued == [1]
+    # Manifeste supprime : l'upload n'est plus modifiable
+    assert rejected(1, 32, b"x").status_code == 404
+
+
+def test_offset_mismatch_returns_current_offset(queued):
+    append(0, 0, PNG[:20])
+    error = rejected(0, 10, PNG[10:])
+    assert (error.status_code, error.detail) == (409, {"error": "offset_mismatch", "offset": 20})
+    # Reprise a l'offset retourne
+    assert append(0, 20, PNG[20:]) == 32
+
+
+def test_chunk_exceeding_declared_size_is_discarded(queued):
+    append(0, 0, PNG[:20])
+    assert rejected(0, 20, PNG[20:], b"extra").status_code == 413
+    assert resumable_uploads.get_offsets(1)[0] == (20, 32)
+
+
+def test_invalid_magic_bytes_are_rejected(queued):
+    assert rejected(0, 0, b"MZ" + b"\0" * 30).status_code == 415
+    assert resumable_uploads.get_offsets(1)[0] == (0, 32)
+
+
+def test_unknown_file_order(queued):
+    assert rejected(5, 0, PNG).status_code == 404
+
+
+def test_concurrent_patch_on_same_file_conflicts(queued, tmp_path):
+    path = tmp_path / ".uploads" / "1" / "0_a.png"
+    with open(path, "ab") as other:
+        assert resumable_uploads._try_lock(other, (1, 0))
+        try:
+            assert rejected(0, 0, PNG).status_code == 409
+        finally:
+            resumable_uploads._unlock(other, (1, 0))
+    assert append(0, 0, PNG) == 32
+
+
+def test_sweep_abandoned_uploads(db, queued, tmp_path):
+    db.add(Post(id=1, group_id=1, status=PostStatus.PROCESSING))
+    db.commit()
+    resumable_uploads.create_upload(2, [("c.png", 32)])
+
+    assert resumable_uploads.sweep_abandoned_uploads(db) == 0
+    later = time.time() + settings.RESUMABLE_UPLOAD_TTL_SECONDS + 1
+    assert resumable_uploads.sweep_abandoned_uploads(db, now=later) == 2
+
+    assert list((tmp_path / ".uploads").iterdir()) == []
+    post = db.get(Post, 1)
+    assert (post.status, post.error_message) == (PostStatus.FAILED, "Resumable upload abandoned")
@@ -0,0 +1,52 @@
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.utils.auth.signed_urls import compute_signature, sign_file_url, sign_media_url, sign_message
+from app.utils.core.config import settings
+
+
+def parse(url: str) -> tuple[str, int, str]:
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    return parsed.path, int(query["expires"][0]), query["sig"][0]
+
+
+def test_sign_file_url():
+    now = 1_700_000_123
+    path, expires, signature = parse(sign_file_url("abc123", now=now))
+    assert path == f"{settings.STORAGE_PUBLIC_URL}/public/abc123"
+    assert expires % settings.SIGNED_URL_BUCKET_SECONDS == 0
+    assert now + settings.SIGNED_URL_TTL_SECONDS <= expires
+    assert expires < now + settings.SIGNED_URL_TTL_SECONDS + settings.SIGNED_URL_BUCKET_SECONDS
+    assert signature == compute_signature("abc123", expires)
+    assert "=" not in signature
+
+
+def test_url_is_stable_within_a_bucket():
+    bucket = settings.SIGNED_URL_BUCKET_SECONDS
+    start = 1_700_000_000 // bucket * bucket + 1
+    assert sign_file_url("abc", now=start) == sign_file_url("abc", now=start + bucket - 2)
+    assert sign_file_url("abc", now=start) != sign_file_url("abc", now=start + bucket)
+
+
+def test_signature_depends_on_file_and_key():
+    assert compute_signature("a", 100) != compute_signature("b", 100)
+    assert compute_signature("a", 100) != compute_signature("a", 101)
+    assert compute_signature("a", 100) != compute_signature("a", 100, key="other-key")
+
+
+def test_missing_key_raises(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_SIGNING_KEY", "")
+    with pytest.raises(RuntimeError):
+        sign_message("anything")
+
+
+def test_sign_media_url(monkeypatch):
+    monkeypatch.setattr(settings, "SIGNED_MEDIA_URLS", False)
+    assert sign_media_url("/media/proxy/abc") == "/media/proxy/abc"
+
+    monkeypatch.setattr(settings, "SIGNED_MEDIA_URLS", True)
+    assert sign_media_url("/media/proxy/abc").startswith(f"{settings.STORAGE_PUBLIC_URL}/public/abc?")
+    assert sign_media_url("https://example.com/a.jpg") == "https://example.com/a.jpg"
+    assert sign_media_url(None) is None
@@ -0,0 +1,93 @@
+import base64
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.auth.signed_urls import sign_message
+from app.utils.auth.upload_tokens import (
+    create_upload_token,
+    receipt_message,
+    verify_upload_receipt,
+    verify_upload_receipts,
+)
+from app.utils.core.config import settings
+
+
+def make_receipt(order: int, count: int = 2, post_id: int = 7, **overrides) -> dict:
+    """Recu tel que le slave le signe."""
+    receipt = {
+        "upload_id": f"upload-{order}",
+        "post_id": post_id,
+        "order": order,
+        "count": count,
+        "extension": ".jpg",
+        "size": 1234,
+        "sha256": "0" * 64,
+    }
+    receipt["signature"] = sign_message(receipt_message(receipt))
+    receipt.update(overrides)
+    return receipt
+
+
+def test_create_upload_token():
+    token = create_upload_token(post_id=7, order=1, count=3, filename="a.jpg", max_bytes=1000, now=1_000)
+    encoded, signature = token["token"].split(".")
+    assert signature == sign_message(f"upload:{encoded}")
+
+    payload = json.loads(base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)))
+    assert payload["upload_id"] == token["upload_id"]
+    assert (payload["post_id"], payload["order"], payload["count"]) == (7, 1, 3)
+    assert payload["expires"] == token["expires"] == 1_000 + settings.UPLOAD_TOKEN_TTL_SECONDS
+    assert token["upload_url"] == f"{settings.STORAGE_PUBLIC_URL}/uploads"
+
+
+def test_valid_receipts():
+    verify_upload_receipts([make_receipt(1), make_receipt(0)], post_id=7)
+
+
+@pytest.mark.parametrize(
+    "receipt",
+    [
+        make_receipt(0, size=1),  # modifie apres signature
+        make_receipt(0, extension=".exe"),
+        make_receipt(0, signature="forged"),
+        make_receipt(0, post_id=8),  # recu d'un autre post
+    ],
+)
+def test_invalid_receipt(receipt):
+    with pytest.raises(HTTPException) as error:
+        verify_upload_receipt(receipt, post_id=7)
+    assert error.value.status_code == 400
+
+
+def test_unsupported_extension_even_if_signed():
+    receipt = make_receipt(0)
+    receipt["extension"] = ".svg"
+    receipt["signature"] = sign_message(receipt_message(receipt))
+    with pytest.raises(HTTPException):
+        verify_upload_receipt(receipt, post_id=7)
+
+
+@pytest.mark.parametrize(
+    "receipts",
+    [
+        [],
+        [make_receipt(0)],  # sous-ensemble
+        [make_receipt(0), make_receipt(0)],  # doublon
+        [make_receipt(0), make_receipt(1, count=3)],  # nombres differents
+        [make_receipt(0, count=1), make_receipt(1, count=1)],  # position hors plage
+    ],
+)
+def test_incomplete_receipts(receipts):
+    with pytest.raises(HTTPException) as error:
+        verify_upload_receipts(receipts, post_id=7)
+    assert error.value.status_code == 400
+
+
+def test_direct_uploads_disabled_without_key(monkeypatch):
+    receipt = make_receipt(0, count=1)
+    monkeypatch.setattr(settings, "STORAGE_SIGNING_KEY", "")
+    with pytest.raises(HTTPException) as error:
+        verify_upload_receipts([receipt], post_id=7)
+    assert error.value.status_code == 503
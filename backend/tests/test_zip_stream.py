@@ -0,0 +1,96 @@
+import asyncio
+import io
+import zipfile
+import zlib
+from datetime import datetime
+
+import pytest
+
+from app.utils.zip_stream import ZipEntry, ZipLayout, stream_zip
+
+FILES = {
+    "a": b"first photo" * 100,
+    "b": b"",
+    "c": bytes(range(256)) * 40,
+}
+
+
+def make_layout(crcs: bool = False) -> ZipLayout:
+    return ZipLayout([
+        ZipEntry(
+            name=f"{key}.jpg",
+            size=len(data),
+            modified=datetime(2024, 5, 1, 12, 30),
+            key=key,
+            crc=zlib.crc32(data) if crcs else None,
+        )
+        for key, data in FILES.items()
+    ])
+
+
+def collect(layout: ZipLayout, start: int = 0, end=None) -> tuple[bytes, list[str]]:
+    """Octets produits et cles des fichiers lus."""
+    read = []
+
+    async def chunks(key: str):
+        data = FILES[key]
+        for index in range(0, len(data), 1000):
+            yield data[index:index + 1000]
+
+    async def contents():
+        for entry in layout.entries_to_read(start):
+            read.append(entry.key)
+            yield chunks(entry.key)
+
+    async def run():
+        return b"".join([part async for part in stream_zip(layout, contents(), start, end)])
+
+    return asyncio.run(run()), read
+
+
+def test_full_archive_is_valid():
+    layout = make_layout()
+    data, read = collect(layout)
+    assert len(data) == layout.total_size
+    assert read == list(FILES)
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert {name: archive.read(name) for name in archive.namelist()} == {
+            f"{key}.jpg": value for key, value in FILES.items()
+        }
+    assert [entry.crc for entry in layout.entries] == [zlib.crc32(value) for value in FILES.values()]
+
+
+def test_ranges_match_full_archive():
+    full, _ = collect(make_layout())
+    layout = make_layout()
+    offsets = [0, 1, 30, layout.entries[1].offset, layout.entries[2].offset + 7, layout.central_directory_offset]
+    for start in offsets:
+        for end in (start, start + 99, layout.total_size - 1):
+            end = min(end, layout.total_size - 1)
+            part, _ = collect(make_layout(), start, end)
+            assert part == full[start:end + 1], (start, end)
+
+
+def test_resume_without_known_crcs_reads_earlier_files():
+    layout = make_layout()
+    start = layout.entries[2].offset + 10
+    _, read = collect(layout, start)
+    assert read == list(FILES)
+
+
+def test_resume_with_known_crcs_skips_earlier_files():
+    full, _ = collect(make_layout())
+    layout = make_layout(crcs=True)
+    start = layout.entries[2].offset + 10
+    assert [entry.key for entry in layout.entries_to_read(start)] == ["c"]
+
+    part, read = collect(layout, start)
+    assert read == ["c"]
+    assert part == full[start:]
+
+
+def test_wrong_size_raises():
+    layout = ZipLayout([ZipEntry("x.jpg", 5, datetime(2024, 1, 1), "a")])
+    with pytest.raises(ValueError, match="expected 5 bytes"):
+        collect(layout)
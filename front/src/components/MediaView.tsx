@@ -0,0 +1,45 @@
+import { api } from '../services/api'
+import type { Media } from '../types'
+
+interface MediaViewProps {
+  media: Pick<Media, 'media_url' | 'medium_url' | 'mime_type'>
+  // "tile" : vignette de la grille (rendition medium), "full" : visionneuse
+  variant: 'tile' | 'full'
+  alt: string
+  className?: string
+  onLoad?: () => void
+}
+
+// GIF animes transcodes en MP4 : le fichier principal est une video
+export const isVideoMedia = (media: Pick<Media, 'mime_type'>) => !!media.mime_type?.startsWith('video/')
+
+export default function MediaView({ media, variant, alt, className, onLoad }: MediaViewProps) {
+  const url = variant === 'tile' ? media.medium_url || media.media_url : media.media_url
+
+  // Les vignettes d'un GIF anime sont des images fixes ; seule l'absence de
+  // vignette (medias anterieurs) oblige a afficher la video dans la grille
+  if (isVideoMedia(media) && url === media.media_url) {
+    return (
+      <video
+        src={api.getMediaUrl(url)}
+        className={className}
+        autoPlay
+        muted
+        loop
+        playsInline
+        aria-label={alt}
+        onLoadedData={onLoad}
+      />
+    )
+  }
+
+  return (
+    <img
+      src={api.getMediaUrl(url)}
+      alt={alt}
+      loading={variant === 'tile' ? 'lazy' : undefined}
+      className={className}
+      onLoad={onLoad}
+    />
+  )
+}
@@ -283,7 +283,7 @@ function Admin() {
                         <div className="admin-group-image">
                           {group.image_url ? (
                             <img
-                              src={api.getMediaUrl(group.image_url)}
+                              src={api.getMediaUrl(group.image_medium_url || group.image_url)}
                               alt={group.nom}
                             />
                           ) : (
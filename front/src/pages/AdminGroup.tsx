@@ -3,6 +3,7 @@ import { Link, useParams, useNavigate } from 'react-router-dom'
 import { useAuth } from '../contexts/AuthContext'
 import { api } from '../services/api'
 import type { Group, MediaWithPost, GroupMember } from '../types'
+import MediaView, { isVideoMedia } from '../components/MediaView'
 import logo from '../assets/logo.png'
 import '../styles/group.css'
 
@@ -243,11 +244,11 @@ function AdminGroup() {
     }
   }
 
-  const renderAvatar = (user: { username?: string; avatar_url?: string | null } | undefined | null, className: string) => {
+  const renderAvatar = (user: { username?: string; avatar_url?: string | null; avatar_small_url?: string | null } | undefined | null, className: string) => {
     if (user?.avatar_url) {
       return (
         <img
-          src={api.getMediaUrl(user.avatar_url)}
+          src={api.getMediaUrl(user.avatar_small_url || user.avatar_url)}
           alt={user.username || 'User'}
           className={className}
         />
@@ -465,10 +466,10 @@ function AdminGroup() {
                         className={`media-item ${loadedImages.has(mediaItem.id) ? 'image-loaded' : ''}`}
                         onClick={() => handleImageClick(mediaItem)}
                       >
-                        <img
-                          src={api.getMediaUrl(mediaItem.media_url)}
+                        <MediaView
+                          media={mediaItem}
+                          variant="tile"
                           alt={post?.caption || ''}
-                          loading="lazy"
                           className={loadedImages.has(mediaItem.id) ? 'loaded' : ''}
                           onLoad={() => handleImageLoad(mediaItem.id)}
                         />
@@ -751,7 +752,7 @@ function AdminGroup() {
             className="image-modal-download"
             onClick={(e) => {
               e.stopPropagation()
-              handleDownloadImage(selectedMedia.media_url, `image-${selectedMedia.id}.jpg`)
+              handleDownloadImage(selectedMedia.media_url, `image-${selectedMedia.id}.${isVideoMedia(selectedMedia) ? 'mp4' : 'jpg'}`)
             }}
             aria-label="Télécharger l'image"
           >
@@ -787,8 +788,9 @@ function AdminGroup() {
           )}
 
           <div className="image-modal-content" onClick={e => e.stopPropagation()}>
-            <img
-              src={api.getMediaUrl(selectedMedia.media_url)}
+            <MediaView
+              media={selectedMedia}
+              variant="full"
               alt={selectedMedia.post?.caption || ''}
             />
 
@@ -178,7 +178,7 @@ function Dashboard() {
               >
                 {user?.avatar_url ? (
                   <img
-                    src={api.getMediaUrl(user.avatar_url)}
+                    src={api.getMediaUrl(user.avatar_small_url || user.avatar_url)}
                     alt={user.username}
                     className="user-avatar-img"
                   />
@@ -387,7 +387,7 @@ function Dashboard() {
                   <div className="group-card-header">
                     {group.image_url ? (
                       <img
-                        src={api.getMediaUrl(group.image_url)}
+                        src={api.getMediaUrl(group.image_medium_url || group.image_url)}
                         alt={group.nom}
                         className="group-image"
                       />
@@ -354,7 +354,9 @@ class ApiService {
   }
 
   getMediaUrl(mediaUrl: string): string {
-    // Les URLs sont déjà sous forme /media/proxy/{file_id}
+    // URLs du proxy (/media/proxy/{file_id}) servies par l'API ;
+    // les URLs signées (/storage/public/...) vont directement au stockage
+    if (!mediaUrl || !mediaUrl.startsWith('/media/')) return mediaUrl
     return `${API_BASE_URL}${mediaUrl}`
   }
 }
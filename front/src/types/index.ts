@@ -4,6 +4,8 @@ export interface User {
   username: string
   email: string
   avatar_url?: string | null
+  avatar_small_url?: string | null
+  avatar_medium_url?: string | null
   role_id?: number
 }
 
@@ -31,6 +33,8 @@ export interface Group {
   nom: string
   description: string | null
   image_url: string | null
+  image_small_url?: string | null
+  image_medium_url?: string | null
   invite_code: string | null
   creator?: User | null
   member_count?: number
@@ -48,6 +52,7 @@ export interface GroupMember {
     id: number
     nom: string
     image_url: string | null
+    image_small_url?: string | null
   } | null
 }
 
@@ -69,7 +74,16 @@ export interface JoinGroupData {
 export interface Media {
   id: number
   media_url: string
+  thumbnail_url?: string | null
+  medium_url?: string | null
+  original_url?: string | null
+  mime_type?: string | null
   order: number
+  width?: number | null
+  height?: number | null
+  dominant_color?: string | null
+  blurhash?: string | null
+  duplicate_of_id?: number | null
 }
 
 export interface GroupMemberBasic {
@@ -84,6 +98,7 @@ export interface GroupBasic {
   id: number
   nom: string
   image_url: string | null
+  image_small_url?: string | null
 }
 
 export interface Post {
@@ -10,6 +10,7 @@ REM Docker configuration
 set NETWORK_NAME=closo_network
 set VOLUME_DB=closo_postgres_data_local
 set VOLUME_STORAGE=closo_storage_data_local
+set VOLUME_SPOOL=closo_spool_data_local
 
 REM Container names (suffixed with _local to avoid conflicts)
 set CONTAINER_DB=closo_db_local
@@ -10,6 +10,13 @@ if %ERRORLEVEL% NEQ 0 (
     docker network create %NETWORK_NAME%
 )
 
+REM Create volume if not exists (uploads en attente de traitement)
+docker volume inspect %VOLUME_SPOOL% >nul 2>&1
+if %ERRORLEVEL% NEQ 0 (
+    echo [BACKEND] Creating volume %VOLUME_SPOOL%...
+    docker volume create %VOLUME_SPOOL%
+)
+
 REM Check if required files exist
 if not exist "%PROJECT_ROOT%\backend\Dockerfile" (
     echo [ERROR] backend\Dockerfile not found
@@ -42,6 +49,7 @@ docker run -d ^
     --name %CONTAINER_BACKEND% ^
     --network %NETWORK_NAME% ^
     --env-file "%PROJECT_ROOT%\backend\.env" ^
+    -v %VOLUME_SPOOL%:/app/spool ^
     -p %PORT_BACKEND%:8000 ^
     --restart unless-stopped ^
     %IMAGE_BACKEND%
@@ -27,5 +27,5 @@ echo [OK] All services stopped
 echo.
 echo Note: Volumes are preserved. Data is safe.
 echo To remove volumes, run:
-echo   docker volume rm %VOLUME_DB% %VOLUME_STORAGE%
+echo   docker volume rm %VOLUME_DB% %VOLUME_STORAGE% %VOLUME_SPOOL%
 echo.
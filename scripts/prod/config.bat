@@ -21,6 +21,7 @@ REM Docker configuration
 set NETWORK_NAME=closo_network
 set VOLUME_DB=closo_postgres_data
 set VOLUME_STORAGE=closo_storage_data
+set VOLUME_SPOOL=closo_spool_data
 
 REM Container names
 set CONTAINER_DB=closo_db
@@ -5,11 +5,17 @@ Seul le backend Closo peut accéder aux fichiers via une clé API secrète.
 """
 
 import os
+import re
+import hmac
+import time
 import uuid
+import json
+import base64
+import hashlib
 import mimetypes
 import aiofiles
 from pathlib import Path
-from fastapi import FastAPI, UploadFile, File, Header, HTTPException, Depends
+from fastapi import FastAPI, UploadFile, File, Header, HTTPException, Depends, Query, Request
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
 
@@ -20,6 +26,19 @@ mimetypes.init()
 STORAGE_DIR = Path(os.getenv("STORAGE_DIR", "./storage"))
 API_SECRET_KEY = os.getenv("SECRET_KEY", "change-me-in-production")
 NODE_ID = os.getenv("NODE_ID", "node-unamed")
+# Clé partagée avec le backend pour les URLs signées et les uploads directs
+# (distincte de la clé API : sans elle, ces routes sont désactivées)
+SIGNING_KEY = os.getenv("STORAGE_SIGNING_KEY", "")
+FILE_ID_PATTERN = re.compile(r"^[A-Za-z0-9-]+$")
+
+# Extensions des uploads directs selon leurs magic bytes (JPEG, PNG, GIF, WebP)
+UPLOAD_SIGNATURES = [
+    (b"\xFF\xD8\xFF", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+]
+UPLOAD_HEAD_BYTES = 16  # Octets lus avant d'accepter un upload direct (WebP : "RIFF....WEBP")
 
 # Créer le dossier de stockage
 STORAGE_DIR.mkdir(parents=True, exist_ok=True)
@@ -39,6 +58,23 @@ class FileUploadResponse(BaseModel):
     size: int
 
 
+class UploadReceipt(BaseModel):
+    upload_id: str
+    post_id: int
+    order: int
+    count: int
+    filename: str
+    extension: str
+    size: int
+    sha256: str
+    node_id: str
+    signature: str
+
+
+class FileStatRequest(BaseModel):
+    ids: list[str]
+
+
 class HealthResponse(BaseModel):
     status: str
     node_id: str
@@ -55,6 +91,53 @@ async def verify_api_key(x_api_key: str = Header(..., alias="X-API-Key")):
     return x_api_key
 
 
+def sign(message: str) -> str:
+    """Signature HMAC-SHA256 (base64 url, sans padding), identique à celle du backend."""
+    if not SIGNING_KEY:
+        raise HTTPException(status_code=503, detail="Signed access is disabled (STORAGE_SIGNING_KEY not set)")
+    digest = hmac.new(SIGNING_KEY.encode(), message.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def decode_upload_token(token: str) -> dict:
+    """Vérifie la signature et l'expiration d'un jeton d'upload émis par le backend."""
+    try:
+        encoded, signature = token.split(".", 1)
+        payload = json.loads(base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)))
+    except ValueError:
+        raise HTTPException(status_code=403, detail="Invalid upload token")
+    if not hmac.compare_digest(sign(f"upload:{encoded}"), signature) or payload["expires"] < time.time():
+        raise HTTPException(status_code=403, detail="Invalid or expired upload token")
+    if not FILE_ID_PATTERN.match(payload["upload_id"]):
+        raise HTTPException(status_code=403, detail="Invalid upload token")
+    return payload
+
+
+def find_stored_file(file_id: str) -> Path | None:
+    """Fichier stocké sous cet ID (uploads directs en cours exclus), ou None."""
+    matching_files = [path for path in STORAGE_DIR.glob(f"{file_id}.*") if path.suffix != ".part"]
+    if matching_files:
+        return matching_files[0]
+    file_path = STORAGE_DIR / file_id
+    return file_path if file_path.is_file() else None
+
+
+def detect_extension(head: bytes) -> str | None:
+    for magic, extension in UPLOAD_SIGNATURES:
+        if head.startswith(magic):
+            return extension
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+def require_extension(head: bytes) -> str:
+    extension = detect_extension(head)
+    if extension is None:
+        raise HTTPException(status_code=415, detail="Unsupported file type")
+    return extension
+
+
 # Routes
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -68,12 +151,8 @@ async def health_check():
     )
 
 
-@app.post("/files", response_model=FileUploadResponse, dependencies=[Depends(verify_api_key)])
-async def upload_file(file: UploadFile = File(...)):
-    """
-    Upload un fichier et lui attribue un ID unique.
-    Requiert la clé API du backend Closo.
-    """
+async def save_upload(file: UploadFile) -> FileUploadResponse:
+    """Enregistre un fichier uploadé sous un ID unique (en conservant son extension)."""
     # Générer un ID unique
     file_id = str(uuid.uuid4())
 
@@ -101,23 +180,128 @@ async def upload_file(file: UploadFile = File(...)):
     )
 
 
+@app.post("/files", response_model=FileUploadResponse, dependencies=[Depends(verify_api_key)])
+async def upload_file(file: UploadFile = File(...)):
+    """
+    Upload un fichier et lui attribue un ID unique.
+    Requiert la clé API du backend Closo.
+    """
+    return await save_upload(file)
+
+
+@app.post("/files/batch", response_model=list[FileUploadResponse], dependencies=[Depends(verify_api_key)])
+async def upload_files(files: list[UploadFile] = File(...)):
+    """
+    Upload plusieurs fichiers en une requête (imports d'albums).
+    Les IDs sont retournés dans l'ordre des fichiers.
+    Requiert la clé API du backend Closo.
+    """
+    return [await save_upload(file) for file in files]
+
+
+@app.post("/uploads", response_model=UploadReceipt)
+async def upload_direct(request: Request, x_upload_token: str = Header(..., alias="X-Upload-Token")):
+    """
+    Reçoit un upload envoyé directement par le client (corps brut, en streaming),
+    autorisé par un jeton signé du backend. Retourne un reçu signé que le client
+    transmet au backend pour finaliser son post.
+    """
+    payload = decode_upload_token(x_upload_token)
+    upload_id = payload["upload_id"]
+    max_bytes = payload["max_bytes"]
+
+    if int(request.headers.get("content-length") or 0) > max_bytes:
+        raise HTTPException(status_code=413, detail="File too large")
+
+    partial_path = STORAGE_DIR / f"{upload_id}.part"
+    try:
+        # Réservation atomique du jeton : une seule requête peut créer le .part
+        fd = os.open(partial_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        raise HTTPException(status_code=409, detail="Upload token already used")
+
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    extension = None
+    try:
+        async with aiofiles.open(fd, "wb") as f:
+            # Vérifié après la réservation : un upload terminé a renommé son .part après s'être écrit
+            if find_stored_file(upload_id):
+                raise HTTPException(status_code=409, detail="Upload token already used")
+
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail="File too large")
+                digest.update(chunk)
+                if extension is None:
+                    # Type vérifié sur les premiers octets, avant d'écrire quoi que ce soit
+                    head += chunk
+                    if len(head) < UPLOAD_HEAD_BYTES:
+                        continue
+                    extension = require_extension(head)
+                    chunk, head = head, b""
+                await f.write(chunk)
+
+            if extension is None:
+                # Fichier plus court que UPLOAD_HEAD_BYTES
+                extension = require_extension(head)
+                await f.write(head)
+
+        partial_path.rename(STORAGE_DIR / f"{upload_id}{extension}")
+    except BaseException:
+        partial_path.unlink(missing_ok=True)
+        raise
+
+    receipt = {
+        "upload_id": upload_id,
+        "post_id": payload["post_id"],
+        "order": payload["order"],
+        "count": payload["count"],
+        "filename": payload["filename"],
+        "extension": extension,
+        "size": size,
+        "sha256": digest.hexdigest(),
+    }
+    # Même message que upload_tokens.receipt_message côté backend
+    signature = sign(
+        f"receipt:{upload_id}:{receipt['post_id']}:{receipt['order']}:{receipt['count']}"
+        f":{extension}:{size}:{receipt['sha256']}"
+    )
+    return UploadReceipt(**receipt, node_id=NODE_ID, signature=signature)
+
+
+@app.post("/files/stat", dependencies=[Depends(verify_api_key)])
+async def stat_files(request: FileStatRequest):
+    """
+    Retourne le nom stocké et la taille de plusieurs fichiers en une requête
+    (les IDs inconnus sont absents du résultat).
+    Requiert la clé API du backend Closo.
+    """
+    files = {}
+    for file_id in request.ids:
+        if not FILE_ID_PATTERN.match(file_id):
+            continue
+        file_path = find_stored_file(file_id)
+        if file_path:
+            files[file_id] = {
+                "filename": file_path.name,
+                "size": file_path.stat().st_size,
+            }
+    return {"files": files}
+
+
 @app.get("/files/{file_id}", dependencies=[Depends(verify_api_key)])
 async def get_file(file_id: str):
     """
     Récupère un fichier par son ID.
     Requiert la clé API du backend Closo.
     """
-    # Chercher le fichier avec n'importe quelle extension
-    matching_files = list(STORAGE_DIR.glob(f"{file_id}.*"))
-
-    if not matching_files:
-        # Essayer sans extension
-        file_path = STORAGE_DIR / file_id
-        if not file_path.exists():
-            raise HTTPException(status_code=404, detail="File not found")
-        matching_files = [file_path]
-
-    file_path = matching_files[0]
+    # Chercher le fichier avec n'importe quelle extension (ou sans extension)
+    file_path = find_stored_file(file_id)
+    if not file_path:
+        raise HTTPException(status_code=404, detail="File not found")
 
     # Déterminer le type MIME à partir de l'extension
     media_type, _ = mimetypes.guess_type(str(file_path))
@@ -127,6 +311,37 @@ async def get_file(file_id: str):
     return FileResponse(file_path, media_type=media_type)
 
 
+@app.get("/public/{file_id}")
+async def get_public_file(
+    file_id: str,
+    expires: int = Query(...),
+    sig: str = Query(...),
+):
+    """
+    Récupère un fichier via une URL signée par le backend (HMAC-SHA256 de
+    "{file_id}:{expires}"), sans clé API : le navigateur télécharge directement.
+    """
+    now = int(time.time())
+    if not FILE_ID_PATTERN.match(file_id) or expires < now:
+        raise HTTPException(status_code=403, detail="Invalid or expired signature")
+
+    if not hmac.compare_digest(sign(f"{file_id}:{expires}"), sig):
+        raise HTTPException(status_code=403, detail="Invalid or expired signature")
+
+    # Un upload direct en cours (.part) n'est pas servi
+    file_path = find_stored_file(file_id)
+    if not file_path:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    media_type, _ = mimetypes.guess_type(str(file_path))
+    # Le fichier ne change jamais : cacheable jusqu'à l'expiration de l'URL
+    return FileResponse(
+        file_path,
+        media_type=media_type or "application/octet-stream",
+        headers={"Cache-Control": f"public, max-age={expires - now}"},
+    )
+
+
 @app.get("/files", dependencies=[Depends(verify_api_key)])
 async def list_files():
     """